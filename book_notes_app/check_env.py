@@ -9,6 +9,12 @@ import sys
 import platform
 import subprocess
 import importlib.util
+
+# 启动耗时分析，需在导入其他模块之前开始
+from src.utils import startup_profiler
+profiler = startup_profiler.get_profiler("check_env")
+profiler.install_import_hook()
+
 import requests
 
 def check_python_version():
@@ -83,31 +89,35 @@ def main():
     
     # 检查必要的包
     print("检查必要的包:")
-    cv2_ok = check_package("cv2")
-    numpy_ok = check_package("numpy")
-    requests_ok = check_package("requests")
-    pyqt5_ok = check_package("PyQt5")
-    paddleocr_ok = check_package("paddleocr")
+    with profiler.phase("检查包"):
+        cv2_ok = check_package("cv2")
+        numpy_ok = check_package("numpy")
+        requests_ok = check_package("requests")
+        pyqt5_ok = check_package("PyQt5")
+        paddleocr_ok = check_package("paddleocr")
     
     # 特别处理paddlepaddle包
-    try:
-        import paddle
-        print(f"已安装: paddlepaddle {paddle.__version__}")
-        paddlepaddle_ok = True
-    except ImportError:
-        print("未安装: paddlepaddle")
-        paddlepaddle_ok = False
+    with profiler.phase("检查paddlepaddle"):
+        try:
+            import paddle
+            print(f"已安装: paddlepaddle {paddle.__version__}")
+            paddlepaddle_ok = True
+        except ImportError:
+            print("未安装: paddlepaddle")
+            paddlepaddle_ok = False
     
     print()
     
     # 检查摄像头
     print("检查摄像头:")
-    camera_ok = check_camera()
+    with profiler.phase("检查摄像头"):
+        camera_ok = check_camera()
     print()
     
     # 检查Ollama服务
     print("检查Ollama服务:")
-    ollama_ok = check_ollama()
+    with profiler.phase("检查Ollama服务"):
+        ollama_ok = check_ollama()
     print()
     
     # 检查结果
@@ -121,7 +131,12 @@ def main():
     else:
         print("环境检查未通过，请解决上述问题后再运行应用程序。")
     
-    input("\n按回车键退出...")
+    # 分析启动耗时时不等待输入
+    if startup_profiler.is_enabled():
+        print()
+        profiler.finish()
+    else:
+        input("\n按回车键退出...")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""命令行批量处理：识别目录中的所有页面图片并生成读书笔记
+
+不依赖图形界面，适合在无人值守时处理大量扫描页面。每页的识别结果单独保存，
+中断后再次运行会跳过已识别的页面。
+
+用法:
+    python src/batch_cli.py 图片目录 [-o 输出目录] [--workers N] [--no-notes]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+
+# 设置控制台编码，解决中文显示问题
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.services.ocr_service import OCRService, TARGET_TEXT_HEIGHT, TILE_SIZE, TILE_OVERLAP
+from src.services.ocr_backends import BACKENDS
+from src.services.ocr_cache import OCRCache
+from src.services.ai_service import AIService
+from src.services.ocr_result import OCRResult, OCRError
+from src.utils.layout import layout_text
+from src.utils.text_utils import join_pages
+from src.utils.prompt_pruning import prepare_notes_text, MIN_LINE_SCORE
+
+# 支持的图片格式，与界面上传图片时一致
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif")
+
+# 识别时图像尺寸的上限，与界面一致，在此范围内根据文字高度选择分辨率
+MAX_IMAGE_WIDTH = 4096
+MAX_IMAGE_HEIGHT = 4096
+
+# 默认OCR工作进程数量
+DEFAULT_WORKERS = max(1, os.cpu_count() or 1)
+
+# 每个OCR任务批量识别的图片数量
+DEFAULT_BATCH_SIZE = 2
+
+# 输出目录中的文件名
+PAGES_DIR_NAME = "pages"
+COMBINED_FILE_NAME = "combined.txt"
+NOTES_FILE_NAME = "notes.md"
+
+def natural_key(path):
+    """按自然顺序排序的键，使 page2 排在 page10 之前"""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", path)]
+
+def find_images(input_dir):
+    """递归查找目录中的图片
+
+    Args:
+        input_dir: 图片目录
+
+    Returns:
+        list: 相对于图片目录的路径列表，按自然顺序排列
+    """
+    images = []
+    for root, dirs, files in os.walk(input_dir):
+        # 按固定顺序遍历子目录
+        dirs.sort(key=natural_key)
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                images.append(os.path.relpath(os.path.join(root, name), input_dir))
+    return sorted(images, key=natural_key)
+
+def page_output_path(pages_dir, relative_path, extension=".txt"):
+    """图片对应的识别结果文件路径
+
+    每页保存两个文件：.txt 为还原版面后的文字，.json 为包含文本框和置信度的识别结果。
+    """
+    return os.path.join(pages_dir, os.path.splitext(relative_path)[0] + extension)
+
+def write_text(path, text):
+    """写入文本文件，先写临时文件再替换，中断时不会留下不完整的文件"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+def read_text(path):
+    """读取文本文件"""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+def recognize_pages(ocr_service, input_dir, pages_dir, images, workers, batch_size):
+    """识别尚未识别的页面，结果逐页写入文件
+
+    Args:
+        ocr_service: OCR服务
+        input_dir: 图片目录
+        pages_dir: 识别结果目录
+        images: 图片相对路径列表
+        workers: OCR工作进程数量
+        batch_size: 每个OCR任务批量识别的图片数量
+
+    Returns:
+        tuple: (识别的页数, 失败的页数, 用时秒数)
+    """
+    # 识别结果最后写入，存在即表示该页已完成
+    pending = [path for path in images if not os.path.exists(page_output_path(pages_dir, path, ".json"))]
+    skipped = len(images) - len(pending)
+    if skipped:
+        print(f"跳过已识别的页面: {skipped} 页")
+    if not pending:
+        return 0, 0, 0.0
+
+    print(f"开始识别: {len(pending)} 页，{workers} 个工作进程")
+    start = time.perf_counter()
+    failed = 0
+
+    results = ocr_service.recognize_parallel(
+        [os.path.join(input_dir, path) for path in pending],
+        workers=workers,
+        batch_size=batch_size
+    )
+    for done, (path, result) in enumerate(zip(pending, results), 1):
+        # 识别失败的页面不写入文件，下次运行时重新识别
+        summary = ""
+        if isinstance(result, OCRError):
+            failed += 1
+            print(f"[{done}/{len(pending)}] {path} 识别失败: {result}")
+        else:
+            summary = f"  {result.summary()}"
+            # 按阅读顺序还原分栏和段落
+            write_text(page_output_path(pages_dir, path), layout_text(result))
+            write_text(
+                page_output_path(pages_dir, path, ".json"),
+                json.dumps(result.to_dict(), ensure_ascii=False)
+            )
+
+        elapsed = time.perf_counter() - start
+        print(f"[{done}/{len(pending)}] {path}{summary}  {done / elapsed:.2f} 页/秒", flush=True)
+
+    return len(pending), failed, time.perf_counter() - start
+
+def load_pages(pages_dir, images):
+    """按页面顺序读取已识别页面的识别结果
+
+    Args:
+        pages_dir: 识别结果目录
+        images: 图片相对路径列表
+
+    Returns:
+        list: (页码, OCRResult) 列表
+    """
+    pages = []
+    for i, path in enumerate(images):
+        data_path = page_output_path(pages_dir, path, ".json")
+        if os.path.exists(data_path):
+            pages.append((i + 1, OCRResult.from_dict(json.loads(read_text(data_path)))))
+    return pages
+
+def generate_notes(ai_service, notes_text, notes_path):
+    """生成读书笔记并写入Markdown文件
+
+    Args:
+        ai_service: AI服务
+        notes_text: 用于生成笔记的文本
+        notes_path: 笔记文件路径
+
+    Returns:
+        bool: 是否生成成功
+    """
+    ai_service.check_service()
+    if not ai_service.service_available:
+        print("Ollama服务不可用，跳过生成笔记")
+        return False
+
+    print("正在生成笔记...")
+    start = time.perf_counter()
+    tokens = ai_service.generate_notes_stream(
+        notes_text,
+        progress_callback=lambda done, total: print(f"分段总结 {done}/{total}", flush=True)
+    )
+    notes = "".join(tokens)
+    write_text(notes_path, notes)
+    print(f"笔记已写入: {notes_path}，用时 {time.perf_counter() - start:.1f} 秒")
+    return True
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="批量识别目录中的页面图片并生成读书笔记")
+    parser.add_argument("input_dir", help="页面图片所在目录，包括子目录")
+    parser.add_argument("-o", "--output", help="输出目录，默认为图片目录下的 ocr_output")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="OCR工作进程数量")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="每个OCR任务批量识别的图片数量")
+    parser.add_argument("--max-width", type=int, default=MAX_IMAGE_WIDTH, help="识别前缩小图像的最大宽度")
+    parser.add_argument("--max-height", type=int, default=MAX_IMAGE_HEIGHT, help="识别前缩小图像的最大高度")
+    parser.add_argument("--engine", choices=list(BACKENDS), help="OCR引擎，默认为环境变量 BOOK_NOTES_OCR_ENGINE 指定的引擎或 paddle")
+    parser.add_argument("--target-text-height", type=int, default=TARGET_TEXT_HEIGHT, help="自适应分辨率的目标文本行高度（像素），为0时只按最大尺寸缩小")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE, help=f"高分辨率图像分块检测的块边长（像素），须大于{TILE_OVERLAP}，为0时整幅图像一次检测")
+    parser.add_argument("--classify-all-lines", action="store_true", help="对每个文本行执行方向分类，不按页估计文字方向")
+    parser.add_argument("--no-page-crop", action="store_true", help="识别前不检测和裁剪书页区域，适用于扫描件")
+    parser.add_argument("--no-cache", action="store_true", help="不使用OCR结果缓存")
+    parser.add_argument("--no-notes", action="store_true", help="只识别文字，不生成笔记")
+    parser.add_argument("--force-notes", action="store_true", help="没有新识别的页面时也重新生成笔记")
+    parser.add_argument("--min-score", type=float, default=MIN_LINE_SCORE, help="生成笔记时保留的文本行的最低置信度")
+    parser.add_argument("--token-budget", type=int, default=0, help="生成笔记的文本的词元预算，超出时去掉置信度最低的文本行；默认为0，不限制，长文本由分段总结处理")
+    args = parser.parse_args(argv)
+    if args.tile_size and args.tile_size <= TILE_OVERLAP:
+        parser.error(f"--tile-size 必须为0或大于{TILE_OVERLAP}")
+    return args
+
+def main(argv=None):
+    """命令行入口
+
+    Returns:
+        int: 退出码
+    """
+    args = parse_args(argv)
+
+    input_dir = os.path.abspath(args.input_dir)
+    if not os.path.isdir(input_dir):
+        print(f"图片目录不存在: {input_dir}")
+        return 1
+
+    output_dir = os.path.abspath(args.output or os.path.join(input_dir, "ocr_output"))
+    pages_dir = os.path.join(output_dir, PAGES_DIR_NAME)
+
+    images = find_images(input_dir)
+
+    # 输出目录在图片目录中时，不识别其中的文件
+    if output_dir.startswith(input_dir + os.sep):
+        output_prefix = os.path.relpath(output_dir, input_dir) + os.sep
+        images = [path for path in images if not path.startswith(output_prefix)]
+
+    if not images:
+        print(f"目录中没有图片: {input_dir}")
+        return 1
+    print(f"找到图片: {len(images)} 张，输出目录: {output_dir}")
+
+    ocr_service = OCRService(
+        max_width=args.max_width,
+        max_height=args.max_height,
+        cache=None if args.no_cache else OCRCache(),
+        crop_page=not args.no_page_crop,
+        target_text_height=args.target_text_height,
+        tile_size=args.tile_size,
+        engine=args.engine,
+        estimate_orientation=not args.classify_all_lines
+    )
+    ai_service = AIService()
+
+    try:
+        count, failed, elapsed = recognize_pages(
+            ocr_service, input_dir, pages_dir, images, args.workers, args.batch_size
+        )
+        if count:
+            print(f"识别完成: {count} 页，失败 {failed} 页，用时 {elapsed:.1f} 秒，平均 {count / elapsed:.2f} 页/秒")
+
+        pages = [(page, result) for page, result in load_pages(pages_dir, images) if len(result) > 0]
+        if not pages:
+            print("没有识别出文字")
+            return 1
+        combined_text = join_pages([(page, layout_text(result)) for page, result in pages])
+        write_text(os.path.join(output_dir, COMBINED_FILE_NAME), combined_text)
+
+        notes_path = os.path.join(output_dir, NOTES_FILE_NAME)
+        if not args.no_notes:
+            if os.path.exists(notes_path) and count == 0 and not args.force_notes:
+                print(f"没有新识别的页面，保留已有笔记: {notes_path}")
+                return 1 if failed else 0
+
+            # 去掉低置信度的文本行和页眉页脚，减少模型需要处理的词元
+            notes_text, stats = prepare_notes_text(pages, args.min_score, args.token_budget or None)
+            print(f"生成笔记的文本: {stats['tokens']} 词元，精简了 {stats['saved_tokens']} 词元"
+                  f"（低置信度 {stats['low_confidence']} 行，页眉页脚 {stats['headers_footers']} 行，"
+                  f"重叠 {stats['overlap']} 行，超出预算 {stats['over_budget']} 行）")
+            if not notes_text or not generate_notes(ai_service, notes_text, notes_path):
+                return 1
+
+        return 1 if failed else 0
+
+    except KeyboardInterrupt:
+        print("\n已中断，再次运行相同的命令可以继续处理")
+        return 130
+    except Exception as e:
+        logging.error(f"批量处理失败: {str(e)}")
+        return 1
+    finally:
+        ocr_service.close()
+        ai_service.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
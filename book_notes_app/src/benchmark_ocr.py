@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""对比各OCR引擎的速度和准确率
+
+每个引擎依次识别同一组图片，统计加载用时、每页用时和平均置信度。
+图片旁有同名的 .txt 文件时作为标准答案计算准确率，否则以第一个引擎的结果作为参照。
+指定 --min-accuracy 时，推荐满足准确率要求的最快引擎。
+
+用法:
+    python src/benchmark_ocr.py 图片目录 [--engines paddle onnx stub] [--min-accuracy 0.95]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import difflib
+import argparse
+import numpy as np
+
+# 设置控制台编码，解决中文显示问题
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.services.ocr_service import OCRService
+from src.services.ocr_backends import BACKENDS
+from src.services.ocr_result import OCRError
+from src.batch_cli import find_images, read_text, MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT
+
+# 默认对比的引擎
+DEFAULT_ENGINES = ["paddle", "onnx"]
+
+# 正式计时前预先识别的图片数量，排除首次推理的初始化开销
+DEFAULT_WARMUP = 1
+
+def normalize_text(text):
+    """去掉空白字符，比较文字时不受换行和空格影响"""
+    return re.sub(r"\s+", "", text)
+
+def text_accuracy(reference, text):
+    """文字与参照文字的相似度
+
+    Args:
+        reference: 参照文字
+        text: 识别的文字
+
+    Returns:
+        float: 0到1之间的相似度，两者都为空时为1
+    """
+    reference = normalize_text(reference)
+    text = normalize_text(text)
+    if not reference and not text:
+        return 1.0
+    return difflib.SequenceMatcher(None, reference, text, autojunk=False).ratio()
+
+def load_ground_truth(input_dir, images):
+    """读取图片对应的标准答案
+
+    Returns:
+        dict: 图片相对路径到标准答案的映射，只包含有标准答案的图片
+    """
+    truth = {}
+    for path in images:
+        text_path = os.path.join(input_dir, os.path.splitext(path)[0] + ".txt")
+        if os.path.exists(text_path):
+            truth[path] = read_text(text_path)
+    return truth
+
+def benchmark_engine(engine, input_dir, images, args):
+    """用一个引擎识别所有图片
+
+    Returns:
+        dict: 统计结果，texts为各图片识别的文字，加载失败时为None
+    """
+    service = OCRService(
+        max_width=args.max_width,
+        max_height=args.max_height,
+        engine=engine
+    )
+    report = {"engine": engine, "loaded": service.load(), "load_seconds": service.load_seconds}
+    if not report["loaded"]:
+        return report
+
+    paths = [os.path.join(input_dir, path) for path in images]
+    for path in paths[:args.warmup]:
+        try:
+            service.recognize(path)
+        except OCRError:
+            pass
+
+    latencies = []
+    scores = []
+    texts = {}
+    failed = 0
+    for _ in range(args.repeat):
+        for relative_path, path in zip(images, paths):
+            start = time.perf_counter()
+            try:
+                result = service.recognize(path)
+            except OCRError:
+                failed += 1
+                texts[relative_path] = ""
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            texts[relative_path] = result.text
+            if result.mean_score is not None:
+                scores.append(result.mean_score)
+
+    service.close()
+    report.update({
+        "failed": failed,
+        "mean_ms": float(np.mean(latencies)) if latencies else None,
+        "p95_ms": float(np.percentile(latencies, 95)) if latencies else None,
+        "pages_per_second": 1000 / np.mean(latencies) if latencies else None,
+        "mean_score": float(np.mean(scores)) if scores else None,
+        "texts": texts
+    })
+    return report
+
+def add_accuracy(reports, truth):
+    """计算各引擎的准确率
+
+    有标准答案时与标准答案比较，否则与第一个加载成功的引擎的结果比较。
+    """
+    loaded = [report for report in reports if report["loaded"]]
+    if not loaded:
+        return None
+
+    if truth:
+        references, reference_name = truth, "标准答案"
+    else:
+        references, reference_name = loaded[0]["texts"], loaded[0]["engine"]
+
+    for report in loaded:
+        values = [
+            text_accuracy(reference, report["texts"].get(path, ""))
+            for path, reference in references.items()
+        ]
+        report["accuracy"] = float(np.mean(values)) if values else None
+    return reference_name
+
+def format_value(value, pattern):
+    """格式化统计值，没有数据时显示横线"""
+    return pattern.format(value) if value is not None else "-"
+
+def print_reports(reports, reference_name):
+    """打印对比表格"""
+    print()
+    print(f"{'引擎':<8}{'加载(秒)':>10}{'平均(毫秒)':>12}{'P95(毫秒)':>12}{'页/秒':>8}{'置信度':>8}{'准确率':>8}")
+    for report in reports:
+        if not report["loaded"]:
+            print(f"{report['engine']:<8}  加载失败")
+            continue
+        print(
+            f"{report['engine']:<8}"
+            f"{format_value(report['load_seconds'], '{:.1f}'):>10}"
+            f"{format_value(report['mean_ms'], '{:.0f}'):>12}"
+            f"{format_value(report['p95_ms'], '{:.0f}'):>12}"
+            f"{format_value(report['pages_per_second'], '{:.2f}'):>8}"
+            f"{format_value(report['mean_score'], '{:.3f}'):>8}"
+            f"{format_value(report.get('accuracy'), '{:.3f}'):>8}"
+        )
+    if reference_name:
+        print(f"准确率参照: {reference_name}")
+
+def recommend(reports, min_accuracy):
+    """满足准确率要求的最快引擎，没有满足要求的引擎时返回None"""
+    candidates = [
+        report for report in reports
+        if report["loaded"] and report["mean_ms"] is not None
+        and report.get("accuracy") is not None and report["accuracy"] >= min_accuracy
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda report: report["mean_ms"])
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="对比各OCR引擎的速度和准确率")
+    parser.add_argument("input_dir", help="页面图片所在目录，图片旁的同名 .txt 文件作为标准答案")
+    parser.add_argument("--engines", nargs="+", choices=list(BACKENDS), default=DEFAULT_ENGINES, help="对比的OCR引擎")
+    parser.add_argument("--repeat", type=int, default=1, help="每张图片识别的次数")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="正式计时前预先识别的图片数量")
+    parser.add_argument("--max-width", type=int, default=MAX_IMAGE_WIDTH, help="识别时图像的最大宽度")
+    parser.add_argument("--max-height", type=int, default=MAX_IMAGE_HEIGHT, help="识别时图像的最大高度")
+    parser.add_argument("--min-accuracy", type=float, help="推荐引擎时要求的最低准确率")
+    parser.add_argument("--json", help="把统计结果保存为JSON文件")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """命令行入口
+
+    Returns:
+        int: 退出码
+    """
+    args = parse_args(argv)
+
+    input_dir = os.path.abspath(args.input_dir)
+    images = find_images(input_dir)
+    if not images:
+        print(f"目录中没有图片: {input_dir}")
+        return 1
+
+    truth = load_ground_truth(input_dir, images)
+    print(f"找到图片: {len(images)} 张，其中 {len(truth)} 张有标准答案")
+
+    # 依次测试各引擎，不使用缓存，避免互相影响
+    reports = []
+    for engine in args.engines:
+        print(f"正在测试引擎: {engine}", flush=True)
+        reports.append(benchmark_engine(engine, input_dir, images, args))
+
+    reference_name = add_accuracy(reports, truth)
+    print_reports(reports, reference_name)
+
+    if args.min_accuracy is not None:
+        best = recommend(reports, args.min_accuracy)
+        if best is None:
+            print(f"没有准确率达到 {args.min_accuracy} 的引擎")
+        else:
+            print(f"推荐引擎: {best['engine']}（准确率 {best['accuracy']:.3f}，平均 {best['mean_ms']:.0f} 毫秒/页）")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                [{key: value for key, value in report.items() if key != "texts"} for report in reports],
+                f, ensure_ascii=False, indent=2
+            )
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""摄像头采集线程
+
+在单独的线程中读取摄像头画面，界面线程繁忙时预览也不会卡顿。
+画面读入预先分配的环形缓冲区，预览画面在采集线程中缩放并转换为Qt可以直接绘制的格式，
+界面线程只需绘制已经准备好的图像，不再复制或缩放。
+"""
+
+import time
+import logging
+import threading
+import cv2
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from src.utils.auto_capture import AutoCapture
+
+# 原始画面的环形缓冲区数量
+FRAME_BUFFERS = 3
+
+# 预览画面的缓冲区数量：正在显示、等待显示和正在写入的各一个
+PREVIEW_BUFFERS = 3
+
+# 连续读取失败此次数后认为摄像头已断开
+MAX_READ_FAILURES = 10
+
+# 帧率统计的平滑系数
+FPS_SMOOTHING = 0.1
+
+# 自动拍摄分析每帧画面的时间预算（毫秒），超出时跳过后续的若干帧，保证预览帧率
+ANALYSIS_BUDGET_MS = 12
+
+class FrameRing:
+    """预先分配的环形画面缓冲区，尺寸变化时重新分配"""
+
+    def __init__(self, count):
+        """初始化
+
+        Args:
+            count: 缓冲区数量
+        """
+        self.buffers = [None] * count
+        self.index = -1
+
+    def next(self, shape, dtype=np.uint8, skip=None):
+        """返回下一个可写入的缓冲区
+
+        Args:
+            shape: 画面形状
+            dtype: 数据类型
+            skip: 仍在使用、不能改写的缓冲区序号
+
+        Returns:
+            tuple: (缓冲区序号, 缓冲区)
+        """
+        index = (self.index + 1) % len(self.buffers)
+        if index == skip:
+            index = (index + 1) % len(self.buffers)
+        buffer = self.buffers[index]
+        if buffer is None or buffer.shape != tuple(shape):
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers[index] = buffer
+        return index, buffer
+
+    def commit(self, index, buffer):
+        """标记缓冲区已写入完成，成为最新的画面"""
+        self.buffers[index] = buffer
+        self.index = index
+
+    def latest(self):
+        """最新的画面，尚无画面时返回None"""
+        if self.index < 0:
+            return None
+        return self.buffers[self.index]
+
+class PreviewFrame:
+    """已缩放的预览画面
+
+    QImage直接引用采集线程的缓冲区内存，缓冲区在界面确认显示其他画面之前不会被改写。
+    """
+
+    __slots__ = ("slot", "image", "buffer")
+
+    def __init__(self, slot, buffer):
+        """初始化
+
+        Args:
+            slot: 预览缓冲区序号
+            buffer: BGRA格式的预览画面，内存连续
+        """
+        self.slot = slot
+        self.buffer = buffer
+        height, width = buffer.shape[:2]
+        # 小端机器上BGRA的字节顺序即为Format_RGB32，绘制时无需转换
+        self.image = QImage(buffer.data, width, height, buffer.strides[0], QImage.Format_RGB32)
+
+class CameraThread(QThread):
+    """摄像头采集线程"""
+
+    # 摄像头打开完成，参数为是否成功
+    camera_opened = pyqtSignal(bool)
+
+    # 采集过程中出错，参数为错误信息
+    camera_error = pyqtSignal(str)
+
+    # 新的预览画面，参数为PreviewFrame
+    preview_ready = pyqtSignal(object)
+
+    # 自动拍摄状态变化，参数为提示信息
+    auto_capture_status = pyqtSignal(str)
+
+    # 自动拍摄检测到应当拍摄的画面
+    auto_capture_triggered = pyqtSignal()
+
+    def __init__(self, camera_id=0, width=640, height=480, parent=None):
+        """初始化
+
+        Args:
+            camera_id: 摄像头编号
+            width: 请求的画面宽度
+            height: 请求的画面高度
+        """
+        super().__init__(parent)
+        self.camera_id = camera_id
+        self.resolution = (width, height)
+
+        # 预览区域的尺寸，由界面线程更新
+        self.preview_size = (width, height)
+
+        self.frames = FrameRing(FRAME_BUFFERS)
+        self.previews = FrameRing(PREVIEW_BUFFERS)
+        self.fps = 0.0
+
+        # 缩放预览画面使用的缓冲区
+        self._scaled = None
+
+        self._lock = threading.Lock()
+        self._running = True
+        self._pending_resolution = None
+
+        # 自动拍摄，未开启时为None
+        self.auto_capture = None
+        self._skip_analysis = 0
+
+        # 界面正在显示和等待显示的预览缓冲区，采集线程不会改写这两个缓冲区
+        self._displayed_slot = None
+        self._pending_slot = None
+
+    def set_resolution(self, width, height):
+        """更改画面分辨率，在采集线程中生效"""
+        with self._lock:
+            self._pending_resolution = (width, height)
+
+    def set_preview_size(self, width, height):
+        """设置预览区域的尺寸"""
+        self.preview_size = (max(1, width), max(1, height))
+
+    def set_auto_capture(self, enabled):
+        """开启或关闭自动拍摄，开启时从等待画面稳定开始"""
+        with self._lock:
+            self.auto_capture = AutoCapture() if enabled else None
+            self._skip_analysis = 0
+
+    def latest_frame(self):
+        """返回最新一帧画面的副本，无需等待摄像头读取新的画面
+
+        在锁内复制：采集线程读取画面时不持有锁，只有标记新画面时才需要等待复制完成，
+        因此无论复制期间采集线程读入了多少帧，复制的都是完整的同一帧。
+
+        Returns:
+            numpy.ndarray: BGR格式的画面，尚未读取到画面时返回None
+        """
+        with self._lock:
+            frame = self.frames.latest()
+            return frame.copy() if frame is not None else None
+
+    def preview_displayed(self, frame):
+        """界面已显示预览画面，释放此前显示的缓冲区"""
+        with self._lock:
+            self._displayed_slot = frame.slot
+            if self._pending_slot == frame.slot:
+                self._pending_slot = None
+
+    def stop(self):
+        """停止采集并等待线程结束"""
+        self._running = False
+        self.wait()
+
+    def run(self):
+        """采集线程主循环"""
+        camera = cv2.VideoCapture(self.camera_id)
+        try:
+            if not camera.isOpened():
+                self.camera_opened.emit(False)
+                return
+            self._apply_resolution(camera, self.resolution)
+            self.camera_opened.emit(True)
+
+            failures = 0
+            last_time = None
+            while self._running:
+                with self._lock:
+                    resolution, self._pending_resolution = self._pending_resolution, None
+                if resolution is not None:
+                    self._apply_resolution(camera, resolution)
+
+                frame = self._read(camera)
+                if frame is None:
+                    failures += 1
+                    if failures >= MAX_READ_FAILURES:
+                        self.camera_error.emit("无法读取摄像头画面")
+                        return
+                    continue
+                failures = 0
+
+                now = time.perf_counter()
+                if last_time is not None and now > last_time:
+                    self.fps += FPS_SMOOTHING * (1 / (now - last_time) - self.fps)
+                last_time = now
+
+                self._update_auto_capture(frame)
+                self._update_preview(frame)
+
+        except Exception as e:
+            logging.error(f"摄像头采集错误: {str(e)}")
+            self.camera_error.emit(str(e))
+        finally:
+            camera.release()
+
+    def _apply_resolution(self, camera, resolution):
+        """设置摄像头分辨率"""
+        self.resolution = resolution
+        camera.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+        camera.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+
+    def _read(self, camera):
+        """把下一帧画面读入环形缓冲区
+
+        Returns:
+            numpy.ndarray: BGR格式的画面，读取失败时返回None
+        """
+        latest = self.frames.latest()
+        shape = latest.shape if latest is not None else (self.resolution[1], self.resolution[0], 3)
+        index, buffer = self.frames.next(shape)
+
+        ret, frame = camera.read(buffer)
+        if not ret or frame is None:
+            return None
+
+        # 分辨率变化时OpenCV会分配新的数组，之后复用该数组
+        with self._lock:
+            self.frames.commit(index, frame)
+        return frame
+
+    def _update_auto_capture(self, frame):
+        """分析画面，自动拍摄状态变化或应当拍摄时发出信号"""
+        with self._lock:
+            auto_capture = self.auto_capture
+        if auto_capture is None:
+            return
+        if self._skip_analysis > 0:
+            self._skip_analysis -= 1
+            return
+
+        state = auto_capture.state
+        triggered = auto_capture.update(frame)
+        self._skip_analysis = int(auto_capture.metrics.elapsed_ms // ANALYSIS_BUDGET_MS)
+
+        if triggered:
+            self.auto_capture_triggered.emit()
+        if auto_capture.state != state or triggered:
+            self.auto_capture_status.emit(auto_capture.message)
+
+    def _update_preview(self, frame):
+        """缩放画面并转换为预览格式，界面尚未显示上一帧时跳过"""
+        with self._lock:
+            if self._pending_slot is not None:
+                return
+            busy = self._displayed_slot
+
+        # 按比例缩小到预览区域内，不放大
+        height, width = frame.shape[:2]
+        ratio = min(1.0, self.preview_size[0] / width, self.preview_size[1] / height)
+        size = (max(1, int(width * ratio)), max(1, int(height * ratio)))
+        if ratio >= 1.0:
+            scaled = frame
+        else:
+            if self._scaled is None or self._scaled.shape[:2] != (size[1], size[0]):
+                self._scaled = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            scaled = cv2.resize(frame, size, dst=self._scaled, interpolation=cv2.INTER_AREA)
+
+        index, buffer = self.previews.next((size[1], size[0], 4), skip=busy)
+        cv2.cvtColor(scaled, cv2.COLOR_BGR2BGRA, dst=buffer)
+        self.previews.commit(index, buffer)
+
+        with self._lock:
+            self._pending_slot = index
+        self.preview_ready.emit(PreviewFrame(index, buffer))
@@ -2,12 +2,14 @@
 # -*- coding: utf-8 -*-
 
 import os
-import time
-import cv2
+from datetime import datetime
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QLabel, QComboBox, 
-                           QHBoxLayout, QMessageBox, QFrame, QGridLayout)
+                           QHBoxLayout, QMessageBox, QFrame, QGridLayout, QCheckBox)
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal
-from PyQt5.QtGui import QImage, QPixmap, QIcon
+from PyQt5.QtGui import QIcon, QPainter
+
+from src.gui.camera_thread import CameraThread
+from src.gui.image_writer import ImageWriter
 
 # 定义摄像头分辨率选项
 CAMERA_RESOLUTIONS = [
@@ -16,17 +18,56 @@ CAMERA_RESOLUTIONS = [
     {"name": "高分辨率 (1920x1080)", "width": 1920, "height": 1080}
 ]
 
+class PreviewLabel(QLabel):
+    """摄像头预览标签，直接绘制采集线程已缩放好的画面，没有画面时显示文字"""
+    
+    # 标签尺寸变化，参数为(宽度, 高度)
+    size_changed = pyqtSignal(int, int)
+    
+    def __init__(self, text="", parent=None):
+        super().__init__(text, parent)
+        self.frame = None
+        
+    def set_frame(self, frame):
+        """显示预览画面"""
+        self.frame = frame
+        self.update()
+        
+    def clear_frame(self):
+        """清除预览画面，显示文字"""
+        self.frame = None
+        self.update()
+        
+    def paintEvent(self, event):
+        """绘制预览画面，居中显示"""
+        if self.frame is None:
+            super().paintEvent(event)
+            return
+            
+        image = self.frame.image
+        painter = QPainter(self)
+        painter.drawImage((self.width() - image.width()) // 2, (self.height() - image.height()) // 2, image)
+        painter.end()
+        
+    def resizeEvent(self, event):
+        """尺寸变化时通知采集线程调整预览画面大小"""
+        super().resizeEvent(event)
+        self.size_changed.emit(self.width(), self.height())
+
 class CameraWidget(QWidget):
     """摄像头部件，用于显示摄像头画面和拍摄图片"""
     
-    # 自定义信号，当图片被拍摄时发出
+    # 自定义信号，当拍摄的图片保存完成时发出
     image_captured = pyqtSignal(str)
     
+    # 自定义信号，当图片被拍摄时发出，附带内存中的BGR画面，可直接用于识别
+    frame_captured = pyqtSignal(str, object)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         
-        # 初始化摄像头
-        self.camera = None
+        # 初始化摄像头，画面在采集线程中读取
+        self.capture_thread = None
         self.camera_id = 0  # 默认使用第一个摄像头
         self.camera_available = False  # 摄像头是否可用
         
@@ -37,11 +78,19 @@ class CameraWidget(QWidget):
         self.images_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "images")
         os.makedirs(self.images_dir, exist_ok=True)
         
+        # 拍摄的图片在后台保存
+        self.image_writer = ImageWriter(parent=self)
+        self.image_writer.saved.connect(self.on_image_saved)
+        self.image_writer.failed.connect(self.on_image_save_failed)
+        self.image_writer.start()
+        self.last_capture_name = None
+        self.capture_sequence = 0
+        
         # 初始化UI
         self.init_ui()
         
-        # 启动摄像头
-        self.start_camera()
+        # 打开摄像头可能需要数秒，等窗口显示后再启动
+        QTimer.singleShot(0, self.start_camera)
         
     def init_ui(self):
         """初始化用户界面"""
@@ -55,7 +104,7 @@ class CameraWidget(QWidget):
         camera_frame.setStyleSheet("background-color: #000000; border-radius: 4px;")
         camera_layout = QVBoxLayout(camera_frame)
         
-        self.camera_label = QLabel("正在初始化摄像头...")
+        self.camera_label = PreviewLabel("正在初始化摄像头...")
         self.camera_label.setAlignment(Qt.AlignCenter)
         self.camera_label.setMinimumSize(400, 300)
         self.camera_label.setStyleSheet("color: white; font-size: 16px;")
@@ -122,11 +171,17 @@ class CameraWidget(QWidget):
         self.capture_button.clicked.connect(self.capture_image)
         control_layout.addWidget(self.capture_button, 0, 2)
         
-        layout.addWidget(control_frame)
+        # 自动拍摄：翻页后画面稳定且清晰时自动拍摄
+        self.auto_capture_checkbox = QCheckBox("自动拍摄")
+        self.auto_capture_checkbox.setToolTip("翻页后画面稳定且清晰时自动拍摄，同一页不会重复拍摄")
+        self.auto_capture_checkbox.toggled.connect(self.toggle_auto_capture)
+        control_layout.addWidget(self.auto_capture_checkbox, 1, 0)
         
-        # 创建定时器，用于更新摄像头画面
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
+        self.auto_capture_label = QLabel("")
+        control_layout.addWidget(self.auto_capture_label, 1, 1, 1, 2)
+        self.auto_capture_count = 0
+        
+        layout.addWidget(control_frame)
         
     def change_resolution(self, index):
         """更改摄像头分辨率"""
@@ -136,128 +191,130 @@ class CameraWidget(QWidget):
         if 0 <= index < len(CAMERA_RESOLUTIONS):
             self.current_resolution = CAMERA_RESOLUTIONS[index]
             
-            # 如果摄像头已经打开，则重新设置分辨率
-            if self.camera is not None and self.camera.isOpened():
-                self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.current_resolution["width"])
-                self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.current_resolution["height"])
+            # 分辨率在采集线程中读取下一帧之前生效
+            if self.capture_thread is not None:
+                self.capture_thread.set_resolution(
+                    self.current_resolution["width"],
+                    self.current_resolution["height"]
+                )
         
     def start_camera(self):
-        """启动摄像头"""
-        try:
-            self.camera = cv2.VideoCapture(self.camera_id)
-            
-            if not self.camera.isOpened():
-                self.camera_label.setText("摄像头不可用，请使用上传功能")
-                self.capture_button.setEnabled(False)
-                self.resolution_combo.setEnabled(False)
-                self.camera_available = False
-                return
-                
-            # 设置分辨率
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.current_resolution["width"])
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.current_resolution["height"])
-            
-            # 启动定时器，30fps
-            self.timer.start(33)
-            self.camera_available = True
+        """启动摄像头采集线程，打开摄像头在采集线程中进行"""
+        self.capture_thread = CameraThread(
+            self.camera_id,
+            self.current_resolution["width"],
+            self.current_resolution["height"],
+            parent=self
+        )
+        self.capture_thread.set_preview_size(self.camera_label.width(), self.camera_label.height())
+        self.capture_thread.camera_opened.connect(self.on_camera_opened)
+        self.capture_thread.camera_error.connect(self.on_camera_error)
+        self.capture_thread.preview_ready.connect(self.update_frame)
+        self.capture_thread.auto_capture_status.connect(self.on_auto_capture_status)
+        self.capture_thread.auto_capture_triggered.connect(self.on_auto_capture_triggered)
+        self.camera_label.size_changed.connect(self.capture_thread.set_preview_size)
+        self.capture_thread.set_auto_capture(self.auto_capture_checkbox.isChecked())
+        self.capture_thread.start()
+        
+    def on_camera_opened(self, success):
+        """摄像头打开完成"""
+        self.camera_available = success
+        if not success:
+            self.disable_camera("摄像头不可用，请使用上传功能")
             
-        except Exception as e:
-            self.camera_label.setText(f"摄像头初始化错误: {str(e)}\n请使用上传功能")
-            self.capture_button.setEnabled(False)
-            self.resolution_combo.setEnabled(False)
-            self.camera_available = False
+    def on_camera_error(self, message):
+        """采集过程中出错"""
+        self.disable_camera(f"摄像头错误: {message}\n请使用上传功能")
+        
+    def disable_camera(self, message):
+        """摄像头不可用时显示提示并禁用拍摄"""
+        self.camera_label.clear_frame()
+        self.camera_label.setText(message)
+        self.capture_button.setEnabled(False)
+        self.resolution_combo.setEnabled(False)
+        self.auto_capture_checkbox.setChecked(False)
+        self.auto_capture_checkbox.setEnabled(False)
+        self.camera_available = False
     
-    def update_frame(self):
-        """更新摄像头画面"""
-        if not self.camera_available or self.camera is None or not self.camera.isOpened():
-            self.timer.stop()
-            self.camera_label.setText("摄像头不可用，请使用上传功能")
-            self.capture_button.setEnabled(False)
-            self.resolution_combo.setEnabled(False)
-            self.camera_available = False
+    def update_frame(self, frame):
+        """显示采集线程准备好的预览画面"""
+        if self.capture_thread is None:
             return
-            
-        try:
-            ret, frame = self.camera.read()
-            
-            if not ret:
-                self.timer.stop()
-                self.camera_label.setText("无法读取摄像头画面，请使用上传功能")
-                self.capture_button.setEnabled(False)
-                self.resolution_combo.setEnabled(False)
-                self.camera_available = False
-                return
-                
-            # 将OpenCV的BGR格式转换为RGB格式
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # 创建QImage
-            h, w, ch = frame_rgb.shape
-            bytes_per_line = ch * w
-            image = QImage(frame_rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            
-            # 调整图片大小以适应标签
-            pixmap = QPixmap.fromImage(image)
-            label_size = self.camera_label.size()
-            if pixmap.width() > label_size.width() or pixmap.height() > label_size.height():
-                pixmap = pixmap.scaled(label_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                
-            # 显示图片
-            self.camera_label.setPixmap(pixmap)
-            
-        except Exception as e:
-            self.timer.stop()
-            self.camera_label.setText(f"摄像头错误: {str(e)}\n请使用上传功能")
-            self.capture_button.setEnabled(False)
-            self.resolution_combo.setEnabled(False)
-            self.camera_available = False
+        self.camera_label.set_frame(frame)
+        self.capture_thread.preview_displayed(frame)
+        
+    def toggle_auto_capture(self, checked):
+        """开启或关闭自动拍摄"""
+        if self.capture_thread is not None:
+            self.capture_thread.set_auto_capture(checked)
+        self.auto_capture_count = 0
+        self.auto_capture_label.setText("等待画面稳定" if checked else "")
+        
+    def on_auto_capture_status(self, message):
+        """显示自动拍摄状态"""
+        if not self.auto_capture_checkbox.isChecked():
+            return
+        if self.auto_capture_count:
+            message = f"{message}（已自动拍摄 {self.auto_capture_count} 页）"
+        self.auto_capture_label.setText(message)
+        
+    def on_auto_capture_triggered(self):
+        """自动拍摄检测到翻页后的稳定画面"""
+        if not self.auto_capture_checkbox.isChecked():
+            return
+        self.auto_capture_count += 1
+        self.capture_image()
         
     def capture_image(self):
-        """拍摄图片"""
-        if not self.camera_available or self.camera is None or not self.camera.isOpened():
+        """拍摄图片
+        
+        直接使用采集线程中最新的画面，无需等待摄像头读取新的画面；
+        画面立即发出供识别使用，图片文件在后台保存，保存完成后发出image_captured信号。
+        """
+        if not self.camera_available or self.capture_thread is None:
             QMessageBox.warning(self, "警告", "摄像头不可用，请使用上传功能")
             return
             
-        try:
-            # 读取当前帧
-            ret, frame = self.camera.read()
-            
-            if not ret:
-                QMessageBox.warning(self, "警告", "无法读取摄像头画面，请使用上传功能")
-                return
-                
-            # 生成文件名
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            image_path = os.path.join(self.images_dir, f"capture_{timestamp}.jpg")
-            
-            # 调整图像大小，确保不会太大
-            max_width = 1280
-            max_height = 720
-            height, width = frame.shape[:2]
-            
-            if width > max_width or height > max_height:
-                # 计算调整比例
-                ratio = min(max_width / width, max_height / height)
-                new_width = int(width * ratio)
-                new_height = int(height * ratio)
-                
-                # 调整图像大小
-                frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
-            
-            # 保存图片
-            cv2.imwrite(image_path, frame)
-            
-            # 播放拍照音效（可选）
-            # self.play_shutter_sound()
-            
-            # 闪烁效果
-            self.flash_effect()
-            
-            # 发出信号
-            self.image_captured.emit(image_path)
+        frame = self.capture_thread.latest_frame()
+        if frame is None:
+            QMessageBox.warning(self, "警告", "尚未读取到摄像头画面，请稍后再试")
+            return
             
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"拍摄图片时出错: {str(e)}")
+        # 保存原始分辨率的画面，识别时由OCR服务根据文字大小选择分辨率
+        # 在后台保存图片
+        image_path = self.next_capture_path()
+        self.image_writer.write(image_path, frame)
+        
+        # 播放拍照音效（可选）
+        # self.play_shutter_sound()
+        
+        # 闪烁效果
+        self.flash_effect()
+        
+        # 发出信号，此时图片文件可能尚未保存完成
+        self.frame_captured.emit(image_path, frame)
+        
+    def next_capture_path(self):
+        """生成拍摄图片的文件名，精确到毫秒，连续快速拍摄时也不会重名"""
+        now = datetime.now()
+        name = f"capture_{now:%Y%m%d_%H%M%S}_{now.microsecond // 1000:03d}"
+        if name == self.last_capture_name:
+            self.capture_sequence += 1
+        else:
+            self.capture_sequence = 0
+        self.last_capture_name = name
+        
+        if self.capture_sequence:
+            name = f"{name}_{self.capture_sequence}"
+        return os.path.join(self.images_dir, f"{name}.jpg")
+        
+    def on_image_saved(self, image_path):
+        """图片保存完成"""
+        self.image_captured.emit(image_path)
+        
+    def on_image_save_failed(self, image_path, message):
+        """图片保存失败"""
+        QMessageBox.critical(self, "错误", f"保存图片时出错: {message}")
     
     def flash_effect(self):
         """拍照闪光效果"""
@@ -272,13 +329,16 @@ class CameraWidget(QWidget):
         # 设置定时器，200毫秒后隐藏闪光
         QTimer.singleShot(200, flash.deleteLater)
         
+    def stop_camera(self):
+        """停止采集线程并释放摄像头，等待尚未保存的图片保存完成"""
+        if self.capture_thread is not None:
+            self.capture_thread.stop()
+            self.capture_thread = None
+            
+        if self.image_writer.isRunning():
+            self.image_writer.stop()
+            
     def closeEvent(self, event):
         """关闭事件处理"""
-        # 停止定时器
-        self.timer.stop()
-        
-        # 释放摄像头
-        if self.camera_available and self.camera is not None and self.camera.isOpened():
-            self.camera.release()
-            
+        self.stop_camera()
         super().closeEvent(event) 
\ No newline at end of file
@@ -2,30 +2,45 @@
 # -*- coding: utf-8 -*-
 
 import os
+import cv2
 from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QScrollArea, 
                            QLabel, QSizePolicy)
 from PyQt5.QtCore import Qt, pyqtSignal, QSize
-from PyQt5.QtGui import QPixmap
+from PyQt5.QtGui import QPixmap, QImage
 
 class ThumbnailLabel(QLabel):
     """缩略图标签，可点击"""
     
     clicked = pyqtSignal(int)  # 发出点击信号，包含索引
     
-    def __init__(self, index, image_path, parent=None):
+    def __init__(self, index, image_path, duplicate=False, frame=None, parent=None):
         super().__init__(parent)
         
         self.index = index
         self.image_path = image_path
+        self.duplicate = duplicate
         
-        # 设置缩略图
+        # 设置缩略图，重复的图片以虚线边框标记
         self.setFixedSize(100, 75)
         self.setAlignment(Qt.AlignCenter)
-        self.setStyleSheet("border: 2px solid transparent;")
+        self.deselect()
+        if duplicate:
+            self.setToolTip("与之前的图片重复，识别所有图片和整合结果时将跳过")
         self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
         
-        # 加载图片
-        self.load_image()
+        # 加载图片，刚拍摄的图片可能尚未保存，使用内存中的画面
+        if frame is not None:
+            self.load_frame(frame)
+        else:
+            self.load_image()
+        
+    def load_frame(self, frame):
+        """根据BGR格式的画面显示缩略图"""
+        height, width = frame.shape[:2]
+        ratio = min(100 / width, 75 / height, 1.0)
+        small = cv2.resize(frame, (max(1, int(width * ratio)), max(1, int(height * ratio))), interpolation=cv2.INTER_AREA)
+        image = QImage(small.data, small.shape[1], small.shape[0], small.strides[0], QImage.Format_BGR888)
+        self.setPixmap(QPixmap.fromImage(image))
         
     def load_image(self):
         """加载图片并显示缩略图"""
@@ -48,7 +63,10 @@ class ThumbnailLabel(QLabel):
         
     def deselect(self):
         """取消选中缩略图"""
-        self.setStyleSheet("border: 2px solid transparent;")
+        if self.duplicate:
+            self.setStyleSheet("border: 2px dashed orange;")
+        else:
+            self.setStyleSheet("border: 2px solid transparent;")
 
 class ImageNavigator(QWidget):
     """图片导航器，显示缩略图并允许选择"""
@@ -90,8 +108,13 @@ class ImageNavigator(QWidget):
         self.scroll_area.setWidget(self.scroll_content)
         self.layout.addWidget(self.scroll_area)
         
-    def set_images(self, image_paths):
-        """设置图片列表"""
+    def set_images(self, image_paths, duplicates=None):
+        """设置图片列表
+        
+        Args:
+            image_paths: 图片路径列表
+            duplicates: 各图片是否为重复图片的列表
+        """
         # 清除现有的缩略图
         for label in self.thumbnail_labels:
             self.scroll_layout.removeWidget(label)
@@ -100,8 +123,9 @@ class ImageNavigator(QWidget):
         self.thumbnail_labels = []
         
         # 添加新的缩略图
-        for i, path in enumerate(image_paths):
-            label = ThumbnailLabel(i, path)
+        duplicates = duplicates or [False] * len(image_paths)
+        for i, (path, duplicate) in enumerate(zip(image_paths, duplicates)):
+            label = ThumbnailLabel(i, path, duplicate)
             label.clicked.connect(self.on_thumbnail_clicked)
             self.scroll_layout.addWidget(label)
             self.thumbnail_labels.append(label)
@@ -109,6 +133,25 @@ class ImageNavigator(QWidget):
         # 重置当前选中的索引
         self.current_index = -1
         
+    def add_image(self, image_path, duplicate=False, frame=None):
+        """在末尾添加一张图片，无需重新加载已有的缩略图
+        
+        Args:
+            image_path: 图片路径
+            duplicate: 是否为重复图片
+            frame: 内存中的BGR格式画面，图片文件尚未保存时使用
+        """
+        label = ThumbnailLabel(len(self.thumbnail_labels), image_path, duplicate, frame)
+        label.clicked.connect(self.on_thumbnail_clicked)
+        self.scroll_layout.addWidget(label)
+        self.thumbnail_labels.append(label)
+        
+    def refresh_image(self, image_path):
+        """图片文件保存完成后重新加载尚未显示的缩略图"""
+        for label in self.thumbnail_labels:
+            if label.image_path == image_path and label.pixmap() is None:
+                label.load_image()
+                
     def select_image(self, index):
         """选择指定索引的图片"""
         if 0 <= index < len(self.thumbnail_labels):
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""后台保存图片
+
+JPEG编码和写入文件需要数十毫秒，在界面线程中进行会拖慢连续拍摄。
+拍摄的画面放入队列，由写入线程依次保存，保存完成后通过信号通知界面。
+"""
+
+import queue
+import logging
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from src.utils.image_utils import write_image
+
+class ImageWriter(QThread):
+    """图片写入线程"""
+
+    # 图片保存完成，参数为图片路径
+    saved = pyqtSignal(str)
+
+    # 图片保存失败，参数为(图片路径, 错误信息)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.queue = queue.Queue()
+
+    def write(self, image_path, frame):
+        """加入保存队列
+
+        Args:
+            image_path: 图片路径
+            frame: BGR格式的画面，加入队列后不应再修改
+        """
+        self.queue.put((image_path, frame))
+
+    def pending(self):
+        """尚未保存的图片数量"""
+        return self.queue.qsize()
+
+    def stop(self):
+        """保存队列中剩余的图片后停止线程"""
+        self.queue.put(None)
+        self.wait()
+
+    def run(self):
+        """写入线程主循环"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+
+            image_path, frame = item
+            try:
+                write_image(image_path, frame)
+                self.saved.emit(image_path)
+            except Exception as e:
+                logging.error(f"保存图片失败: {image_path}, {str(e)}")
+                self.failed.emit(image_path, str(e))
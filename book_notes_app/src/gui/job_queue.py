@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# 任务优先级，数值越大越先执行
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 5
+PRIORITY_HIGH = 10
+
+class JobCancelledError(Exception):
+    """任务被取消时抛出的异常"""
+    pass
+
+class JobSignals(QObject):
+    """任务信号，从工作线程发出，在界面线程中处理"""
+
+    # 任务开始执行
+    started = pyqtSignal()
+
+    # 任务进度，参数为(已完成数量, 总数量, 提示信息)
+    progress = pyqtSignal(int, int, str)
+
+    # 任务产生的中间结果
+    partial = pyqtSignal(object)
+
+    # 任务执行成功，参数为返回值
+    result = pyqtSignal(object)
+
+    # 任务执行失败，参数为错误信息
+    error = pyqtSignal(str)
+
+    # 任务被取消
+    cancelled = pyqtSignal()
+
+    # 任务结束（无论成功、失败或取消）
+    finished = pyqtSignal()
+
+class Job(QRunnable):
+    """后台任务，在线程池中执行耗时操作
+
+    任务函数的第一个参数是任务本身，可通过它报告进度、发送中间结果和检查是否被取消。
+    """
+
+    def __init__(self, fn, *args, name="", **kwargs):
+        super().__init__()
+
+        # 由任务队列管理生命周期
+        self.setAutoDelete(False)
+
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.name = name
+        self.signals = JobSignals()
+
+        # 取消标志
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """请求取消任务"""
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        """任务是否已被取消"""
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        """如果任务已被取消，抛出JobCancelledError"""
+        if self.cancel_event.is_set():
+            raise JobCancelledError(f"任务已取消: {self.name}")
+
+    def report_progress(self, done, total, message=""):
+        """报告任务进度"""
+        self.signals.progress.emit(done, total, message)
+
+    def emit_partial(self, data):
+        """发送中间结果"""
+        self.signals.partial.emit(data)
+
+    def run(self):
+        """在工作线程中执行任务"""
+        try:
+            # 任务在排队期间被取消，直接结束
+            if self.is_cancelled():
+                self.signals.cancelled.emit()
+                return
+
+            self.signals.started.emit()
+            result = self.fn(self, *self.args, **self.kwargs)
+
+            if self.is_cancelled():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.result.emit(result)
+
+        except JobCancelledError:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            logging.error(f"后台任务执行失败 [{self.name}]: {str(e)}")
+            self.signals.error.emit(str(e))
+        finally:
+            self.signals.finished.emit()
+
+class JobQueue(QObject):
+    """后台任务队列，按优先级在线程池中执行任务，支持取消"""
+
+    # 正在执行或等待执行的任务数量发生变化
+    active_count_changed = pyqtSignal(int)
+
+    def __init__(self, max_threads=None, parent=None):
+        super().__init__(parent)
+
+        self.pool = QThreadPool(self)
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+
+        # 未结束的任务
+        self.jobs = []
+
+    def submit(self, fn, *args, priority=PRIORITY_NORMAL, name="", **kwargs):
+        """提交后台任务
+
+        Args:
+            fn: 任务函数，第一个参数为任务本身
+            priority: 任务优先级
+            name: 任务名称
+
+        Returns:
+            Job: 提交的任务，可用于连接信号和取消任务
+        """
+        job = Job(fn, *args, name=name, **kwargs)
+        job.signals.finished.connect(lambda: self._on_job_finished(job))
+
+        self.jobs.append(job)
+        self.active_count_changed.emit(len(self.jobs))
+
+        self.pool.start(job, priority)
+        return job
+
+    def cancel_all(self):
+        """取消所有未结束的任务"""
+        for job in self.jobs:
+            job.cancel()
+
+    def active_count(self):
+        """未结束的任务数量"""
+        return len(self.jobs)
+
+    def wait_for_done(self, msecs=-1):
+        """等待所有任务结束"""
+        return self.pool.waitForDone(msecs)
+
+    def _on_job_finished(self, job):
+        """任务结束时从队列中移除"""
+        if job in self.jobs:
+            self.jobs.remove(job)
+        self.active_count_changed.emit(len(self.jobs))
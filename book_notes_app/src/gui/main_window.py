@@ -3,23 +3,46 @@
 
 import os
 import sys
+import time
 import shutil
+import logging
 import cv2
+from collections import OrderedDict
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QPushButton, QLabel, QTextEdit, QSplitter, 
                             QFileDialog, QMessageBox, QScrollArea, QApplication,
                             QCheckBox, QFrame, QGroupBox, QStatusBar)
 from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QPixmap, QImage, QFont, QIcon, QColor, QPalette
+from PyQt5.QtGui import QPixmap, QImage, QFont, QIcon, QColor, QPalette, QTextCursor
 
 from src.gui.camera_widget import CameraWidget
 from src.gui.image_navigator import ImageNavigator
-from src.services.ocr_service import OCRService
+from src.gui.job_queue import JobQueue, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from src.services.ocr_service import OCRService, NO_TEXT_MESSAGE
+from src.services.ocr_result import OCRError
+from src.services.ocr_cache import OCRCache
+from src.services.remote_ocr_service import RemoteOCRService
+from src.services.ocr_backends import DEFAULT_ENGINE
 from src.services.ai_service import AIService
+from src.utils.startup_profiler import get_profiler
+from src.utils.layout import layout_text
+from src.utils.text_utils import join_pages
+from src.utils.prompt_pruning import prepare_notes_text
+from src.utils.image_hash import DuplicateIndex
+from src.utils.image_utils import read_image
 
-# 定义最大图像尺寸，防止OCR处理过大的图像
-MAX_IMAGE_WIDTH = 1280
-MAX_IMAGE_HEIGHT = 720
+# 识别时图像尺寸的上限，OCR服务在此范围内根据文字高度选择分辨率
+MAX_IMAGE_WIDTH = 4096
+MAX_IMAGE_HEIGHT = 4096
+
+# 内存中最多保留的拍摄画面数量
+MAX_CACHED_FRAMES = 32
+
+# 识别所有图片时使用的OCR工作进程数量，保留一个核心给界面
+OCR_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+
+# 每个OCR任务批量识别的图片数量
+OCR_BATCH_SIZE = 2
 
 # 定义应用程序样式
 APP_STYLE = """
@@ -135,26 +158,123 @@ class MainWindow(QMainWindow):
         # 设置应用程序样式
         self.setStyleSheet(APP_STYLE)
         
-        # 初始化服务
-        self.ocr_service = OCRService()
+        # 初始化服务，图像缩放在OCR服务内部的内存流水线中完成，识别结果持久化缓存
+        # OCR模型加载和Ollama服务检查都比较耗时，在窗口显示后于后台进行
+        # 设置了远程OCR服务器地址时，由服务器识别文字，本机不加载模型
+        self.ocr_service = RemoteOCRService.from_env() or OCRService(
+            max_width=MAX_IMAGE_WIDTH,
+            max_height=MAX_IMAGE_HEIGHT,
+            cache=OCRCache()
+        )
         self.ai_service = AIService()
         
         # 存储拍摄的图片和识别结果
         self.captured_images = []  # 存储图片路径
         self.ocr_results = []      # 存储OCR识别结果
+        self.ocr_details = []      # 存储结构化的OCR识别结果，包含文本框和置信度，未识别或识别失败时为None
         self.current_index = -1    # 当前显示的图片索引
         
+        # 摄像头拍摄的原始画面，识别时直接使用，无需重新读取文件
+        self.image_frames = OrderedDict()
+        
+        # 尚未保存完成的拍摄图片，以及其中已由内存画面识别、等待保存后写入缓存的结果
+        self.unsaved_images = set()
+        self.unsaved_results = {}
+        
+        # 重复拍摄的图片不再识别，也不加入整合的OCR结果
+        self.duplicate_index = DuplicateIndex()
+        
         # 整合的OCR结果
         self.combined_ocr_text = ""
         
+        # 后台任务队列，OCR和生成笔记都在后台线程中执行，避免阻塞界面
+        self.job_queue = JobQueue(parent=self)
+        self.recognize_all_job = None
+        self.skipped_duplicates = 0
+        self.notes_job = None
+        
         # 初始化UI
         self.init_ui()
         
+        self.job_queue.active_count_changed.connect(self.on_active_jobs_changed)
+        
         # 创建状态栏
         self.statusBar = QStatusBar()
         self.setStatusBar(self.statusBar)
         self.statusBar.showMessage("欢迎使用读书笔记工具")
         
+        # 服务状态
+        self.ocr_status_label = QLabel("OCR: 加载中...")
+        self.statusBar.addPermanentWidget(self.ocr_status_label)
+        self.ai_status_label = QLabel("Ollama: 检查中...")
+        self.statusBar.addPermanentWidget(self.ai_status_label)
+        
+        # 在后台加载OCR模型并检查Ollama服务
+        self.start_services()
+        
+    def start_services(self):
+        """在后台线程中加载OCR模型并检查Ollama服务"""
+        ocr_job = self.job_queue.submit(
+            self._load_ocr_job,
+            priority=PRIORITY_HIGH,
+            name="加载OCR模型"
+        )
+        ocr_job.signals.progress.connect(
+            lambda done, total, message: self.ocr_status_label.setText(f"{self.ocr_service_name()}: 预热中...")
+        )
+        ocr_job.signals.finished.connect(self.update_ocr_status)
+        
+        ai_job = self.job_queue.submit(
+            self._load_service_job,
+            "Ollama服务检查",
+            self.ai_service.check_service,
+            priority=PRIORITY_HIGH,
+            name="检查Ollama服务"
+        )
+        ai_job.signals.finished.connect(self.update_ai_status)
+        
+    def _load_service_job(self, job, phase_name, load):
+        """后台任务：加载服务，启用启动耗时分析时记录耗时"""
+        with get_profiler().phase(phase_name):
+            return load()
+            
+    def _load_ocr_job(self, job):
+        """后台任务：加载OCR模型并用合成图像预热，首次识别时无需等待模型初始化"""
+        if not self._load_service_job(job, "OCR模型加载", self.ocr_service.load):
+            return False
+        job.report_progress(1, 2, "正在预热OCR模型")
+        return self._load_service_job(job, "OCR模型预热", self.ocr_service.warm_up)
+        
+    def ocr_service_name(self):
+        """状态栏中显示的OCR服务名称"""
+        if isinstance(self.ocr_service, RemoteOCRService):
+            return "OCR(远程)"
+        if self.ocr_service.engine != DEFAULT_ENGINE:
+            return f"OCR({self.ocr_service.engine})"
+        return "OCR"
+        
+    def update_ocr_status(self):
+        """更新OCR模型加载状态"""
+        name = self.ocr_service_name()
+        if self.ocr_service.is_ready():
+            timing = f"加载 {self.ocr_service.load_seconds:.1f}秒"
+            if self.ocr_service.warmup_seconds is not None:
+                timing += f"，预热 {self.ocr_service.warmup_seconds:.1f}秒"
+            self.ocr_status_label.setText(f"{name}: 就绪 ({timing})")
+        elif self.ocr_service.loaded:
+            self.ocr_status_label.setText(f"{name}: 加载失败")
+        else:
+            self.ocr_status_label.setText(f"{name}: 加载中...")
+            
+    def update_ai_status(self):
+        """更新Ollama服务状态"""
+        if self.ai_service.service_available is None:
+            self.ai_status_label.setText("Ollama: 检查中...")
+        elif self.ai_service.service_available:
+            self.ai_status_label.setText("Ollama: 可用")
+        else:
+            self.ai_status_label.setText("Ollama: 不可用")
+        
     def init_ui(self):
         """初始化用户界面"""
         # 创建中央部件
@@ -186,7 +306,8 @@ class MainWindow(QMainWindow):
         camera_group = QGroupBox("摄像头")
         camera_layout = QVBoxLayout(camera_group)
         self.camera_widget = CameraWidget()
-        self.camera_widget.image_captured.connect(self.on_image_captured)
+        self.camera_widget.frame_captured.connect(self.on_frame_captured)
+        self.camera_widget.image_captured.connect(self.on_image_saved)
         camera_layout.addWidget(self.camera_widget)
         top_layout.addWidget(camera_group)
         
@@ -262,11 +383,23 @@ class MainWindow(QMainWindow):
         self.notes_text.setPlaceholderText("生成的笔记将显示在这里...")
         notes_layout.addWidget(self.notes_text)
         
+        # 笔记按钮区域
+        notes_buttons_layout = QHBoxLayout()
+        
         # 生成笔记按钮
         generate_button = QPushButton("生成笔记")
         generate_button.setIcon(self.style().standardIcon(QApplication.style().SP_DialogSaveButton))
         generate_button.clicked.connect(self.generate_notes)
-        notes_layout.addWidget(generate_button)
+        notes_buttons_layout.addWidget(generate_button)
+        
+        # 停止生成按钮
+        self.stop_notes_button = QPushButton("停止生成")
+        self.stop_notes_button.setIcon(self.style().standardIcon(QApplication.style().SP_MediaStop))
+        self.stop_notes_button.setEnabled(False)
+        self.stop_notes_button.clicked.connect(self.stop_generate_notes)
+        notes_buttons_layout.addWidget(self.stop_notes_button)
+        
+        notes_layout.addLayout(notes_buttons_layout)
         
         bottom_layout.addWidget(notes_group)
         splitter.addWidget(bottom_widget)
@@ -281,6 +414,13 @@ class MainWindow(QMainWindow):
         delete_button.clicked.connect(self.delete_current_image)
         button_layout.addWidget(delete_button)
         
+        # 取消后台任务按钮
+        self.cancel_button = QPushButton("取消任务")
+        self.cancel_button.setIcon(self.style().standardIcon(QApplication.style().SP_BrowserStop))
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_jobs)
+        button_layout.addWidget(self.cancel_button)
+        
         # 添加空白区域
         button_layout.addStretch()
         
@@ -295,42 +435,6 @@ class MainWindow(QMainWindow):
         # 设置分割比例
         splitter.setSizes([500, 300])
         
-    def resize_image(self, image_path, max_width=MAX_IMAGE_WIDTH, max_height=MAX_IMAGE_HEIGHT):
-        """调整图像大小，防止OCR处理过大的图像"""
-        try:
-            # 读取图像
-            img = cv2.imread(image_path)
-            if img is None:
-                return image_path  # 如果无法读取，返回原始路径
-                
-            # 获取图像尺寸
-            height, width = img.shape[:2]
-            
-            # 检查是否需要调整大小
-            if width <= max_width and height <= max_height:
-                return image_path  # 如果图像已经足够小，返回原始路径
-                
-            # 计算调整比例
-            ratio = min(max_width / width, max_height / height)
-            new_width = int(width * ratio)
-            new_height = int(height * ratio)
-            
-            # 调整图像大小
-            resized_img = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
-            
-            # 生成新的文件名
-            filename, ext = os.path.splitext(image_path)
-            resized_path = f"{filename}_resized{ext}"
-            
-            # 保存调整后的图像
-            cv2.imwrite(resized_path, resized_img)
-            
-            return resized_path
-            
-        except Exception as e:
-            print(f"调整图像大小时出错: {str(e)}")
-            return image_path  # 出错时返回原始路径
-        
     def upload_image(self):
         """上传图片功能"""
         file_paths, _ = QFileDialog.getOpenFileNames(
@@ -363,14 +467,34 @@ class MainWindow(QMainWindow):
                 self.statusBar.showMessage(f"上传失败: {str(e)}")
                 QMessageBox.critical(self, "上传失败", f"上传图片时出错: {str(e)}")
         
+    def on_frame_captured(self, image_path, frame):
+        """当摄像头拍摄图片时的回调函数，保留内存中的画面供识别使用"""
+        self.image_frames[image_path] = frame
+        self.unsaved_images.add(image_path)
+        
+        # 只保留最近的若干帧，避免占用过多内存
+        while len(self.image_frames) > MAX_CACHED_FRAMES:
+            self.image_frames.popitem(last=False)
+            
+        self.on_image_captured(image_path)
+        
+    def ocr_input(self, image_path):
+        """返回用于识别的图片，优先使用内存中的画面"""
+        frame = self.image_frames.get(image_path)
+        return frame if frame is not None else image_path
+        
     def on_image_captured(self, image_path):
         """当图片被拍摄时的回调函数"""
         # 添加图片到列表
         self.captured_images.append(image_path)
         self.ocr_results.append("")
+        self.ocr_details.append(None)
+        
+        # 检查是否与已有的图片重复
+        original = self.add_to_duplicate_index(image_path)
         
-        # 更新图片导航器
-        self.image_navigator.set_images(self.captured_images)
+        # 在图片导航器末尾添加缩略图，刚拍摄的图片使用内存中的画面
+        self.image_navigator.add_image(image_path, original is not None, self.image_frames.get(image_path))
         
         # 显示最新拍摄的图片
         self.current_index = len(self.captured_images) - 1
@@ -382,7 +506,55 @@ class MainWindow(QMainWindow):
         self.notes_text.clear()
         
         # 更新状态栏
-        self.statusBar.showMessage(f"已添加图片: {os.path.basename(image_path)}")
+        if original is not None:
+            self.statusBar.showMessage(
+                f"已添加图片: {os.path.basename(image_path)}，与图片 {self.captured_images.index(original) + 1} 重复，"
+                f"识别所有图片和整合结果时将跳过"
+            )
+        else:
+            self.statusBar.showMessage(f"已添加图片: {os.path.basename(image_path)}")
+        
+    def add_to_duplicate_index(self, image_path):
+        """把图片加入重复图片索引
+        
+        Returns:
+            与其重复的原图片路径，没有重复或无法读取图片时返回None
+        """
+        image = self.image_frames.get(image_path)
+        if image is None:
+            # 只需要小尺寸的灰度图像，按四分之一尺寸解码
+            image = read_image(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+        if image is None:
+            return None
+        return self.duplicate_index.add(image_path, image)
+        
+    def update_image_navigator(self):
+        """更新图片导航器，标记重复的图片"""
+        duplicates = self.duplicate_index.duplicates()
+        self.image_navigator.set_images(
+            self.captured_images,
+            [path in duplicates for path in self.captured_images]
+        )
+        
+    def on_image_saved(self, image_path):
+        """拍摄的图片在后台保存完成"""
+        self.unsaved_images.discard(image_path)
+        result = self.unsaved_results.pop(image_path, None)
+        
+        if image_path not in self.captured_images:
+            # 保存完成前图片已被删除
+            try:
+                if os.path.exists(image_path):
+                    os.remove(image_path)
+            except Exception as e:
+                logging.error(f"删除文件失败: {str(e)}")
+            return
+            
+        # 由内存画面识别的结果以文件内容为键再缓存一份
+        if result is not None:
+            self.ocr_service.cache_result(image_path, result)
+            
+        self.image_navigator.refresh_image(image_path)
         
     def on_image_selected(self, index):
         """当图片在导航器中被选中时的回调函数"""
@@ -403,18 +575,24 @@ class MainWindow(QMainWindow):
             self.statusBar.showMessage(f"已选择图片 {index+1}/{len(self.captured_images)}")
         
     def display_image(self, image_path):
-        """在界面上显示图片"""
-        if os.path.exists(image_path):
+        """在界面上显示图片，优先使用内存中的画面"""
+        frame = self.image_frames.get(image_path)
+        if frame is not None:
+            height, width = frame.shape[:2]
+            pixmap = QPixmap.fromImage(QImage(frame.data, width, height, frame.strides[0], QImage.Format_BGR888))
+        elif os.path.exists(image_path):
             pixmap = QPixmap(image_path)
-            pixmap = pixmap.scaled(
-                self.image_display.width(), 
-                self.image_display.height(),
-                Qt.KeepAspectRatio, 
-                Qt.SmoothTransformation
-            )
-            self.image_display.setPixmap(pixmap)
         else:
             self.image_display.setText("图片文件不存在")
+            return
+            
+        pixmap = pixmap.scaled(
+            self.image_display.width(), 
+            self.image_display.height(),
+            Qt.KeepAspectRatio, 
+            Qt.SmoothTransformation
+        )
+        self.image_display.setPixmap(pixmap)
             
     def recognize_text(self):
         """识别当前图片中的文字"""
@@ -424,40 +602,79 @@ class MainWindow(QMainWindow):
             
         image_path = self.captured_images[self.current_index]
         
-        try:
-            # 显示正在识别的提示
-            self.ocr_text.setText("正在识别文字...")
-            self.statusBar.showMessage("正在识别文字...")
-            QApplication.processEvents()  # 更新UI
-            
-            # 调整图像大小
-            resized_image_path = self.resize_image(image_path)
-            
-            # 调用OCR服务识别文字
-            text = self.ocr_service.recognize(resized_image_path)
-            
-            # 显示识别结果
-            self.ocr_text.setText(text)
-            
-            # 保存识别结果
-            self.ocr_results[self.current_index] = text
-            
-            # 如果使用了调整后的图像，且不是原始图像，则删除调整后的图像
-            if resized_image_path != image_path and os.path.exists(resized_image_path):
-                try:
-                    os.remove(resized_image_path)
-                except:
-                    pass
-                    
-            # 更新整合的OCR结果
-            self.update_combined_ocr_text()
-            
-            # 更新状态栏
-            self.statusBar.showMessage(f"已识别图片 {self.current_index+1}/{len(self.captured_images)}")
+        # 显示正在识别的提示，模型仍在加载时识别会等待加载完成
+        self.ocr_text.setText("正在识别文字...")
+        self.statusBar.showMessage(self.ocr_waiting_message("正在识别文字..."))
+        
+        # 在后台线程中识别，单张图片识别优先执行
+        job = self.job_queue.submit(
+            self._recognize_image_job,
+            image_path,
+            self.ocr_input(image_path),
+            priority=PRIORITY_HIGH,
+            name="识别当前图片"
+        )
+        job.signals.result.connect(self.on_image_recognized)
+        job.signals.error.connect(self.on_recognize_error)
+        job.signals.finished.connect(self.update_ocr_status)
+        job.signals.cancelled.connect(lambda: self.statusBar.showMessage("已取消识别"))
+        
+    def _recognize_image_job(self, job, image_path, image):
+        """后台任务：识别一张图片"""
+        # 调用OCR服务识别文字，识别失败时抛出OCRError
+        result = self.ocr_service.recognize(image)
+        return image_path, result
+        
+    def on_image_recognized(self, result):
+        """单张图片识别完成"""
+        image_path, ocr_result = result
+        
+        # 保存识别结果
+        self.store_ocr_result(image_path, ocr_result)
+        
+        # 更新整合的OCR结果
+        self.update_combined_ocr_text()
+        
+        # 显示识别结果
+        if not self.combine_checkbox.isChecked() and 0 <= self.current_index < len(self.ocr_results):
+            self.ocr_text.setText(self.ocr_results[self.current_index])
+            
+        # 更新状态栏，显示识别分辨率、文字高度、置信度和用时
+        message = f"已识别图片: {os.path.basename(image_path)}"
+        if ocr_result.summary():
+            message += f" ({ocr_result.summary()})"
+        self.statusBar.showMessage(message)
+        
+    def on_recognize_error(self, message):
+        """识别失败"""
+        self.ocr_text.setText(f"识别文字时错误: {message}")
+        self.statusBar.showMessage(f"识别失败: {message}")
+        
+    def store_ocr_result(self, image_path, result):
+        """保存识别结果
+        
+        识别在后台进行，期间图片列表可能发生变化，因此按图片路径查找对应的位置
+        """
+        if isinstance(result, OCRError):
+            text, details = f"识别失败: {result}", None
+        elif len(result) == 0:
+            text, details = NO_TEXT_MESSAGE, result
+        else:
+            # 按阅读顺序还原分栏和段落，显示和生成笔记都使用还原后的文字
+            text, details = layout_text(result), result
             
-        except Exception as e:
-            self.ocr_text.setText(f"识别文字时错误: {str(e)}")
-            self.statusBar.showMessage(f"识别失败: {str(e)}")
+        for i, path in enumerate(self.captured_images):
+            if path == image_path:
+                self.ocr_results[i] = text
+                self.ocr_details[i] = details
+                
+        # 已识别的画面不再需要保留在内存中
+        # 之后识别时读取图片文件，缓存键随之改变，因此以文件内容为键再缓存一份识别结果
+        if self.image_frames.pop(image_path, None) is not None and not isinstance(result, OCRError):
+            if image_path in self.unsaved_images:
+                self.unsaved_results[image_path] = result
+            else:
+                self.ocr_service.cache_result(image_path, result)
             
     def recognize_all_images(self):
         """识别所有图片中的文字"""
@@ -465,107 +682,227 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "警告", "没有可识别的图片")
             return
             
-        try:
-            # 显示正在识别的提示
-            self.ocr_text.setText("正在识别所有图片...")
-            self.statusBar.showMessage("正在识别所有图片...")
-            QApplication.processEvents()  # 更新UI
-            
-            # 保存当前索引
-            current_index = self.current_index
-            
-            # 识别所有图片
-            for i, image_path in enumerate(self.captured_images):
-                # 更新进度提示
-                self.ocr_text.setText(f"正在识别图片 {i+1}/{len(self.captured_images)}...")
-                self.statusBar.showMessage(f"正在识别图片 {i+1}/{len(self.captured_images)}...")
-                QApplication.processEvents()  # 更新UI
-                
-                # 调整图像大小
-                resized_image_path = self.resize_image(image_path)
-                
-                # 调用OCR服务识别文字
-                text = self.ocr_service.recognize(resized_image_path)
-                
-                # 保存识别结果
-                self.ocr_results[i] = text
-                
-                # 如果使用了调整后的图像，且不是原始图像，则删除调整后的图像
-                if resized_image_path != image_path and os.path.exists(resized_image_path):
-                    try:
-                        os.remove(resized_image_path)
-                    except:
-                        pass
+        if self.recognize_all_job is not None:
+            QMessageBox.warning(self, "警告", "正在识别所有图片，请等待完成或取消任务")
+            return
             
-            # 更新整合的OCR结果
-            self.update_combined_ocr_text()
+        # 跳过重复拍摄的图片
+        duplicates = self.duplicate_index.duplicates()
+        image_paths = [path for path in self.captured_images if path not in duplicates]
+        self.skipped_duplicates = len(self.captured_images) - len(image_paths)
+        
+        # 显示正在识别的提示
+        self.ocr_text.setText("正在识别所有图片...")
+        self.statusBar.showMessage(self.ocr_waiting_message("正在识别所有图片..."))
+        
+        # 在后台线程中识别，批量识别的优先级低于单张识别和生成笔记
+        job = self.job_queue.submit(
+            self._recognize_all_job,
+            image_paths,
+            [self.ocr_input(image_path) for image_path in image_paths],
+            priority=PRIORITY_LOW,
+            name="识别所有图片"
+        )
+        job.signals.progress.connect(self.on_job_progress)
+        job.signals.partial.connect(lambda result: self.store_ocr_result(*result))
+        job.signals.result.connect(self.on_all_images_recognized)
+        job.signals.error.connect(self.on_recognize_error)
+        job.signals.cancelled.connect(self.on_recognize_all_cancelled)
+        job.signals.finished.connect(self.on_recognize_all_finished)
+        self.recognize_all_job = job
+        
+    def ocr_waiting_message(self, message):
+        """OCR模型尚未加载完成时，在提示信息后说明需要等待"""
+        if self.ocr_service.loaded:
+            return message
+        return f"{message} (OCR模型加载中，请稍候)"
+        
+    def _recognize_all_job(self, job, image_paths, images):
+        """后台任务：识别所有图片"""
+        # 多进程并行识别，结果按图片顺序逐张返回
+        results = self.ocr_service.recognize_parallel(
+            images,
+            workers=OCR_WORKERS,
+            batch_size=OCR_BATCH_SIZE,
+            progress_callback=lambda done, total: job.report_progress(done, total, "正在识别图片")
+        )
+        saved_ms = 0.0
+        for image_path, result in zip(image_paths, results):
+            # 逐张发送识别结果
+            job.emit_partial((image_path, result))
+            job.check_cancelled()
             
-            # 恢复当前索引并显示对应的OCR结果
-            self.current_index = current_index
-            if 0 <= self.current_index < len(self.ocr_results):
-                if self.combine_checkbox.isChecked():
-                    self.ocr_text.setText(self.combined_ocr_text)
-                else:
-                    self.ocr_text.setText(self.ocr_results[self.current_index])
-                    
-            # 更新状态栏
-            self.statusBar.showMessage(f"已完成所有图片识别")
-            QMessageBox.information(self, "识别完成", f"已成功识别 {len(self.captured_images)} 张图片")
+            # 统计跳过方向分类节省的时间
+            if not isinstance(result, OCRError) and result.stats:
+                saved_ms += result.stats.get("cls_saved_ms", 0.0)
             
-        except Exception as e:
-            self.ocr_text.setText(f"识别文字时错误: {str(e)}")
-            self.statusBar.showMessage(f"识别失败: {str(e)}")
+        return len(image_paths), saved_ms
+        
+    def on_job_progress(self, done, total, message):
+        """更新后台任务进度"""
+        self.statusBar.showMessage(f"{message} {done}/{total}...")
+        
+    def on_all_images_recognized(self, result):
+        """所有图片识别完成"""
+        count, saved_ms = result
+        
+        # 更新整合的OCR结果
+        self.update_combined_ocr_text()
+        
+        # 显示当前图片对应的OCR结果
+        if 0 <= self.current_index < len(self.ocr_results):
+            if self.combine_checkbox.isChecked():
+                self.ocr_text.setText(self.combined_ocr_text)
+            else:
+                self.ocr_text.setText(self.ocr_results[self.current_index])
+                
+        # 更新状态栏
+        self.statusBar.showMessage(f"已完成所有图片识别")
+        message = f"已成功识别 {count} 张图片"
+        if self.skipped_duplicates:
+            message += f"，跳过 {self.skipped_duplicates} 张重复的图片"
+        if saved_ms:
+            message += f"\n文字方向明确，跳过逐行方向分类，节省 {saved_ms / 1000:.1f} 秒"
+        QMessageBox.information(self, "识别完成", message)
+        
+    def on_recognize_all_cancelled(self):
+        """识别所有图片被取消，保留已完成的结果"""
+        self.update_combined_ocr_text()
+        self.statusBar.showMessage("已取消识别所有图片")
+        
+    def on_recognize_all_finished(self):
+        """识别所有图片的任务结束"""
+        self.recognize_all_job = None
             
     def update_combined_ocr_text(self):
         """更新整合的OCR结果"""
-        # 整合所有OCR结果
-        combined_text = ""
-        for i, text in enumerate(self.ocr_results):
-            if text:
-                if combined_text:
-                    combined_text += f"\n\n--- 图片 {i+1} ---\n\n"
-                else:
-                    combined_text += f"--- 图片 {i+1} ---\n\n"
-                combined_text += text
-                
-        self.combined_ocr_text = combined_text
+        # 整合所有OCR结果，跳过未识别到文字、识别失败和重复的图片
+        self.combined_ocr_text = join_pages([
+            (page, self.ocr_results[page - 1])
+            for page, _ in self.combined_pages()
+        ])
         
         # 如果选中了整合选项，则显示整合的结果
         if self.combine_checkbox.isChecked():
             self.ocr_text.setText(self.combined_ocr_text)
             
+    def combined_pages(self):
+        """参与整合的页面
+        
+        Returns:
+            list: (页码, OCRResult) 列表，不包括未识别到文字、识别失败和重复的图片
+        """
+        duplicates = self.duplicate_index.duplicates()
+        return [
+            (i + 1, result)
+            for i, (path, result) in enumerate(zip(self.captured_images, self.ocr_details))
+            if result is not None and len(result) > 0 and path not in duplicates
+        ]
+        
     def generate_notes(self):
         """根据OCR识别的文字生成笔记"""
-        # 确定使用哪个文本生成笔记
+        # 确定使用哪些页面生成笔记
         if self.combine_checkbox.isChecked():
-            text = self.combined_ocr_text
-        elif self.current_index >= 0 and self.current_index < len(self.ocr_results):
-            text = self.ocr_results[self.current_index]
+            pages = self.combined_pages()
+        elif self.current_index >= 0 and self.current_index < len(self.ocr_details):
+            pages = [(self.current_index + 1, self.ocr_details[self.current_index])]
         else:
-            text = ""
+            pages = []
+        pages = [(page, result) for page, result in pages if result is not None and len(result) > 0]
             
-        if not text:
+        if not pages:
             QMessageBox.warning(self, "警告", "请先识别文字")
             return
             
-        try:
-            # 显示正在生成的提示
-            self.notes_text.setText("正在生成笔记...")
-            self.statusBar.showMessage("正在生成笔记...")
-            QApplication.processEvents()  # 更新UI
+        if self.notes_job is not None:
+            QMessageBox.warning(self, "警告", "正在生成笔记，请等待完成或停止生成")
+            return
             
-            # 调用AI服务生成笔记
-            notes = self.ai_service.generate_notes(text)
+        # 去掉低置信度的文本行和页眉页脚，减少模型需要处理的词元
+        # 不限制词元数量，长文本由分段总结处理，不会丢弃正文
+        text, self.notes_prune_stats = prepare_notes_text(pages)
+        if not text:
+            QMessageBox.warning(self, "警告", "识别结果的置信度过低，没有可用于生成笔记的文字")
+            return
             
-            # 显示生成的笔记
-            self.notes_text.setText(notes)
+        # 清空笔记，生成的内容将逐段追加显示
+        self.notes_text.clear()
+        self.statusBar.showMessage(f"正在生成笔记...{self.prune_summary()}")
+        self.stop_notes_button.setEnabled(True)
+        self.notes_start_time = time.monotonic()
+        self.notes_first_token_time = None
+        
+        # 在后台线程中调用AI服务，流式接收生成的笔记
+        job = self.job_queue.submit(
+            self._generate_notes_job,
+            text,
+            priority=PRIORITY_NORMAL,
+            name="生成笔记"
+        )
+        job.signals.progress.connect(self.on_job_progress)
+        job.signals.partial.connect(self.on_notes_token)
+        job.signals.result.connect(self.on_notes_generated)
+        job.signals.error.connect(self.on_generate_notes_error)
+        job.signals.cancelled.connect(lambda: self.statusBar.showMessage("已停止生成笔记"))
+        job.signals.finished.connect(self.on_generate_notes_finished)
+        self.notes_job = job
+        
+    def _generate_notes_job(self, job, text):
+        """后台任务：流式生成笔记"""
+        # 长文本先分段总结，总结进度显示在状态栏
+        tokens = self.ai_service.generate_notes_stream(
+            text,
+            cancel_event=job.cancel_event,
+            progress_callback=lambda done, total: job.report_progress(done, total, "正在分段总结")
+        )
+        for token in tokens:
+            job.emit_partial(token)
             
-            # 更新状态栏
-            self.statusBar.showMessage("笔记生成完成")
+    def on_notes_token(self, token):
+        """收到模型新生成的文字，追加到笔记末尾"""
+        if self.notes_first_token_time is None:
+            self.notes_first_token_time = time.monotonic() - self.notes_start_time
+            self.statusBar.showMessage(f"正在生成笔记... (首字延迟 {self.notes_first_token_time:.1f} 秒)")
             
-        except Exception as e:
-            self.notes_text.setText(f"生成笔记时错误: {str(e)}")
-            self.statusBar.showMessage(f"生成笔记失败: {str(e)}")
+        cursor = self.notes_text.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(token)
+        
+    def on_notes_generated(self, _):
+        """笔记生成完成"""
+        # 更新状态栏
+        elapsed = time.monotonic() - self.notes_start_time
+        self.statusBar.showMessage(f"笔记生成完成，用时 {elapsed:.1f} 秒{self.prune_summary()}")
+        
+    def prune_summary(self):
+        """本次生成笔记精简掉的词元数量"""
+        stats = self.notes_prune_stats
+        if not stats["saved_tokens"]:
+            return ""
+        percent = stats["saved_tokens"] * 100 / stats["original_tokens"]
+        summary = f"精简 {stats['saved_tokens']} 个词元，{percent:.0f}%"
+        if stats["over_budget"]:
+            summary += f"，超出预算去掉 {stats['over_budget']} 行"
+        return f"（{summary}）"
+        
+    def on_generate_notes_error(self, message):
+        """生成笔记失败"""
+        self.notes_text.append(f"\n生成笔记时错误: {message}")
+        self.statusBar.showMessage(f"生成笔记失败: {message}")
+        
+    def on_generate_notes_finished(self):
+        """生成笔记的任务结束"""
+        self.notes_job = None
+        self.stop_notes_button.setEnabled(False)
+        
+        # 生成笔记前会重新检查Ollama服务
+        self.update_ai_status()
+        
+    def stop_generate_notes(self):
+        """停止生成笔记，保留已生成的内容"""
+        if self.notes_job is not None:
+            self.notes_job.cancel()
+            self.statusBar.showMessage("正在停止生成笔记...")
             
     def delete_current_image(self):
         """删除当前显示的图片"""
@@ -588,6 +925,9 @@ class MainWindow(QMainWindow):
             # 从列表中移除
             self.captured_images.pop(self.current_index)
             self.ocr_results.pop(self.current_index)
+            self.ocr_details.pop(self.current_index)
+            self.image_frames.pop(image_path, None)
+            self.duplicate_index.remove(image_path)
             
             # 尝试删除文件
             try:
@@ -596,8 +936,8 @@ class MainWindow(QMainWindow):
             except Exception as e:
                 print(f"删除文件失败: {str(e)}")
                 
-            # 更新图片导航器
-            self.image_navigator.set_images(self.captured_images)
+            # 更新图片导航器，与被删除图片重复的图片可能不再是重复的
+            self.update_image_navigator()
             
             # 更新当前索引
             if self.captured_images:
@@ -649,4 +989,30 @@ class MainWindow(QMainWindow):
         
         # 如果有图片正在显示，则重新调整图片大小
         if self.current_index >= 0 and self.current_index < len(self.captured_images):
-            self.display_image(self.captured_images[self.current_index]) 
\ No newline at end of file
+            self.display_image(self.captured_images[self.current_index])
+            
+    def cancel_jobs(self):
+        """取消所有后台任务"""
+        self.job_queue.cancel_all()
+        self.statusBar.showMessage("正在取消任务...")
+        
+    def on_active_jobs_changed(self, count):
+        """后台任务数量变化时更新取消按钮状态"""
+        self.cancel_button.setEnabled(count > 0)
+        
+    def closeEvent(self, event):
+        """窗口关闭时的事件处理"""
+        # 停止摄像头采集线程
+        self.camera_widget.stop_camera()
+        
+        # 取消并等待后台任务结束
+        self.job_queue.cancel_all()
+        self.job_queue.wait_for_done(5000)
+        
+        # 关闭OCR工作进程和缓存
+        self.ocr_service.close()
+        
+        # 关闭Ollama客户端连接
+        self.ai_service.close()
+        
+        super().closeEvent(event)
\ No newline at end of file
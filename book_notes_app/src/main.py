@@ -18,26 +18,78 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
+# 启动耗时分析，需在导入PyQt5等模块之前开始，才能记录各模块的导入耗时
+from src.utils import startup_profiler
+
+if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        startup_profiler.enable()
+    startup_profiler.get_profiler("main").install_import_hook()
+
 # 导入PyQt5模块
 from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QEvent
 
 # 导入应用程序模块
 from src.gui.main_window import MainWindow
 
+class FirstPaintFilter(QObject):
+    """记录窗口首次绘制的时间"""
+    
+    def __init__(self, profiler, callback, parent=None):
+        super().__init__(parent)
+        self.profiler = profiler
+        self.callback = callback
+        
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            if not self.profiler.has_mark("首次绘制"):
+                self.profiler.mark("首次绘制")
+            self.callback()
+        return False
+
 def main():
     """应用程序主入口"""
     # 确保当前工作目录正确
     os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     
+    profiler = startup_profiler.get_profiler()
+    
     # 创建应用程序实例
-    app = QApplication(sys.argv)
+    with profiler.phase("Qt初始化"):
+        app = QApplication(sys.argv)
     
     # 创建并显示主窗口
-    window = MainWindow()
+    with profiler.phase("创建主窗口"):
+        window = MainWindow()
+        
+    if startup_profiler.is_enabled():
+        watch_startup(app, window, profiler)
+        
     window.show()
+    profiler.mark("显示窗口")
     
     # 运行应用程序事件循环
     sys.exit(app.exec_())
+    
+def watch_startup(app, window, profiler):
+    """窗口首次绘制且OCR模型加载、Ollama检查等后台任务结束后输出启动耗时报告
+    
+    带有 --exit-after-startup 参数时，输出报告后退出程序，便于反复测量。
+    """
+    def check_finished(*_):
+        if profiler.finished or not profiler.has_mark("首次绘制") or window.job_queue.active_count() > 0:
+            return
+        profiler.finish()
+        window.removeEventFilter(paint_filter)
+        if "--exit-after-startup" in sys.argv:
+            app.quit()
+            
+    # 首次绘制和后台任务结束的先后顺序不确定，两处都检查
+    paint_filter = FirstPaintFilter(profiler, check_finished, window)
+    window.installEventFilter(paint_filter)
+    window.job_queue.active_count_changed.connect(check_finished)
+    app.aboutToQuit.connect(profiler.finish)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
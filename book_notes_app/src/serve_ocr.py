@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""启动OCR HTTP服务，供多个拍摄终端共享
+
+用法:
+    python src/serve_ocr.py [--host 0.0.0.0] [--port 8866]
+
+终端设置环境变量 BOOK_NOTES_OCR_SERVER=http://服务器地址:8866 后，界面会使用该服务识别文字。
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+# 设置控制台编码，解决中文显示问题
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.services.ocr_service import OCRService, TARGET_TEXT_HEIGHT, TILE_SIZE, TILE_OVERLAP
+from src.services.ocr_backends import BACKENDS
+from src.services.ocr_server import (OCRServer, DEFAULT_HOST, DEFAULT_PORT, DEFAULT_MAX_BATCH_SIZE,
+                                     DEFAULT_MAX_WAIT_MS, DEFAULT_MAX_QUEUE)
+
+# 识别时图像尺寸的上限，与界面一致，在此范围内根据文字高度选择分辨率
+MAX_IMAGE_WIDTH = 4096
+MAX_IMAGE_HEIGHT = 4096
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="启动OCR HTTP服务")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="监听地址，供其他机器访问时使用 0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="监听端口")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE, help="每批最多合并的请求数量")
+    parser.add_argument("--max-wait-ms", type=int, default=DEFAULT_MAX_WAIT_MS, help="等待更多请求加入同一批的最长时间（毫秒）")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, help="等待识别的请求数量上限")
+    parser.add_argument("--max-width", type=int, default=MAX_IMAGE_WIDTH, help="识别前缩小图像的最大宽度")
+    parser.add_argument("--max-height", type=int, default=MAX_IMAGE_HEIGHT, help="识别前缩小图像的最大高度")
+    parser.add_argument("--engine", choices=list(BACKENDS), help="OCR引擎，默认为环境变量 BOOK_NOTES_OCR_ENGINE 指定的引擎或 paddle")
+    parser.add_argument("--target-text-height", type=int, default=TARGET_TEXT_HEIGHT, help="自适应分辨率的目标文本行高度（像素），为0时只按最大尺寸缩小")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE, help=f"高分辨率图像分块检测的块边长（像素），须大于{TILE_OVERLAP}，为0时整幅图像一次检测")
+    parser.add_argument("--classify-all-lines", action="store_true", help="对每个文本行执行方向分类，不按页估计文字方向")
+    parser.add_argument("--no-page-crop", action="store_true", help="识别前不检测和裁剪书页区域，适用于扫描件")
+    args = parser.parse_args(argv)
+    if args.tile_size and args.tile_size <= TILE_OVERLAP:
+        parser.error(f"--tile-size 必须为0或大于{TILE_OVERLAP}")
+    return args
+
+def main(argv=None):
+    """命令行入口"""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    ocr_service = OCRService(
+        max_width=args.max_width,
+        max_height=args.max_height,
+        crop_page=not args.no_page_crop,
+        target_text_height=args.target_text_height,
+        tile_size=args.tile_size,
+        engine=args.engine,
+        estimate_orientation=not args.classify_all_lines,
+        # 服务器识别来自多个终端的图片，每页单独估计文字方向，不沿用其他终端的页面的方向
+        session_orientation=False
+    )
+    print("正在加载OCR模型...")
+    if not ocr_service.load():
+        print("OCR模型加载失败")
+        return 1
+    print(f"OCR模型加载完成，用时 {ocr_service.load_seconds:.1f} 秒")
+    if ocr_service.warm_up():
+        print(f"OCR模型预热完成，用时 {ocr_service.warmup_seconds:.1f} 秒")
+
+    server = OCRServer(
+        ocr_service,
+        host=args.host,
+        port=args.port,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        max_queue=args.max_queue
+    )
+    print(f"OCR服务已启动: http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n正在停止OCR服务...")
+    finally:
+        server.server_close()
+        ocr_service.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
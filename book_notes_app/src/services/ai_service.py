@@ -1,40 +1,72 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import os
-import json
 import logging
+import hashlib
+import threading
 import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.services.ollama_client import OllamaClient, DEFAULT_BASE_URL
+from src.utils.text_utils import estimate_tokens, split_pages, pack_chunks
+
+# 单次提示允许的OCR文本词元数量，超过时使用分段总结再合并的方式生成笔记
+SINGLE_PASS_TOKEN_LIMIT = 2500
+
+# 分段总结时每个分段的词元预算
+CHUNK_TOKEN_BUDGET = 1500
+
+# 分段总结时每组的页数，分段边界固定在组边界上，修改某一页只需重新总结该页所在组的分段
+CHUNK_PAGES = 3
+
+# 摘要仍然过长时，每组合并总结的摘要数量
+REDUCE_GROUP_SIZE = 4
+
+# 同时进行的分段总结请求数量
+MAP_CONCURRENCY = 2
+
+# 等待分段总结时检查取消事件的间隔（秒）
+CANCEL_POLL_INTERVAL = 0.2
+
+# 分段摘要提示词版本，修改提示词时递增，使缓存的摘要失效
+CHUNK_PROMPT_VERSION = 1
+
+# 内存中最多缓存的分段摘要数量
+MAX_CACHED_SUMMARIES = 512
 
 class AIService:
     """AI服务，用于生成读书笔记"""
     
-    def __init__(self):
-        """初始化AI服务"""
-        # Ollama API地址
-        self.api_url = "http://localhost:11434/api/generate"
+    def __init__(self, base_url=DEFAULT_BASE_URL):
+        """初始化AI服务
+        
+        Args:
+            base_url: Ollama服务地址
+        """
+        # Ollama客户端，所有请求共享连接池
+        self.client = OllamaClient(base_url)
         
         # 模型名称
         self.model = "llama3.1:8b-instruct-q8_0"
         
-        # 检查Ollama服务是否可用
-        self.check_service()
+        # 分段摘要缓存，修改某一页后只需重新总结该页所在的分段
+        self.chunk_summaries = OrderedDict()
+        self.summary_lock = threading.Lock()
+        
+        # Ollama服务是否可用，None表示尚未检查
+        # 检查需要发起网络请求，由调用方在后台线程中调用check_service()，或在首次生成笔记时检查
+        self.service_available = None
     
     def check_service(self):
         """检查Ollama服务是否可用"""
         try:
-            response = requests.get("http://localhost:11434/api/tags")
-            if response.status_code == 200:
-                models = response.json().get("models", [])
-                model_names = [model.get("name") for model in models]
+            model_names = self.client.list_models()
+            
+            if self.model not in model_names:
+                logging.warning(f"模型 {self.model} 未在Ollama中找到，可能需要先下载")
                 
-                if self.model not in model_names:
-                    logging.warning(f"模型 {self.model} 未在Ollama中找到，可能需要先下载")
-                    
-                self.service_available = True
-            else:
-                logging.error("Ollama服务响应异常")
-                self.service_available = False
+            self.service_available = True
                 
         except requests.exceptions.ConnectionError:
             logging.error("无法连接到Ollama服务，请确保Ollama已启动")
@@ -43,24 +75,213 @@ class AIService:
             logging.error(f"检查Ollama服务时出错: {str(e)}")
             self.service_available = False
     
-    def generate_notes(self, text):
+    def generate_notes(self, text, progress_callback=None):
         """根据OCR识别的文字生成读书笔记
         
         Args:
             text: OCR识别的文字
+            progress_callback: 分段总结的进度回调函数，参数为(已完成数量, 总数量)
             
         Returns:
             str: 生成的读书笔记
         """
         if not self.service_available:
-            raise RuntimeError("Ollama服务不可用，请确保服务已启动")
+            # 尚未检查或上次检查不可用时重新检查，Ollama可能在程序启动后才运行
+            self.check_service()
+            if not self.service_available:
+                raise RuntimeError("Ollama服务不可用，请确保服务已启动")
             
         if not text or len(text.strip()) == 0:
             raise ValueError("输入文本为空")
             
         try:
-            # 构建提示词
-            prompt = f"""
+            notes = "".join(self.generate_notes_stream(text, progress_callback=progress_callback))
+            return notes or "生成笔记失败"
+                
+        except Exception as e:
+            logging.error(f"生成笔记时出错: {str(e)}")
+            return f"生成笔记失败: {str(e)}"
+            
+    def generate_notes_stream(self, text, cancel_event=None, progress_callback=None):
+        """根据OCR识别的文字生成读书笔记，逐段返回模型输出
+        
+        Ollama以换行分隔的JSON流式返回生成结果，每收到一段就立即返回，
+        调用方可以在模型生成完成之前开始显示笔记。
+        
+        文本超过单次提示的词元上限时，先按分页标记拆分为多个分段并发总结，
+        再根据各分段的摘要生成最终笔记。
+        
+        Args:
+            text: OCR识别的文字
+            cancel_event: 取消事件，设置后停止接收并关闭连接
+            progress_callback: 分段总结的进度回调函数，参数为(已完成数量, 总数量)
+            
+        Yields:
+            str: 模型新生成的文字片段
+        """
+        if not self.service_available:
+            # 尚未检查或上次检查不可用时重新检查，Ollama可能在程序启动后才运行
+            self.check_service()
+            if not self.service_available:
+                raise RuntimeError("Ollama服务不可用，请确保服务已启动")
+            
+        if not text or len(text.strip()) == 0:
+            raise ValueError("输入文本为空")
+            
+        if estimate_tokens(text) <= SINGLE_PASS_TOKEN_LIMIT:
+            prompt = self._build_notes_prompt(text)
+        else:
+            summaries = self._map_reduce(text, cancel_event, progress_callback)
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            prompt = self._build_merge_prompt(summaries)
+            
+        yield from self._stream(prompt, cancel_event)
+        
+    def _map_reduce(self, text, cancel_event=None, progress_callback=None):
+        """把长文本拆分为分段并总结，直到摘要总长度不超过单次提示的上限
+        
+        Args:
+            text: 整合的OCR文字
+            cancel_event: 取消事件
+            progress_callback: 进度回调函数
+            
+        Returns:
+            list: (分段标题, 摘要) 列表，取消时为空列表
+        """
+        # 每项为(组号, 起始标题, 结束标题, 文本)，首轮按页码固定分组，之后把上一轮相邻的组合并为一组，
+        # 各轮的分段边界都只取决于页码，修改某一页只影响该页所在的分段
+        items = [
+            ((page - 1) // CHUNK_PAGES, f"第{page}页", f"第{page}页", page_text)
+            for page, page_text in split_pages(text)
+        ]
+        
+        while True:
+            # 取消后不再发起新一轮的总结请求
+            if cancel_event is not None and cancel_event.is_set():
+                return []
+                
+            chunks = [
+                (items[start][0], items[start][1], items[end][2], chunk_text)
+                for start, end, chunk_text in pack_chunks(
+                    [(i, item[3]) for i, item in enumerate(items)],
+                    CHUNK_TOKEN_BUDGET,
+                    [item[0] for item in items]
+                )
+            ]
+            
+            summaries = self._summarize_chunks(
+                [(self._chunk_title(first, last), chunk_text) for _, first, last, chunk_text in chunks],
+                cancel_event,
+                progress_callback
+            )
+            
+            # 本轮被取消时摘要不完整，直接返回
+            if cancel_event is not None and cancel_event.is_set():
+                return []
+                
+            total = sum(estimate_tokens(summary) for _, summary in summaries)
+            
+            # 摘要仍然过长时继续对摘要进行总结，标题仍使用原始页码范围
+            if total <= SINGLE_PASS_TOKEN_LIMIT or len(summaries) <= 1 or len(summaries) >= len(items):
+                return summaries
+            items = [
+                (group // REDUCE_GROUP_SIZE, first, last, summary)
+                for (group, first, last, _), (_, summary) in zip(chunks, summaries)
+            ]
+            
+    def _summarize_chunks(self, chunks, cancel_event=None, progress_callback=None):
+        """并发总结各分段，已总结过的分段直接使用缓存的摘要
+        
+        Args:
+            chunks: (分段标题, 分段文本) 列表
+            cancel_event: 取消事件
+            progress_callback: 进度回调函数
+            
+        Returns:
+            list: (分段标题, 摘要) 列表，顺序与输入一致
+        """
+        keys = [self._summary_key(title, chunk_text) for title, chunk_text in chunks]
+        summaries = [self.chunk_summaries.get(key) for key in keys]
+        
+        total = len(chunks)
+        done = sum(1 for summary in summaries if summary is not None)
+        if progress_callback:
+            progress_callback(done, total)
+            
+        # 不使用with语句：退出时会等待正在进行的请求，取消后应立即返回
+        executor = ThreadPoolExecutor(max_workers=MAP_CONCURRENCY)
+        futures = {}
+        try:
+            for i, (title, chunk_text) in enumerate(chunks):
+                if summaries[i] is None:
+                    futures[executor.submit(self._complete, self._build_chunk_prompt(title, chunk_text))] = i
+                    
+            pending = set(futures)
+            while pending:
+                # 定期检查取消事件，不必等到某个分段完成
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                finished, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = futures[future]
+                    summaries[i] = future.result()
+                    self._store_summary(keys[i], summaries[i])
+                    
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, total)
+        finally:
+            # 取消尚未开始的请求，正在进行的请求在后台结束，不等待
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+            
+        return [(title, summary or "") for (title, _), summary in zip(chunks, summaries)]
+        
+    def _summary_key(self, title, chunk_text):
+        """计算分段摘要的缓存键，标题也写入提示词，因此包含在键中"""
+        digest = hashlib.sha256(f"{self.model}\n{CHUNK_PROMPT_VERSION}\n{title}\n{chunk_text}".encode("utf-8"))
+        return digest.hexdigest()
+        
+    def _store_summary(self, key, summary):
+        """缓存分段摘要，超过上限时淘汰最早的条目"""
+        with self.summary_lock:
+            self.chunk_summaries[key] = summary
+            while len(self.chunk_summaries) > MAX_CACHED_SUMMARIES:
+                self.chunk_summaries.popitem(last=False)
+                
+    @staticmethod
+    def _chunk_title(first, last):
+        """生成分段标题，例如：第1页 - 第3页"""
+        return first if first == last else f"{first} - {last}"
+        
+    def _complete(self, prompt):
+        """发送非流式生成请求
+        
+        Args:
+            prompt: 提示词
+            
+        Returns:
+            str: 模型生成的文字
+        """
+        return self.client.generate(self._build_request(prompt))
+        
+    def _stream(self, prompt, cancel_event=None):
+        """发送流式生成请求，逐段返回模型输出
+        
+        Args:
+            prompt: 提示词
+            cancel_event: 取消事件
+            
+        Yields:
+            str: 模型新生成的文字片段
+        """
+        yield from self.client.generate_stream(self._build_request(prompt), cancel_event)
+        
+    def _build_notes_prompt(self, text):
+        """构建生成读书笔记的提示词"""
+        return f"""
             请根据以下文本内容，生成一份结构化的读书笔记。笔记应包括：
             1. 主要观点概述
             2. 关键概念解析
@@ -73,29 +294,51 @@ class AIService:
             请以Markdown格式输出笔记。
             """
             
-            # 构建请求数据
-            data = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "max_tokens": 2000
-                }
-            }
+    def _build_chunk_prompt(self, title, text):
+        """构建总结单个分段的提示词"""
+        return f"""
+            以下是一本书中{title}的内容，请提炼其中的要点，
+            保留关键概念、重要论点和典型例子，用简洁的条目列出，不要添加原文没有的内容。
             
-            # 发送请求
-            response = requests.post(self.api_url, json=data)
+            文本内容：
+            {text}
+            """
             
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("response", "生成笔记失败")
-            else:
-                error_msg = f"API请求失败，状态码: {response.status_code}"
-                logging.error(error_msg)
-                return f"生成笔记失败: {error_msg}"
-                
-        except Exception as e:
-            logging.error(f"生成笔记时出错: {str(e)}")
-            return f"生成笔记失败: {str(e)}"
\ No newline at end of file
+    def _build_merge_prompt(self, summaries):
+        """构建根据各分段摘要生成读书笔记的提示词"""
+        summary_text = "\n\n".join(f"【{title}】\n{summary}" for title, summary in summaries)
+        return f"""
+            以下是一本书中连续多个部分的要点摘要，请据此生成一份完整、结构化的读书笔记。笔记应包括：
+            1. 主要观点概述
+            2. 关键概念解析
+            3. 重要论点分析
+            4. 个人思考与启示
+            
+            要点摘要：
+            {summary_text}
+            
+            请以Markdown格式输出笔记。
+            """
+            
+    def _build_request(self, prompt):
+        """构建Ollama生成请求，是否流式返回由客户端设置
+        
+        Args:
+            prompt: 提示词
+            
+        Returns:
+            dict: 请求数据
+        """
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "options": {
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "max_tokens": 2000
+            }
+        }
+        
+    def close(self):
+        """关闭Ollama客户端"""
+        self.client.close()
\ No newline at end of file
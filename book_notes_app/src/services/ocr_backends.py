@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""OCR引擎
+
+OCR服务把识别分为文字检测、方向分类和文字识别三个阶段，由OCR引擎完成，
+图片预处理、分块、批量合并和缓存等都在OCR服务中完成，与引擎无关。
+
+可用的引擎：
+    paddle: PaddleOCR，导入和加载较慢
+    onnx: 使用ONNX Runtime运行PP-OCR模型（rapidocr_onnxruntime），不依赖PaddlePaddle，启动快
+    stub: 不加载模型的确定性引擎，用于测试和对比流程本身的耗时
+"""
+
+import os
+import zlib
+import logging
+import cv2
+import numpy as np
+
+# OCR模型配置
+OCR_LANG = "ch"
+USE_ANGLE_CLS = True
+
+# 识别器和方向分类器的批量大小
+# 批量识别时，多张图片的文本行会合并后按此大小分批送入模型
+REC_BATCH_NUM = 24
+CLS_BATCH_NUM = 24
+
+# 置信度低于此值的文本行会被丢弃，引擎没有提供时使用
+DROP_SCORE = 0.5
+
+# 指定OCR引擎的环境变量，例如 onnx
+OCR_ENGINE_ENV = "BOOK_NOTES_OCR_ENGINE"
+
+# 默认OCR引擎
+DEFAULT_ENGINE = "paddle"
+
+class OCRBackend:
+    """OCR引擎接口"""
+
+    # 引擎名称，用于选择引擎和计算缓存键
+    name = None
+
+    def __init__(self):
+        self.use_angle_cls = USE_ANGLE_CLS
+        self.drop_score = DROP_SCORE
+
+    def load(self):
+        """加载模型，失败时抛出异常"""
+        raise NotImplementedError
+
+    def detect(self, img):
+        """检测文本行
+
+        Args:
+            img: BGR格式的图像
+
+        Returns:
+            numpy.ndarray: 文本框，形状为[N, 4, 2]，顶点顺序为左上、右上、右下、左下
+        """
+        raise NotImplementedError
+
+    def classify(self, crops):
+        """方向分类，把旋转180度的文本行转正
+
+        Args:
+            crops: 文本行图像列表
+
+        Returns:
+            tuple: (转正后的文本行图像列表, 各行的(方向标签, 置信度)列表)，方向标签为"0"或"180"
+        """
+        return crops, [("0", 1.0)] * len(crops)
+
+    def recognize(self, crops):
+        """识别文本行
+
+        Args:
+            crops: 文本行图像列表
+
+        Returns:
+            list: 与输入顺序一致的(文字, 置信度)列表
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _boxes(dt_boxes):
+        """把检测结果统一转换为[N, 4, 2]的数组，未检测到时为空数组"""
+        if dt_boxes is None or len(dt_boxes) == 0:
+            return np.zeros((0, 4, 2), dtype=np.float32)
+        return np.asarray(dt_boxes, dtype=np.float32).reshape(-1, 4, 2)
+
+class PaddleBackend(OCRBackend):
+    """PaddleOCR引擎"""
+
+    name = "paddle"
+
+    def __init__(self):
+        super().__init__()
+        self.ocr = None
+
+    def load(self):
+        # PaddleOCR导入和模型加载都比较耗时，推迟到真正需要时进行
+        from paddleocr import PaddleOCR
+
+        # 初始化PaddleOCR
+        self.ocr = PaddleOCR(
+            use_angle_cls=USE_ANGLE_CLS,  # 使用方向分类器
+            lang=OCR_LANG,                # 中文模型
+            use_gpu=False,                # 不使用GPU
+            show_log=False,               # 不显示日志
+            rec_batch_num=REC_BATCH_NUM,  # 识别批量大小
+            cls_batch_num=CLS_BATCH_NUM   # 分类批量大小
+        )
+        self.use_angle_cls = self.ocr.use_angle_cls
+        self.drop_score = self.ocr.drop_score
+
+    def detect(self, img):
+        dt_boxes, _ = self.ocr.text_detector(img)
+        return self._boxes(dt_boxes)
+
+    def classify(self, crops):
+        crops, cls_res, _ = self.ocr.text_classifier(crops)
+        return crops, cls_res
+
+    def recognize(self, crops):
+        # 识别器内部会按宽高比排序并分批推理
+        rec_res, _ = self.ocr.text_recognizer(crops)
+        return rec_res
+
+class OnnxBackend(OCRBackend):
+    """ONNX Runtime引擎，使用rapidocr_onnxruntime提供的PP-OCR模型"""
+
+    name = "onnx"
+
+    def __init__(self):
+        super().__init__()
+        self.engine = None
+
+    def load(self):
+        # 只依赖onnxruntime和OpenCV，导入和加载都比PaddleOCR快
+        from rapidocr_onnxruntime import RapidOCR
+
+        self.engine = RapidOCR()
+        self.use_angle_cls = getattr(self.engine, "use_cls", USE_ANGLE_CLS)
+        self.drop_score = getattr(self.engine, "text_score", DROP_SCORE)
+
+    def detect(self, img):
+        dt_boxes, _ = self.engine.text_det(img)
+        return self._boxes(dt_boxes)
+
+    def classify(self, crops):
+        crops, cls_res, _ = self.engine.text_cls(crops)
+        return crops, cls_res
+
+    def recognize(self, crops):
+        rec_res = self.engine.text_rec(crops)[0]
+        # 部分版本在文字和置信度之后还会返回单字位置
+        return [(item[0], float(item[1])) for item in rec_res]
+
+class StubBackend(OCRBackend):
+    """不加载模型的确定性引擎
+
+    检测时把深色笔画在水平方向上连接成文本行，识别结果由文本行图像的内容决定，
+    同一图像总是得到相同的结果。可以在没有模型的环境中测试完整的识别流程。
+    """
+
+    name = "stub"
+
+    # 横向连接笔画的距离，占图像宽度的比例
+    JOIN_RATIO = 0.02
+
+    # 文本行的最小高度（像素）
+    MIN_LINE_HEIGHT = 4
+
+    def load(self):
+        pass
+
+    def detect(self, img):
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+        join = max(3, int(img.shape[1] * self.JOIN_RATIO))
+        lines = cv2.dilate(ink, np.ones((1, join), dtype=np.uint8))
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(lines)
+        boxes = []
+        for x, y, width, height, _ in stats[1:count]:
+            if height >= self.MIN_LINE_HEIGHT and width >= height:
+                boxes.append([[x, y], [x + width, y], [x + width, y + height], [x, y + height]])
+        return self._boxes(boxes)
+
+    def recognize(self, crops):
+        return [
+            (f"行{zlib.crc32(np.ascontiguousarray(crop).tobytes()) % 100000:05d}", 1.0)
+            for crop in crops
+        ]
+
+# 可用的OCR引擎
+BACKENDS = {
+    PaddleBackend.name: PaddleBackend,
+    OnnxBackend.name: OnnxBackend,
+    StubBackend.name: StubBackend
+}
+
+def default_engine():
+    """默认使用的OCR引擎，可以通过环境变量指定，指定的引擎不存在时使用默认引擎"""
+    name = os.environ.get(OCR_ENGINE_ENV) or DEFAULT_ENGINE
+    if name not in BACKENDS:
+        logging.error(f"环境变量{OCR_ENGINE_ENV}指定的OCR引擎不存在: {name}，使用默认引擎{DEFAULT_ENGINE}")
+        return DEFAULT_ENGINE
+    return name
+
+def create_backend(name):
+    """创建OCR引擎，模型在调用load()时加载
+
+    Args:
+        name: 引擎名称
+
+    Returns:
+        OCRBackend: OCR引擎
+
+    Raises:
+        ValueError: 未知的引擎名称
+    """
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"未知的OCR引擎: {name}，可用的引擎: {', '.join(BACKENDS)}")
+    return backend_class()
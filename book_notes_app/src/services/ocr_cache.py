@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import logging
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+
+# 默认缓存文件位置
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "cache",
+    "ocr_cache.sqlite3"
+)
+
+# 默认缓存容量上限（字节）
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# 超出容量时淘汰到容量上限的比例，避免每次写入都触发淘汰
+EVICT_TARGET_RATIO = 0.9
+
+class OCRCache:
+    """OCR结果缓存，以图片内容和OCR配置的哈希为键，持久化保存在本地SQLite文件中"""
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        """初始化缓存
+
+        Args:
+            db_path: 缓存文件路径
+            max_bytes: 缓存容量上限（字节），超出时按最近最少使用的顺序淘汰
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+            # 缓存会在后台线程中访问，由锁保证串行
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "last_access REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON ocr_cache (last_access)")
+            self.conn.commit()
+            self.available = True
+        except Exception as e:
+            logging.error(f"初始化OCR缓存失败: {str(e)}")
+            self.conn = None
+            self.available = False
+
+    @staticmethod
+    def make_key(image, config):
+        """根据图片内容和OCR配置计算缓存键
+
+        图片路径按文件内容计算哈希，同一张图片以不同文件名保存时也能命中缓存。
+
+        Args:
+            image: 图片路径，或图像数组
+            config: OCR配置字典
+
+        Returns:
+            str: 缓存键
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+
+        if isinstance(image, np.ndarray):
+            digest.update(f"array:{image.shape}:{image.dtype}".encode("utf-8"))
+            digest.update(np.ascontiguousarray(image).data)
+        else:
+            digest.update(b"file:")
+            with open(image, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def get(self, key):
+        """读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            str: 缓存的识别结果，未命中时返回None
+        """
+        if not self.available:
+            return None
+
+        try:
+            with self._lock:
+                row = self.conn.execute("SELECT value FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+
+                # 更新访问时间，用于最近最少使用淘汰
+                self.conn.execute("UPDATE ocr_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+                self.conn.commit()
+                return row[0]
+        except Exception as e:
+            logging.error(f"读取OCR缓存失败: {str(e)}")
+            return None
+
+    def put(self, key, value):
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            value: 识别结果
+        """
+        if not self.available:
+            return
+
+        try:
+            size = len(key) + len(value.encode("utf-8"))
+            with self._lock:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO ocr_cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, value, size, time.time())
+                )
+                self._evict()
+                self.conn.commit()
+        except Exception as e:
+            logging.error(f"写入OCR缓存失败: {str(e)}")
+
+    def _evict(self):
+        """超出容量时淘汰最久未使用的条目，调用方需持有锁"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        rows = self.conn.execute("SELECT key, size FROM ocr_cache ORDER BY last_access ASC").fetchall()
+
+        expired = []
+        for key, size in rows:
+            if total <= target:
+                break
+            expired.append((key,))
+            total -= size
+
+        self.conn.executemany("DELETE FROM ocr_cache WHERE key = ?", expired)
+
+    def stats(self):
+        """返回缓存条目数和占用字节数"""
+        if not self.available:
+            return {"entries": 0, "bytes": 0}
+
+        with self._lock:
+            entries, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()
+        return {"entries": entries, "bytes": total}
+
+    def clear(self):
+        """清空缓存"""
+        if not self.available:
+            return
+
+        with self._lock:
+            self.conn.execute("DELETE FROM ocr_cache")
+            self.conn.commit()
+
+    def close(self):
+        """关闭缓存文件"""
+        if self.conn is not None:
+            with self._lock:
+                self.conn.close()
+                self.conn = None
+            self.available = False
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# 工作进程内的OCR服务实例，每个进程只在初始化时加载一次模型
+_worker_service = None
+
+def _init_worker(service_options):
+    """工作进程初始化函数，加载并预热OCR模型
+
+    Args:
+        service_options: 创建OCR服务的参数
+    """
+    global _worker_service
+
+    # 每个进程只使用一个计算线程，避免多个进程之间争抢CPU
+    os.environ["OMP_NUM_THREADS"] = "1"
+    os.environ["MKL_NUM_THREADS"] = "1"
+
+    import cv2
+    cv2.setNumThreads(1)
+
+    from src.services.ocr_service import OCRService
+    _worker_service = OCRService(**service_options)
+    _worker_service.warm_up()
+
+def _recognize_in_worker(images):
+    """在工作进程中批量识别图片
+
+    Args:
+        images: 图片路径或图像数组的列表
+
+    Returns:
+        list: 识别结果列表，元素为OCRResult或OCRError
+    """
+    return _worker_service.recognize_batch(images)
+
+class OCRProcessPool:
+    """多进程OCR引擎，每个工作进程持有独立的OCR模型"""
+
+    def __init__(self, workers=None, service_options=None):
+        """初始化进程池
+
+        Args:
+            workers: 工作进程数量，默认为CPU核心数
+            service_options: 工作进程中创建OCR服务的参数
+        """
+        self.workers = max(1, workers or os.cpu_count() or 1)
+
+        # 使用spawn方式创建进程，保证在Windows和Linux下行为一致
+        context = multiprocessing.get_context("spawn")
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(service_options or {},)
+        )
+
+    def recognize_iter(self, images, batch_size=1, progress_callback=None):
+        """并行识别多张图片，按输入顺序逐张返回结果
+
+        Args:
+            images: 图片路径或图像数组的列表
+            batch_size: 每个任务包含的图片数量
+            progress_callback: 进度回调函数，参数为(已完成数量, 总数量)
+
+        Yields:
+            OCRResult: 识别结果，识别失败的图片为OCRError
+        """
+        batch_size = max(1, batch_size)
+        batches = [images[i:i + batch_size] for i in range(0, len(images), batch_size)]
+
+        # 一次性提交所有任务，各进程并行处理
+        futures = [self.executor.submit(_recognize_in_worker, batch) for batch in batches]
+
+        total = len(images)
+        done = 0
+        try:
+            for future in futures:
+                for result in future.result():
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, total)
+                    yield result
+        finally:
+            # 调用方提前停止迭代时，取消尚未开始的任务
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self):
+        """关闭进程池"""
+        try:
+            self.executor.shutdown(wait=False)
+        except Exception as e:
+            logging.error(f"关闭OCR进程池失败: {str(e)}")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import cv2
+import numpy as np
+
+class OCRError(Exception):
+    """OCR识别失败时使用的异常
+
+    单张识别时直接抛出；批量识别时作为对应图片的结果返回，不影响其他图片。
+    """
+    pass
+
+class OCRResult:
+    """一张图片的OCR识别结果
+
+    各文本行按阅读顺序排列，文本框和置信度保存在NumPy数组中，
+    后续的版面还原、低置信度过滤和预览高亮等都可以直接使用，无需重新识别。
+    """
+
+    __slots__ = ("texts", "boxes", "scores", "image_size", "page_quad", "stats")
+
+    def __init__(self, texts=None, boxes=None, scores=None, image_size=None, page_quad=None, stats=None):
+        """初始化
+
+        Args:
+            texts: 各文本行的文字
+            boxes: 各文本行的文本框，形状为[N, 4, 2]，顶点顺序为左上、右上、右下、左下；
+                识别前裁剪了书页时为校正后书页上的坐标，否则为原图坐标
+            scores: 各文本行的置信度，形状为[N]
+            image_size: 文本框所在图像的尺寸(宽, 高)，裁剪了书页时为校正后书页的尺寸
+            page_quad: 裁剪的书页在原图中的四个角点，形状为[4, 2]；未裁剪时为None
+            stats: 识别统计，包括识别使用的图像尺寸ocr_size、文本行高度text_height（像素）、
+                分块检测的块数tiles、识别用时elapsed_ms（毫秒），以及跳过方向分类的行数cls_skipped
+                和估计节省的时间cls_saved_ms（毫秒），文字方向沿用自之前页面时cls_session为True；未知时为None
+        """
+        self.texts = list(texts or [])
+        self.boxes = np.asarray(boxes if boxes is not None else np.zeros((0, 4, 2)), dtype=np.float32).reshape(-1, 4, 2)
+        self.scores = np.asarray(scores if scores is not None else [], dtype=np.float32).reshape(-1)
+        self.image_size = tuple(image_size) if image_size is not None else None
+        self.page_quad = np.asarray(page_quad, dtype=np.float32).reshape(4, 2) if page_quad is not None else None
+        self.stats = dict(stats) if stats is not None else None
+
+    @property
+    def text(self):
+        """按行合并的文字"""
+        return "\n".join(self.texts)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        """逐行返回(文字, 文本框, 置信度)"""
+        return zip(self.texts, self.boxes, self.scores)
+
+    @property
+    def mean_score(self):
+        """各文本行的平均置信度，没有文本行时为None"""
+        return float(self.scores.mean()) if len(self.scores) else None
+
+    def summary(self):
+        """识别分辨率、文字高度、平均置信度和用时的简要说明，用于逐页报告"""
+        parts = []
+        stats = self.stats or {}
+        if stats.get("ocr_size"):
+            parts.append(f"{stats['ocr_size'][0]}x{stats['ocr_size'][1]}")
+        if stats.get("text_height") is not None:
+            parts.append(f"字高 {stats['text_height']:.0f}px")
+        if stats.get("tiles", 1) > 1:
+            parts.append(f"分块 {stats['tiles']}")
+        if self.mean_score is not None:
+            parts.append(f"置信度 {self.mean_score:.2f}")
+        if stats.get("elapsed_ms") is not None:
+            parts.append(f"用时 {stats['elapsed_ms']:.0f}ms")
+        if stats.get("cls_saved_ms"):
+            parts.append(f"跳过方向分类节省 {stats['cls_saved_ms']:.0f}ms")
+        return "，".join(parts)
+
+    def __repr__(self):
+        return f"OCRResult(lines={len(self.texts)}, image_size={self.image_size})"
+
+    def select(self, mask):
+        """按条件选择文本行
+
+        Args:
+            mask: 布尔数组或文本行索引
+
+        Returns:
+            OCRResult: 只包含选中文本行的结果
+        """
+        indices = np.arange(len(self.texts))[mask]
+        return OCRResult(
+            [self.texts[i] for i in indices],
+            self.boxes[indices],
+            self.scores[indices],
+            self.image_size,
+            self.page_quad,
+            self.stats
+        )
+
+    def image_boxes(self):
+        """返回原图坐标的文本框
+
+        Returns:
+            numpy.ndarray: 形状为[N, 4, 2]的文本框；未裁剪书页时即为boxes
+        """
+        if self.page_quad is None or self.image_size is None or len(self.boxes) == 0:
+            return self.boxes
+
+        # 校正后的书页矩形到原图书页四边形的透视变换
+        width, height = self.image_size
+        page = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+        matrix = cv2.getPerspectiveTransform(page, self.page_quad)
+        return cv2.perspectiveTransform(self.boxes.reshape(-1, 1, 2), matrix).reshape(-1, 4, 2)
+
+    def to_dict(self):
+        """转换为可以JSON序列化的字典"""
+        # 先转换为float64再取整，避免float32转换为Python浮点数时出现多余的位数
+        boxes = np.round(self.boxes.astype(np.float64), 1).tolist()
+        scores = np.round(self.scores.astype(np.float64), 4).tolist()
+        return {
+            "lines": [
+                {"text": text, "box": box, "score": score}
+                for text, box, score in zip(self.texts, boxes, scores)
+            ],
+            "image_size": list(self.image_size) if self.image_size is not None else None,
+            "page_quad": np.round(self.page_quad.astype(np.float64), 1).tolist() if self.page_quad is not None else None,
+            "stats": self.stats
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """从to_dict生成的字典创建结果"""
+        lines = data.get("lines", [])
+        return cls(
+            [line["text"] for line in lines],
+            [line["box"] for line in lines] if lines else None,
+            [line["score"] for line in lines],
+            data.get("image_size"),
+            data.get("page_quad"),
+            data.get("stats")
+        )
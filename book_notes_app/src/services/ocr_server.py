@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""OCR HTTP服务
+
+多个拍摄终端共享一台OCR服务器，只需在服务器上加载一次模型。
+并发到达的请求合并为一批送入模型，分摊每次模型调用的开销；
+等待队列有上限，队列已满时立即返回503，由客户端稍后重试。
+
+接口:
+    POST /ocr     上传图片（multipart/form-data 的 image 字段，或直接以图片作为请求体），返回JSON
+    GET  /health  服务状态
+    GET  /stats   请求数量、批量大小和延迟统计
+"""
+
+import json
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+
+from src.services.ocr_result import OCRError
+
+# 默认监听地址和端口
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8866
+
+# 每批最多合并的请求数量
+DEFAULT_MAX_BATCH_SIZE = 8
+
+# 收到第一个请求后等待更多请求加入同一批的最长时间（毫秒）
+DEFAULT_MAX_WAIT_MS = 20
+
+# 等待识别的请求数量上限，超出时拒绝新请求
+DEFAULT_MAX_QUEUE = 64
+
+# 上传图片的大小上限（字节）
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+
+# 单个请求等待识别结果的最长时间（秒）
+REQUEST_TIMEOUT = 120
+
+# 延迟统计保留的最近请求数量
+LATENCY_WINDOW = 1000
+
+class QueueFullError(Exception):
+    """等待队列已满时抛出的异常"""
+    pass
+
+class OCRBatcher:
+    """把并发到达的识别请求合并为批量，在单独的线程中依次调用OCR服务"""
+
+    def __init__(self, ocr_service, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, max_queue=DEFAULT_MAX_QUEUE):
+        """初始化
+
+        Args:
+            ocr_service: OCR服务
+            max_batch_size: 每批最多合并的请求数量
+            max_wait_ms: 等待更多请求加入同一批的最长时间（毫秒）
+            max_queue: 等待识别的请求数量上限
+        """
+        self.ocr_service = ocr_service
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self.queue = queue.Queue(maxsize=max(1, max_queue))
+
+        # 统计信息
+        self._stats_lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.queue_waits = deque(maxlen=LATENCY_WINDOW)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="ocr-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image):
+        """提交识别请求
+
+        Args:
+            image: BGR格式的图像数组
+
+        Returns:
+            Future: 结果为OCRResult.to_dict()格式的字典，识别失败时为{"error": 错误信息}，
+                另外附带queue_ms、inference_ms和batch_size
+
+        Raises:
+            QueueFullError: 等待队列已满
+        """
+        future = Future()
+        try:
+            self.queue.put_nowait((image, future, time.perf_counter()))
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            raise QueueFullError("OCR请求队列已满")
+        return future
+
+    def _run(self):
+        """批量识别线程"""
+        while self._running:
+            try:
+                first = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            # 在等待时间内尽量收集更多请求
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining <= 0:
+                        batch.append(self.queue.get_nowait())
+                    else:
+                        batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._process(batch)
+
+    def _process(self, batch):
+        """识别一批请求并设置各请求的结果"""
+        start = time.perf_counter()
+        try:
+            results = [
+                {"error": str(result)} if isinstance(result, OCRError) else result.to_dict()
+                for result in self.ocr_service.recognize_batch([image for image, _, _ in batch])
+            ]
+        except Exception as e:
+            logging.error(f"批量识别失败: {str(e)}")
+            results = [{"error": f"OCR识别失败: {str(e)}"} for _ in batch]
+        end = time.perf_counter()
+
+        with self._stats_lock:
+            self.batches += 1
+            self.batched_requests += len(batch)
+            for (_, _, submitted), result in zip(batch, results):
+                self.requests += 1
+                if "error" in result:
+                    self.failed += 1
+                self.queue_waits.append(start - submitted)
+                self.latencies.append(end - submitted)
+
+        for (_, future, submitted), result in zip(batch, results):
+            result["queue_ms"] = round((start - submitted) * 1000, 1)
+            result["inference_ms"] = round((end - start) * 1000, 1)
+            result["batch_size"] = len(batch)
+            future.set_result(result)
+
+    def stats(self):
+        """返回统计信息"""
+        with self._stats_lock:
+            latencies = np.array(self.latencies, dtype=np.float64) * 1000
+            queue_waits = np.array(self.queue_waits, dtype=np.float64) * 1000
+            return {
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "requests": self.requests,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "queued": self.queue.qsize(),
+                "max_queue": self.queue.maxsize,
+                "batches": self.batches,
+                "average_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else 0,
+                "latency_ms": _percentiles(latencies),
+                "queue_wait_ms": _percentiles(queue_waits)
+            }
+
+    def close(self):
+        """停止批量识别线程"""
+        self._running = False
+        self._thread.join(timeout=2)
+
+def _percentiles(values):
+    """计算平均值和分位数"""
+    if len(values) == 0:
+        return {"mean": 0, "p50": 0, "p95": 0, "p99": 0, "max": 0}
+
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "mean": round(float(values.mean()), 1),
+        "p50": round(float(p50), 1),
+        "p95": round(float(p95), 1),
+        "p99": round(float(p99), 1),
+        "max": round(float(values.max()), 1)
+    }
+
+class OCRRequestHandler(BaseHTTPRequestHandler):
+    """OCR服务的HTTP请求处理"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/health":
+            service = self.server.ocr_service
+            self._send_json(200, {
+                "status": "ok" if service.is_ready() else "loading",
+                "config": service.config(),
+                "load_seconds": service.load_seconds,
+                "warmup_seconds": service.warmup_seconds
+            })
+        elif self.path == "/stats":
+            self._send_json(200, self.server.batcher.stats())
+        else:
+            self._send_json(404, {"error": "接口不存在"})
+
+    def do_POST(self):
+        if self.path != "/ocr":
+            self._send_json(404, {"error": "接口不存在"})
+            return
+
+        start = time.perf_counter()
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            self._send_json(400, {"error": "缺少图片"})
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self._send_json(413, {"error": "图片过大"})
+            self.close_connection = True
+            return
+
+        body = self.rfile.read(length)
+        try:
+            image = self._decode_image(body)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            future = self.server.batcher.submit(image)
+        except QueueFullError as e:
+            self._send_json(503, {"error": str(e)}, {"Retry-After": "1"})
+            return
+
+        try:
+            result = future.result(timeout=REQUEST_TIMEOUT)
+        except Exception as e:
+            self._send_json(504, {"error": f"识别超时: {str(e)}"})
+            return
+
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        self._send_json(500 if "error" in result else 200, result)
+
+    def _decode_image(self, body):
+        """从请求体中解码图片
+
+        Returns:
+            numpy.ndarray: BGR格式的图像
+        """
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+            )
+            data = None
+            for part in message.iter_parts():
+                if part.get_param("name", header="content-disposition") == "image":
+                    data = part.get_payload(decode=True)
+                    break
+            if data is None:
+                raise ValueError("缺少image字段")
+        else:
+            data = body
+
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("无法解码图片")
+        return image
+
+    def _send_json(self, status, data, headers=None):
+        """发送JSON响应"""
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """请求日志写入logging，不直接输出到标准错误"""
+        logging.info(f"{self.address_string()} {format % args}")
+
+class OCRServer(ThreadingHTTPServer):
+    """OCR HTTP服务器，每个连接在单独的线程中处理，识别由批量识别线程统一执行"""
+
+    daemon_threads = True
+
+    def __init__(self, ocr_service, host=DEFAULT_HOST, port=DEFAULT_PORT, **batcher_options):
+        """初始化
+
+        Args:
+            ocr_service: OCR服务
+            host: 监听地址
+            port: 监听端口
+            batcher_options: 传给OCRBatcher的批量参数
+        """
+        super().__init__((host, port), OCRRequestHandler)
+        self.ocr_service = ocr_service
+        self.batcher = OCRBatcher(ocr_service, **batcher_options)
+
+    def server_close(self):
+        """关闭服务器和批量识别线程"""
+        super().server_close()
+        self.batcher.close()
@@ -2,84 +2,852 @@
 # -*- coding: utf-8 -*-
 
 import os
-import sys
+import json
 import logging
-from paddleocr import PaddleOCR
+import time
+import threading
+import cv2
+import numpy as np
+
+from src.services.ocr_cache import OCRCache
+from src.services.ocr_backends import create_backend, default_engine, OCR_LANG, USE_ANGLE_CLS
+from src.services.orientation import OrientationEstimator
+from src.services.ocr_result import OCRResult, OCRError
+from src.utils.image_utils import read_image, read_image_size, resize_to_fit
+from src.utils.page_detection import detect_page, warp_page
+from src.utils.tiling import split_tiles, merge_tile_boxes
+
+# 缓存格式版本，识别流程或结果格式变化时递增，使旧缓存失效
+CACHE_VERSION = 5
+
+# 批量识别时累积的文本行数量上限，超过后立即执行一次分类和识别，避免占用过多内存
+MAX_PENDING_CROPS = 512
+
+# 自适应分辨率的目标文本行高度（像素），为检测框的高度，包含检测模型在文字周围外扩的边距
+# 选择使文本行高度不低于此值的最小分辨率，文字小的页面保留更多像素，文字大或稀疏的页面缩小后检测更快
+TARGET_TEXT_HEIGHT = 32
+
+# 估计文字高度时，首次检测的图像缩小到的最大边长
+PROBE_MAX_SIDE = 960
+
+# 自适应缩放后图像的最小边长，避免大字标题页被缩得过小
+MIN_OCR_SIDE = 480
+
+# 所选比例与首次检测的比例相差不超过此比例时，直接使用首次检测的结果
+SCALE_TOLERANCE = 0.15
+
+# 分块检测的块边长（像素），与检测模型内部缩小输入的最大边长一致，块内的文字不会再被缩小
+TILE_SIZE = 960
+
+# 相邻块的重叠宽度（像素），应大于最高的文本行，使跨越接缝的文本行至少在一个块中完整出现
+TILE_OVERLAP = 128
+
+# 图像最长边超过块边长的此倍数时才分块，略大于块边长的图像由检测模型缩小的损失很小
+TILE_THRESHOLD = 1.5
+
+# 读取图片时解码的最大像素数，超过时按1/2、1/4或1/8的尺寸解码，避免超大扫描件占用过多内存
+MAX_DECODE_PIXELS = 40000000
+
+# 预热使用的合成图像尺寸(宽, 高)，与裁剪后的书页相近，以及图像中的文本行数量
+WARMUP_IMAGE_SIZE = (720, 960)
+WARMUP_LINES = 12
+
+# 未识别到文字时界面上显示的提示信息
+NO_TEXT_MESSAGE = "未能识别到任何文字，请尝试调整图像或使用其他图像。"
 
 class OCRService:
     """OCR服务，用于识别图片中的文字"""
-    
-    def __init__(self):
-        """初始化OCR服务"""
-        try:
-            # 初始化PaddleOCR
-            self.ocr = PaddleOCR(
-                use_angle_cls=True,  # 使用方向分类器
-                lang="ch",           # 中文模型
-                use_gpu=False,       # 不使用GPU
-                show_log=False       # 不显示日志
-            )
-            self.initialized = True
-        except Exception as e:
-            logging.error(f"初始化OCR服务失败: {str(e)}")
-            self.initialized = False
-    
-    def recognize(self, image_path):
+
+    def __init__(self, max_width=None, max_height=None, cache=None, crop_page=True,
+                 target_text_height=TARGET_TEXT_HEIGHT, tile_size=TILE_SIZE, engine=None,
+                 estimate_orientation=True, session_orientation=True):
+        """初始化OCR服务
+
+        Args:
+            max_width: 识别前图像的最大宽度，超过时按比例缩小，为None时不限制
+            max_height: 识别前图像的最大高度，超过时按比例缩小，为None时不限制
+            cache: OCR结果缓存，为None时不使用缓存
+            crop_page: 识别前是否检测书页区域，透视校正并裁掉桌面等背景
+            target_text_height: 自适应分辨率的目标文本行高度（像素），为None或0时只按尺寸上限缩小
+            tile_size: 分块检测的块边长（像素），为None或0时整幅图像一次检测
+            engine: OCR引擎名称，为None时使用环境变量指定的引擎或默认引擎
+            estimate_orientation: 是否按页估计文字方向，方向明确时跳过逐行的方向分类
+            session_orientation: 是否在连续的页面之间沿用文字方向，识别来自不同终端的图片时应关闭
+
+        Raises:
+            ValueError: 未知的引擎名称，或块边长不大于相邻块的重叠宽度
+        """
+        if tile_size and tile_size <= TILE_OVERLAP:
+            raise ValueError(f"分块检测的块边长必须为0或大于{TILE_OVERLAP}像素: {tile_size}")
+
+        # 识别前缩小图像的尺寸上限
+        self.max_width = max_width
+        self.max_height = max_height
+
+        # 识别前裁剪书页，背景不再参与文字检测，书页在尺寸上限内也能保留更多像素
+        self.crop_page = crop_page
+
+        # 根据文字高度选择识别的分辨率，尺寸上限仍然有效
+        self.target_text_height = target_text_height
+
+        # 高分辨率图像分块检测，检测的内存占用与图像大小无关
+        self.tile_size = tile_size
+
+        # 按页估计文字方向，开启session_orientation时连续页面的方向在整个会话中沿用
+        self.estimate_orientation = estimate_orientation
+        self.session_orientation = session_orientation
+        self.orientation = OrientationEstimator(carry_over=session_orientation)
+
+        # OCR结果缓存
+        self.cache = cache
+
+        # OCR引擎，模型在首次识别或调用load()时加载，避免阻塞程序启动
+        self.engine = engine or default_engine()
+        self.backend = create_backend(self.engine)
+        self.initialized = False
+        self.loaded = False
+        self.load_seconds = None
+        self._load_lock = threading.Lock()
+
+        # 预热用时，尚未预热时为None
+        self.warmup_seconds = None
+
+        # 多进程OCR引擎，首次并行识别时创建
+        self.pool = None
+
+        # 引擎的预测器不是线程安全的，同一时间只允许一个线程调用模型
+        self._lock = threading.RLock()
+
+    def load(self):
+        """加载OCR模型，已加载时直接返回
+
+        多个线程同时调用时只加载一次，其余线程等待加载完成。
+
+        Returns:
+            bool: 模型是否加载成功
+        """
+        with self._load_lock:
+            if self.loaded:
+                return self.initialized
+
+            start = time.perf_counter()
+            try:
+                self.backend.load()
+                self.initialized = True
+            except Exception as e:
+                logging.error(f"初始化OCR服务失败: {str(e)}")
+                self.initialized = False
+
+            self.load_seconds = time.perf_counter() - start
+            self.loaded = True
+            return self.initialized
+
+    def warm_up(self):
+        """加载模型后用合成图像依次运行检测、方向分类和识别
+
+        模型在首次推理时才创建计算图、分配缓冲区，预热后首次识别真实页面即可达到稳定的速度。
+        已预热时直接返回。
+
+        Returns:
+            bool: 是否预热成功
+        """
+        if not self.load():
+            return False
+
+        with self._lock:
+            if self.warmup_seconds is not None:
+                return True
+
+            start = time.perf_counter()
+            try:
+                # 直接调用引擎，预热不计入缓存和文字方向估计
+                img = _synthetic_page()
+                crops = [self._crop_text_region(img, box) for box in self._detect_boxes(img)]
+                if not crops:
+                    crops = [img[:48]]
+                if self.backend.use_angle_cls:
+                    crops, _ = self.backend.classify(crops)
+                self.backend.recognize(crops)
+            except Exception as e:
+                logging.error(f"OCR模型预热失败: {str(e)}")
+                return False
+
+            self.warmup_seconds = time.perf_counter() - start
+            return True
+
+    def start_loading(self):
+        """在后台线程中加载OCR模型"""
+        thread = threading.Thread(target=self.load, name="ocr-model-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self):
+        """模型是否已加载成功"""
+        return self.loaded and self.initialized
+
+    def recognize(self, image):
         """识别图片中的文字
-        
+
         Args:
-            image_path: 图片路径
-            
+            image: 图片路径，或BGR格式的图像数组
+
         Returns:
-            str: 识别的文字
+            OCRResult: 识别结果
+
+        Raises:
+            OCRError: 识别失败
+            FileNotFoundError: 图片文件不存在
+            RuntimeError: OCR模型未能加载
+        """
+        result = self.recognize_batch([image])[0]
+        if isinstance(result, OCRError):
+            raise result
+        return result
+
+    def recognize_batch(self, images):
+        """批量识别多张图片中的文字
+
+        每张图片单独进行文字检测，检测出的文本行在多张图片之间合并，
+        再按批量送入方向分类器和识别模型，从而分摊每次模型调用的开销。
+        已缓存的图片直接返回缓存的结果。
+
+        Args:
+            images: 图片路径或BGR格式图像数组的列表
+
+        Returns:
+            list: 与输入顺序一致的结果列表，元素为OCRResult，识别失败的图片为OCRError
+
+        Raises:
+            FileNotFoundError: 图片文件不存在
+            RuntimeError: OCR模型未能加载
+        """
+        images = self._check_images(images)
+        keys, results = self._lookup_cache(images)
+
+        # 只识别未命中缓存的图片
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            self._ensure_loaded()
+            with self._lock:
+                recognized = self._run_batch([images[i] for i in missing])
+            for i, result in zip(missing, recognized):
+                results[i] = result
+                self._store_cache(keys[i], result)
+
+        return results
+
+    def recognize_parallel(self, images, workers=None, batch_size=1, progress_callback=None):
+        """使用多个进程并行识别图片，按输入顺序逐张返回结果
+
+        Args:
+            images: 图片路径或BGR格式图像数组的列表
+            workers: 工作进程数量，默认为CPU核心数；为1时在当前进程中识别
+            batch_size: 每次批量识别的图片数量
+            progress_callback: 进度回调函数，参数为(已完成数量, 总数量)
+
+        Yields:
+            OCRResult: 识别结果，识别失败的图片为OCRError
+
+        Raises:
+            FileNotFoundError: 图片文件不存在
+            RuntimeError: OCR模型未能加载
+        """
+        images = self._check_images(images)
+        keys, cached = self._lookup_cache(images)
+
+        workers = max(1, workers or os.cpu_count() or 1)
+        batch_size = max(1, batch_size)
+        total = len(images)
+
+        # 未命中缓存的图片按顺序识别，与缓存结果合并后按输入顺序返回
+        missing = [images[i] for i, result in enumerate(cached) if result is None]
+        recognized = self._recognize_missing(missing, workers, batch_size)
+
+        for i, result in enumerate(cached):
+            if result is None:
+                result = next(recognized)
+                self._store_cache(keys[i], result)
+
+            if progress_callback:
+                progress_callback(i + 1, total)
+            yield result
+
+    def _recognize_missing(self, images, workers, batch_size):
+        """识别未命中缓存的图片，按输入顺序逐张返回结果
+
+        Args:
+            images: 图片路径或BGR格式图像数组的列表
+            workers: 工作进程数量
+            batch_size: 每次批量识别的图片数量
+
+        Yields:
+            OCRResult: 识别结果，识别失败的图片为OCRError
+        """
+        # 单进程时直接在当前进程中批量识别
+        if workers == 1 or len(images) <= 1:
+            self._ensure_loaded()
+            for start in range(0, len(images), batch_size):
+                with self._lock:
+                    results = self._run_batch(images[start:start + batch_size])
+                for result in results:
+                    yield result
+            return
+
+        # 进程池在多次调用之间复用，工作进程只加载一次模型
+        with self._lock:
+            if self.pool is None or self.pool.workers != workers:
+                from src.services.ocr_pool import OCRProcessPool
+                if self.pool is not None:
+                    self.pool.shutdown()
+                self.pool = OCRProcessPool(workers, self.options())
+            pool = self.pool
+
+        try:
+            for result in pool.recognize_iter(images, batch_size):
+                yield result
+        except Exception:
+            # 工作进程异常退出后进程池不可再用，下次调用时重新创建
+            self._shutdown_pool()
+            raise
+
+    def cache_result(self, image_path, result):
+        """以图片文件的内容为键缓存识别结果
+
+        拍摄的画面先在内存中识别，缓存键按画面像素计算；画面保存为文件后再以文件内容为键
+        保存一份，之后重新识别、识别所有图片或重启程序后读取该文件时都能命中缓存。
+
+        Args:
+            image_path: 图片路径，文件应已保存完成
+            result: 识别结果
+        """
+        if self.cache is None or isinstance(result, OCRError):
+            return
+        try:
+            key = OCRCache.make_key(os.path.abspath(image_path), self.config())
+        except OSError as e:
+            logging.error(f"缓存识别结果失败: {str(e)}")
+            return
+        self._store_cache(key, result)
+
+    def config(self):
+        """返回影响识别结果的配置，用于计算缓存键"""
+        return {
+            "version": CACHE_VERSION,
+            "engine": self.engine,
+            "lang": OCR_LANG,
+            "use_angle_cls": USE_ANGLE_CLS,
+            "max_width": self.max_width,
+            "max_height": self.max_height,
+            "crop_page": self.crop_page,
+            "target_text_height": self.target_text_height,
+            "tile_size": self.tile_size,
+            "estimate_orientation": self.estimate_orientation
+        }
+
+    def _check_images(self, images):
+        """检查输入图片
+
+        Args:
+            images: 图片路径或BGR格式图像数组的列表
+
+        Returns:
+            list: 图片绝对路径或图像数组的列表
+
+        Raises:
+            FileNotFoundError: 图片文件不存在
         """
-        if not self.initialized:
-            raise RuntimeError("OCR服务未正确初始化")
-        
         # 确保路径是绝对路径，并处理中文路径问题
-        abs_image_path = os.path.abspath(image_path)
-        if not os.path.exists(abs_image_path):
-            raise FileNotFoundError(f"图片文件不存在: {abs_image_path}")
-            
+        images = [image if isinstance(image, np.ndarray) else os.path.abspath(image) for image in images]
+        for image in images:
+            if not isinstance(image, np.ndarray) and not os.path.exists(image):
+                raise FileNotFoundError(f"图片文件不存在: {image}")
+        return images
+
+    def _ensure_loaded(self):
+        """确保模型已加载，正在后台加载时等待加载完成"""
+        if not self.load():
+            raise RuntimeError("OCR服务未正确初始化")
+
+    def _lookup_cache(self, images):
+        """查询缓存
+
+        Args:
+            images: 图片绝对路径或图像数组的列表
+
+        Returns:
+            tuple: (缓存键列表, 缓存结果列表)，未启用缓存或未命中时对应位置为None
+        """
+        if self.cache is None:
+            return [None] * len(images), [None] * len(images)
+
+        config = self.config()
+        keys = [OCRCache.make_key(image, config) for image in images]
+
+        results = []
+        for key in keys:
+            value = self.cache.get(key)
+            results.append(OCRResult.from_dict(json.loads(value)) if value is not None else None)
+        return keys, results
+
+    def _store_cache(self, key, result):
+        """保存识别结果到缓存
+
+        识别失败的结果不缓存；文字方向沿用自之前页面的结果取决于会话状态而不只是图像，也不缓存。
+        """
+        if self.cache is None or key is None or isinstance(result, OCRError):
+            return
+        if result.stats and result.stats.get("cls_session"):
+            return
+        self.cache.put(key, json.dumps(result.to_dict(), ensure_ascii=False))
+
+    def _run_batch(self, images):
+        """执行批量识别，调用方需持有模型锁
+
+        Args:
+            images: 图片绝对路径或BGR格式图像数组的列表
+
+        Returns:
+            list: 与输入顺序一致的结果列表，元素为OCRResult，识别失败的图片为OCRError
+        """
+        # 每张图片已识别的文本行(文字列表, 文本框列表, 置信度列表)
+        lines = [([], [], []) for _ in images]
+        errors = [None] * len(images)
+        sizes = [None] * len(images)
+        quads = [None] * len(images)
+
+        # 每张图片的识别统计：识别使用的图像尺寸、文本行高度和用时
+        stats = [None] * len(images)
+        elapsed = [0.0] * len(images)
+
+        # 等待识别的文本行图像，以及所属图片的索引和缩放前坐标的文本框
+        pending_crops = []
+        pending_owners = []
+
+        for i, image in enumerate(images):
+            start = time.perf_counter()
+            try:
+                # 读取并预处理图片
+                img, scale, quads[i] = self._prepare_image(image)
+                sizes[i] = (int(round(img.shape[1] * scale)), int(round(img.shape[0] * scale)))
+
+                # 检测文本行，按文字高度选择检测和识别使用的分辨率
+                img, ratio, dt_boxes, text_height = self._detect_text(img)
+                stats[i] = {
+                    "ocr_size": [img.shape[1], img.shape[0]],
+                    "text_height": text_height,
+                    "tiles": len(self._tiles(img))
+                }
+
+                # 裁剪文本行，文本框换算回缩放前的坐标
+                for box in dt_boxes:
+                    pending_crops.append(self._crop_text_region(img, box))
+                    pending_owners.append((i, np.asarray(box, dtype=np.float32) * (scale / ratio)))
+
+            except Exception as e:
+                error_msg = f"OCR识别失败: {str(e)}"
+                logging.error(error_msg)
+                errors[i] = OCRError(error_msg)
+                continue
+            finally:
+                elapsed[i] += time.perf_counter() - start
+
+            # 文本行累积过多时先识别一批，控制内存占用
+            if len(pending_crops) >= MAX_PENDING_CROPS:
+                self._flush_crops(pending_crops, pending_owners, lines, errors, elapsed, stats)
+                pending_crops = []
+                pending_owners = []
+
+        # 识别剩余的文本行
+        if pending_crops:
+            self._flush_crops(pending_crops, pending_owners, lines, errors, elapsed, stats)
+
+        results = []
+        for i, (texts, boxes, scores) in enumerate(lines):
+            if errors[i] is not None:
+                results.append(errors[i])
+            else:
+                stats[i]["elapsed_ms"] = round(elapsed[i] * 1000, 1)
+                results.append(OCRResult(
+                    texts, np.array(boxes) if boxes else None, scores, sizes[i], quads[i], stats[i]
+                ))
+        return results
+
+    def options(self):
+        """返回创建同样配置的OCR服务所需的参数"""
+        return {
+            "max_width": self.max_width,
+            "max_height": self.max_height,
+            "crop_page": self.crop_page,
+            "target_text_height": self.target_text_height,
+            "tile_size": self.tile_size,
+            "engine": self.engine,
+            "estimate_orientation": self.estimate_orientation,
+            "session_orientation": self.session_orientation
+        }
+
+    def close(self):
+        """关闭多进程OCR引擎和缓存"""
+        self._shutdown_pool()
+
+        if self.cache is not None:
+            self.cache.close()
+
+    def _shutdown_pool(self):
+        """关闭多进程OCR引擎"""
+        with self._lock:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+
+    def _prepare_image(self, image):
+        """读取图片并在内存中完成识别前的预处理
+
+        Args:
+            image: 图片路径，或BGR格式的图像数组
+
+        Returns:
+            tuple: (预处理后的BGR图像, 缩放前与缩放后图像的尺寸比例, 裁剪的书页在原图中的角点)，
+                未裁剪书页时角点为None
+        """
+        # 超大图片按缩小的尺寸解码，坐标仍按原图尺寸换算
+        decode_scale = 1.0
+        if isinstance(image, np.ndarray):
+            img = image
+        else:
+            size = read_image_size(image)
+            img = read_image(image, self._decode_flags(size))
+            if img is None:
+                raise RuntimeError(f"无法读取图片: {image}")
+            if size is not None:
+                decode_scale = max(size) / max(img.shape[:2])
+
+        # 灰度图和带透明通道的图像统一转换为BGR三通道
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        elif img.shape[2] == 4:
+            img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+
+        # 裁剪书页并透视校正，校正和缩小在同一步完成
+        quad = detect_page(img) if self.crop_page else None
+        if quad is not None:
+            page, page_size = warp_page(img, quad, self.max_width, self.max_height)
+            return page, page_size[0] / page.shape[1] * decode_scale, quad * decode_scale
+
+        # 缩小过大的图像，防止OCR处理过大的图像
+        resized = resize_to_fit(img, self.max_width, self.max_height)
+        return resized, img.shape[1] / resized.shape[1] * decode_scale, None
+
+    @staticmethod
+    def _decode_flags(size):
+        """选择读取图片的解码方式，超大图片按缩小的尺寸解码
+
+        Args:
+            size: 图片尺寸(宽, 高)，未知时为None
+
+        Returns:
+            int: OpenCV的解码方式
+        """
+        if size is None:
+            return cv2.IMREAD_COLOR
+
+        pixels = size[0] * size[1]
+        for factor, flags in ((1, cv2.IMREAD_COLOR), (4, cv2.IMREAD_REDUCED_COLOR_2), (16, cv2.IMREAD_REDUCED_COLOR_4)):
+            if pixels <= MAX_DECODE_PIXELS * factor:
+                return flags
+        return cv2.IMREAD_REDUCED_COLOR_8
+
+    def _tiles(self, img):
+        """检测时使用的块
+
+        Args:
+            img: BGR格式的图像
+
+        Returns:
+            list: 各块的(x, y, 宽, 高)，不分块时只有整幅图像一块
+        """
+        height, width = img.shape[:2]
+        if not self.tile_size or max(width, height) <= self.tile_size * TILE_THRESHOLD:
+            return [(0, 0, width, height)]
+        return split_tiles(width, height, self.tile_size, TILE_OVERLAP)
+
+    def _detect_boxes(self, img):
+        """检测图片中的文本行，高分辨率图像分块检测后合并
+
+        Args:
+            img: BGR格式的图像
+
+        Returns:
+            list: 按阅读顺序排列的文本框
+        """
+        tiles = self._tiles(img)
+        if len(tiles) == 1:
+            dt_boxes = self.backend.detect(img)
+            if len(dt_boxes) == 0:
+                return []
+            return self._sort_boxes(dt_boxes)
+
+        # 检测模型不是线程安全的，各块依次检测，每次只占用一块的内存
+        boxes = []
+        tile_ids = []
+        for tile_id, (x, y, width, height) in enumerate(tiles):
+            dt_boxes = self.backend.detect(img[y:y + height, x:x + width])
+            if len(dt_boxes) == 0:
+                continue
+            for box in dt_boxes:
+                boxes.append(np.asarray(box, dtype=np.float32) + np.float32([x, y]))
+                tile_ids.append(tile_id)
+
+        if not boxes:
+            return []
+        return self._sort_boxes(merge_tile_boxes(boxes, tile_ids))
+
+    def _detect_text(self, img):
+        """按文字高度选择分辨率并检测文本行
+
+        先在缩小的图像上检测一次，估计文本行高度，再选择使文本行高度不低于目标值的最小比例，
+        比例不超过预处理后的图像，即不放大；所选比例与首次检测相近时直接使用首次检测的结果。
+        所选分辨率不需要分块时，检测模型内部会把图像缩小到与首次检测相近的尺寸，
+        因此不再重新检测，按比例放大首次检测的文本框，较高的分辨率只用于裁剪和识别文本行。
+
+        Args:
+            img: 预处理后的BGR图像
+
+        Returns:
+            tuple: (检测使用的图像, 相对预处理后图像的缩放比例, 文本框列表, 文本行高度中位数)，
+                未检测到文本行时高度为None
+        """
+        if not self.target_text_height:
+            boxes = self._detect_boxes(img)
+            return img, 1.0, boxes, self._text_height(boxes)
+
+        probe = resize_to_fit(img, PROBE_MAX_SIDE, PROBE_MAX_SIDE)
+        probe_ratio = probe.shape[1] / img.shape[1]
+        boxes = self._detect_boxes(probe)
+        height = self._text_height(boxes)
+
+        if height is None:
+            # 缩小后可能检测不到很小的文字，使用预处理后的图像，需要分块时会再检测一次
+            ratio = 1.0
+        else:
+            ratio = probe_ratio * self.target_text_height / height
+            ratio = min(1.0, max(ratio, MIN_OCR_SIDE / max(img.shape[:2])))
+        if abs(ratio - probe_ratio) <= SCALE_TOLERANCE * probe_ratio:
+            return probe, probe_ratio, boxes, height
+
+        size = (max(1, int(img.shape[1] * ratio)), max(1, int(img.shape[0] * ratio)))
+        scaled = img if ratio >= 1.0 else cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+        ratio = scaled.shape[1] / img.shape[1]
+
+        # 只有分块检测时文字才会以更高的分辨率送入检测模型，需要重新检测
+        if len(self._tiles(scaled)) > 1:
+            boxes = self._detect_boxes(scaled)
+            return scaled, ratio, boxes, self._text_height(boxes)
+
+        factor = ratio / probe_ratio
+        boxes = [np.asarray(box, dtype=np.float32) * np.float32(factor) for box in boxes]
+        return scaled, ratio, boxes, None if height is None else height * factor
+
+    def _flush_crops(self, crops, owners, lines, errors, elapsed, stats):
+        """对一批文本行执行方向分类和识别，并把结果分配回所属图片
+
+        Args:
+            crops: 文本行图像列表
+            owners: 每个文本行所属图片的索引和原图坐标的文本框
+            lines: 每张图片已识别的(文字列表, 文本框列表, 置信度列表)
+            errors: 每张图片的错误，识别失败时写入OCRError
+            elapsed: 每张图片的识别用时（秒），本批用时按文本行数量分摊到各图片
+            stats: 每张图片的识别统计，写入跳过方向分类的行数和节省的时间
+        """
+        start = time.perf_counter()
         try:
-            # 执行OCR识别
-            result = self.ocr.ocr(abs_image_path, cls=True)
-            
-            # 提取文本
-            text_lines = []
-            
-            # 处理OCR结果
-            if result is None:
-                raise RuntimeError(f"OCR识别失败: object of type 'NoneType' has no len()")
-                
-            # PaddleOCR返回的结果格式可能会随版本变化
-            # 这里处理两种可能的格式
-            if isinstance(result, list):
-                if len(result) > 0:
-                    if isinstance(result[0], list):
-                        # 新版本格式: [[[x1,y1],[x2,y2],[x3,y3],[x4,y4]], (text, confidence)]
-                        for line in result[0]:
-                            if len(line) >= 2 and isinstance(line[1], tuple) and len(line[1]) >= 1:
-                                text_lines.append(line[1][0])
-                    else:
-                        # 旧版本格式: [[x1,y1,x2,y2], (text, confidence)]
-                        for line in result:
-                            if len(line) >= 2 and isinstance(line[1], tuple) and len(line[1]) >= 1:
-                                text_lines.append(line[1][0])
-            
-            # 如果没有识别到文字，返回提示信息
-            if not text_lines:
-                return "未能识别到任何文字，请尝试调整图像或使用其他图像。"
-                
-            # 合并文本行
-            return "\n".join(text_lines)
-            
+            # 方向分类，旋转180度的文本行会被纠正
+            if self.backend.use_angle_cls:
+                crops = self._classify_crops(crops, owners, stats)
+
+            # 文字识别
+            rec_res = self.backend.recognize(crops)
+
+            # 过滤低置信度的结果
+            for (owner, box), (text, score) in zip(owners, rec_res):
+                if score >= self.backend.drop_score:
+                    texts, boxes, scores = lines[owner]
+                    texts.append(text)
+                    boxes.append(box)
+                    scores.append(score)
+
         except Exception as e:
             error_msg = f"OCR识别失败: {str(e)}"
             logging.error(error_msg)
-            return f"ERROR:root:OCR识别失败: {str(e)}"
-            
+            for owner, _ in owners:
+                errors[owner] = OCRError(error_msg)
+
+        share = (time.perf_counter() - start) / len(owners)
+        for owner, _ in owners:
+            elapsed[owner] += share
+
+    def _classify_crops(self, crops, owners, stats):
+        """方向分类，方向明确的页面跳过逐行分类
+
+        每页先抽样分类几行，抽样结果一致且可信时整页采用该方向，否则分类其余所有行；
+        连续多页方向相同后，之后的页面直接沿用该方向。
+
+        Args:
+            crops: 文本行图像列表
+            owners: 每个文本行所属图片的索引和文本框
+            stats: 每张图片的识别统计
+
+        Returns:
+            list: 转正后的文本行图像列表
+        """
+        estimator = self.orientation
+        if not self.estimate_orientation:
+            start = time.perf_counter()
+            crops, _ = self.backend.classify(crops)
+            estimator.record_timing(len(crops), time.perf_counter() - start)
+            return crops
+
+        crops = list(crops)
+        pages = {}
+        for index, (owner, _) in enumerate(owners):
+            pages.setdefault(owner, []).append(index)
+
+        # 各页沿用会话方向或抽样，需要抽样的行一起分类
+        orientations = {}
+        samples = {}
+        for owner, indices in pages.items():
+            orientations[owner] = estimator.plan_page()
+            if orientations[owner] is None:
+                samples[owner] = estimator.choose_sample(crops, indices)
+        classified = self._classify_indices(crops, [i for indices in samples.values() for i in indices])
+
+        # 抽样结果不明确的页面分类其余所有行
+        remaining = []
+        for owner, sample in samples.items():
+            orientations[owner] = estimator.estimate([classified[i] for i in sample])
+            estimator.page_done(orientations[owner])
+            if orientations[owner] is None:
+                remaining.extend(i for i in pages[owner] if i not in classified)
+        classified.update(self._classify_indices(crops, remaining))
+
+        # 方向明确的页面不经过分类器，倒置的文本行直接旋转
+        for owner, indices in pages.items():
+            skipped = [i for i in indices if i not in classified]
+            if orientations[owner] == 180:
+                for i in skipped:
+                    crops[i] = cv2.rotate(crops[i], cv2.ROTATE_180)
+            if stats[owner] is not None:
+                if owner not in samples:
+                    stats[owner]["cls_session"] = True
+                stats[owner]["cls_skipped"] = stats[owner].get("cls_skipped", 0) + len(skipped)
+                stats[owner]["cls_saved_ms"] = round(
+                    stats[owner].get("cls_saved_ms", 0.0) + estimator.saved_ms(len(skipped)), 1
+                )
+        return crops
+
+    def _classify_indices(self, crops, indices):
+        """对指定的文本行执行方向分类，转正后的图像写回列表
+
+        Args:
+            crops: 文本行图像列表
+            indices: 需要分类的文本行位置
+
+        Returns:
+            dict: 文本行位置到(方向标签, 置信度)的映射
+        """
+        if not indices:
+            return {}
+        start = time.perf_counter()
+        rotated, results = self.backend.classify([crops[i] for i in indices])
+        self.orientation.record_timing(len(indices), time.perf_counter() - start)
+        for i, crop in zip(indices, rotated):
+            crops[i] = crop
+        return dict(zip(indices, results))
+
+    @staticmethod
+    def _text_height(boxes):
+        """估计文本行高度
+
+        Args:
+            boxes: 文本框列表
+
+        Returns:
+            float: 文本框短边长度的中位数，竖排文字取宽度；没有文本框时返回None
+        """
+        if len(boxes) == 0:
+            return None
+        points = np.asarray(boxes, dtype=np.float32)
+        widths = (np.linalg.norm(points[:, 0] - points[:, 1], axis=1) + np.linalg.norm(points[:, 3] - points[:, 2], axis=1)) / 2
+        heights = (np.linalg.norm(points[:, 0] - points[:, 3], axis=1) + np.linalg.norm(points[:, 1] - points[:, 2], axis=1)) / 2
+        return round(float(np.median(np.minimum(widths, heights))), 1)
+
+    @staticmethod
+    def _sort_boxes(dt_boxes):
+        """将文本框按从上到下、从左到右的顺序排序
+
+        Args:
+            dt_boxes: 检测到的文本框，形状为[N, 4, 2]
+
+        Returns:
+            list: 排序后的文本框
+        """
+        boxes = sorted(dt_boxes, key=lambda box: (box[0][1], box[0][0]))
+
+        # 同一行（纵坐标相差小于10像素）的文本框按横坐标排序
+        for i in range(len(boxes) - 1):
+            for j in range(i, -1, -1):
+                if abs(boxes[j + 1][0][1] - boxes[j][0][1]) < 10 and boxes[j + 1][0][0] < boxes[j][0][0]:
+                    boxes[j], boxes[j + 1] = boxes[j + 1], boxes[j]
+                else:
+                    break
+        return boxes
+
+    @staticmethod
+    def _crop_text_region(img, box):
+        """根据四边形文本框透视裁剪出文本行图像
+
+        Args:
+            img: BGR格式的图像
+            box: 文本框的四个顶点，顺序为左上、右上、右下、左下
+
+        Returns:
+            numpy.ndarray: 文本行图像
+        """
+        points = np.asarray(box, dtype=np.float32)
+        width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+        height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+        width = max(width, 1)
+        height = max(height, 1)
+
+        target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+        matrix = cv2.getPerspectiveTransform(points, target)
+        crop = cv2.warpPerspective(
+            img, matrix, (width, height),
+            borderMode=cv2.BORDER_REPLICATE,
+            flags=cv2.INTER_CUBIC
+        )
+
+        # 竖排文本旋转为横排
+        if height / width >= 1.5:
+            crop = np.rot90(crop)
+        return crop
+
     def __del__(self):
         """析构函数，释放资源"""
-        # PaddleOCR没有明确的释放资源方法
-        pass 
\ No newline at end of file
+        # OCR引擎没有明确的释放资源方法
+        pass
+
+def _synthetic_page():
+    """生成预热使用的合成书页，包含长短不一的多行文字
+
+    Returns:
+        numpy.ndarray: BGR格式的图像
+    """
+    width, height = WARMUP_IMAGE_SIZE
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    line_height = height // (WARMUP_LINES + 2)
+    for i in range(WARMUP_LINES):
+        # 各行长度不同，识别器按不同的宽高比分批
+        words = "reading notes warm up " * (1 + i % 3)
+        y = line_height * (i + 2)
+        cv2.putText(img, words.strip(), (40, y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2, cv2.LINE_AA)
+    return img
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Ollama服务默认地址
+DEFAULT_BASE_URL = "http://localhost:11434"
+
+# 超时设置（秒），格式为(连接超时, 读取超时)
+TAGS_TIMEOUT = (3.05, 10)
+GENERATE_TIMEOUT = (3.05, 600)    # 非流式生成需要等待全部内容生成完成
+STREAM_TIMEOUT = (3.05, 300)      # 流式生成的读取超时是两段输出之间的最长间隔
+
+# 重试设置：连接失败和网关错误时按指数退避重试，读取超时不重试，避免重复执行耗时的生成
+MAX_RETRIES = 2
+BACKOFF_FACTOR = 0.3
+RETRY_STATUS = (502, 503, 504)
+
+# 同时发往Ollama的请求数量上限
+MAX_CONCURRENT_REQUESTS = 4
+
+class OllamaClient:
+    """Ollama HTTP客户端，复用连接池并提供超时、重试和并发限制"""
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, max_concurrency=MAX_CONCURRENT_REQUESTS):
+        """初始化客户端
+
+        Args:
+            base_url: Ollama服务地址
+            max_concurrency: 同时进行的请求数量上限
+        """
+        self.base_url = base_url.rstrip("/")
+
+        # 重试策略
+        retry = Retry(
+            total=MAX_RETRIES,
+            connect=MAX_RETRIES,
+            read=0,
+            status=MAX_RETRIES,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False
+        )
+
+        # 共享的会话，保持长连接，连接池大小与并发上限一致
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_concurrency,
+            max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # 并发限制
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    def list_models(self):
+        """获取已安装的模型名称列表
+
+        Returns:
+            list: 模型名称列表
+        """
+        with self._semaphore:
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=TAGS_TIMEOUT)
+
+        if response.status_code != 200:
+            raise RuntimeError(f"Ollama服务响应异常，状态码: {response.status_code}")
+
+        models = response.json().get("models", [])
+        return [model.get("name") for model in models]
+
+    def generate(self, payload):
+        """发送非流式生成请求
+
+        Args:
+            payload: 请求数据
+
+        Returns:
+            str: 模型生成的文字
+        """
+        payload = dict(payload, stream=False)
+
+        with self._semaphore:
+            response = self.session.post(f"{self.base_url}/api/generate", json=payload, timeout=GENERATE_TIMEOUT)
+
+        if response.status_code != 200:
+            error_msg = f"API请求失败，状态码: {response.status_code}"
+            logging.error(error_msg)
+            raise RuntimeError(error_msg)
+
+        return response.json().get("response", "")
+
+    def generate_stream(self, payload, cancel_event=None):
+        """发送流式生成请求，逐段返回模型输出
+
+        Args:
+            payload: 请求数据
+            cancel_event: 取消事件，设置后停止接收并关闭连接
+
+        Yields:
+            str: 模型新生成的文字片段
+        """
+        payload = dict(payload, stream=True)
+
+        # 流式请求在整个接收过程中占用一个并发名额
+        with self._semaphore:
+            with self.session.post(
+                f"{self.base_url}/api/generate",
+                json=payload,
+                stream=True,
+                timeout=STREAM_TIMEOUT
+            ) as response:
+                if response.status_code != 200:
+                    error_msg = f"API请求失败，状态码: {response.status_code}"
+                    logging.error(error_msg)
+                    raise RuntimeError(error_msg)
+
+                for line in response.iter_lines():
+                    # 调用方取消时停止接收
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+
+                    if not line:
+                        continue
+
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise RuntimeError(f"生成笔记失败: {chunk['error']}")
+
+                    token = chunk.get("response", "")
+                    if token:
+                        yield token
+
+                    if chunk.get("done"):
+                        return
+
+    def close(self):
+        """关闭会话，释放连接"""
+        self.session.close()
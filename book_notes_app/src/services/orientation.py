@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""文字方向估计
+
+方向分类器逐行判断文本行是否倒置，但拍摄正放的书本时几乎不会出现倒置的文本行。
+这里每页只抽样分类几行，抽样结果一致且可信时整页采用同一方向，跳过其余文本行的分类；
+连续多页方向相同时，之后的页面直接沿用该方向，只定期抽样复查。
+沿用的方向来自之前的页面而不是图像本身，多个终端共享的OCR服务器应关闭沿用，每页单独估计。
+"""
+
+# 每页抽样分类的文本行数量，选择最宽的文本行，宽文本行的分类更可靠
+SAMPLE_LINES = 6
+
+# 抽样的文本行方向一致且平均置信度不低于此值时，认为整页方向明确
+MIN_CONFIDENCE = 0.9
+
+# 连续此数量的页面方向明确且相同时，之后的页面不再抽样
+SESSION_CONFIRM_PAGES = 3
+
+# 沿用会话方向时每隔此数量的页面重新抽样一次，及时发现书本被倒转
+RECHECK_INTERVAL = 10
+
+# 每行分类用时的平滑系数
+TIMING_SMOOTHING = 0.2
+
+class OrientationEstimator:
+    """按页估计文字方向，并在连续的页面之间沿用"""
+
+    def __init__(self, carry_over=True):
+        """初始化
+
+        Args:
+            carry_over: 是否在连续的页面之间沿用方向，为False时每页都抽样估计
+        """
+        self.carry_over = carry_over
+
+        # 会话方向（0或180），以及连续确认该方向的页数
+        self.orientation = None
+        self.confirmed_pages = 0
+
+        # 上次抽样之后沿用会话方向的页数
+        self.pages_since_check = 0
+
+        # 方向分类器每行的平均用时（秒），用于估计跳过分类节省的时间
+        self.seconds_per_line = None
+
+    @property
+    def trusted_orientation(self):
+        """可以直接沿用的会话方向，尚未确认时为None"""
+        if self.confirmed_pages >= SESSION_CONFIRM_PAGES:
+            return self.orientation
+        return None
+
+    def plan_page(self):
+        """决定下一页的处理方式
+
+        Returns:
+            int: 沿用的会话方向；需要抽样时返回None
+        """
+        orientation = self.trusted_orientation if self.carry_over else None
+        if orientation is None or self.pages_since_check >= RECHECK_INTERVAL:
+            self.pages_since_check = 0
+            return None
+        self.pages_since_check += 1
+        return orientation
+
+    @staticmethod
+    def choose_sample(crops, indices):
+        """选择一页中用于抽样分类的文本行
+
+        Args:
+            crops: 文本行图像列表
+            indices: 该页文本行在列表中的位置
+
+        Returns:
+            list: 抽样的文本行位置
+        """
+        return sorted(indices, key=lambda i: crops[i].shape[1], reverse=True)[:SAMPLE_LINES]
+
+    @staticmethod
+    def estimate(results):
+        """根据抽样的分类结果估计整页方向
+
+        Args:
+            results: 抽样文本行的(方向标签, 置信度)列表
+
+        Returns:
+            int: 整页方向（0或180）；结果不一致或不可信时返回None
+        """
+        if not results:
+            return None
+        labels = {str(label) for label, _ in results}
+        if len(labels) != 1:
+            return None
+        if sum(score for _, score in results) / len(results) < MIN_CONFIDENCE:
+            return None
+        return 180 if "180" in labels.pop() else 0
+
+    def page_done(self, orientation):
+        """记录抽样页面的方向估计结果
+
+        Args:
+            orientation: 整页方向，不明确时为None
+        """
+        if orientation is None:
+            self.confirmed_pages = 0
+        elif orientation == self.orientation:
+            self.confirmed_pages += 1
+        else:
+            self.orientation = orientation
+            self.confirmed_pages = 1
+
+    def record_timing(self, lines, seconds):
+        """记录一次方向分类的用时"""
+        if lines <= 0:
+            return
+        per_line = seconds / lines
+        if self.seconds_per_line is None:
+            self.seconds_per_line = per_line
+        else:
+            self.seconds_per_line += TIMING_SMOOTHING * (per_line - self.seconds_per_line)
+
+    def saved_ms(self, lines):
+        """估计跳过若干行分类节省的时间（毫秒）"""
+        if self.seconds_per_line is None:
+            return 0.0
+        return lines * self.seconds_per_line * 1000
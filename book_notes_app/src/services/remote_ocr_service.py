@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import logging
+import cv2
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+
+from src.services.ocr_result import OCRResult, OCRError
+
+# 指定远程OCR服务地址的环境变量，例如 http://192.168.1.10:8866
+OCR_SERVER_ENV = "BOOK_NOTES_OCR_SERVER"
+
+# 超时设置（秒），格式为(连接超时, 读取超时)
+HEALTH_TIMEOUT = (3.05, 10)
+OCR_TIMEOUT = (3.05, 180)
+
+# 服务器队列已满（503）或网关错误时按指数退避重试，并遵循Retry-After
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+RETRY_STATUS = (502, 503, 504)
+
+# 同时发往服务器的识别请求数量，服务器会把并发请求合并为批量
+DEFAULT_CONCURRENCY = 4
+
+# 上传内存中的画面时使用的JPEG质量
+JPEG_QUALITY = 95
+
+class RemoteOCRService:
+    """远程OCR服务客户端，接口与OCRService一致，识别由OCR服务器完成"""
+
+    def __init__(self, base_url, max_concurrency=DEFAULT_CONCURRENCY):
+        """初始化
+
+        Args:
+            base_url: OCR服务器地址
+            max_concurrency: 同时发往服务器的识别请求数量上限
+        """
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max(1, max_concurrency)
+
+        # 与本地OCR服务一致的状态，连接服务器后更新
+        self.initialized = False
+        self.loaded = False
+        self.load_seconds = None
+
+        # 服务器启动时已完成预热，预热用时从服务器状态中读取
+        self.warmup_seconds = None
+        self.server_config = None
+
+        retry = Retry(
+            total=MAX_RETRIES,
+            connect=MAX_RETRIES,
+            read=0,
+            status=MAX_RETRIES,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=frozenset(["GET", "POST"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_concurrency,
+            max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def from_env(cls):
+        """根据环境变量创建客户端，未设置时返回None"""
+        base_url = os.environ.get(OCR_SERVER_ENV)
+        return cls(base_url) if base_url else None
+
+    def load(self):
+        """检查OCR服务器是否可用
+
+        Returns:
+            bool: 服务器是否可用
+        """
+        start = time.perf_counter()
+        try:
+            response = self.session.get(f"{self.base_url}/health", timeout=HEALTH_TIMEOUT)
+            data = response.json()
+            self.initialized = response.status_code == 200 and data.get("status") == "ok"
+            self.server_config = data.get("config")
+            self.warmup_seconds = data.get("warmup_seconds")
+        except Exception as e:
+            logging.error(f"连接OCR服务器失败: {str(e)}")
+            self.initialized = False
+
+        self.load_seconds = time.perf_counter() - start
+        self.loaded = True
+        return self.initialized
+
+    def warm_up(self):
+        """模型由服务器预热，这里只检查服务器是否可用"""
+        return self.load()
+
+    def is_ready(self):
+        """服务器是否可用"""
+        return self.loaded and self.initialized
+
+    def recognize(self, image):
+        """识别图片中的文字
+
+        Args:
+            image: 图片路径，或BGR格式的图像数组
+
+        Returns:
+            OCRResult: 识别结果
+
+        Raises:
+            OCRError: 识别失败
+        """
+        result = self._post_image(image)
+        if isinstance(result, OCRError):
+            raise result
+        return result
+
+    def recognize_batch(self, images):
+        """识别多张图片中的文字，请求并发发送，由服务器合并为批量
+
+        Args:
+            images: 图片路径或BGR格式图像数组的列表
+
+        Returns:
+            list: 与输入顺序一致的结果列表，元素为OCRResult，识别失败的图片为OCRError
+        """
+        return list(self.recognize_parallel(images))
+
+    def recognize_parallel(self, images, workers=None, batch_size=1, progress_callback=None):
+        """并发识别图片，按输入顺序逐张返回结果
+
+        Args:
+            images: 图片路径或BGR格式图像数组的列表
+            workers: 并发请求数量，默认为max_concurrency
+            batch_size: 与OCRService接口保持一致，批量由服务器决定
+            progress_callback: 进度回调函数，参数为(已完成数量, 总数量)
+
+        Yields:
+            OCRResult: 识别结果，识别失败的图片为OCRError
+        """
+        workers = min(self.max_concurrency, workers or self.max_concurrency)
+        total = len(images)
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = [executor.submit(self._post_image, image) for image in images]
+        try:
+            for i, future in enumerate(futures):
+                result = future.result()
+                if progress_callback:
+                    progress_callback(i + 1, total)
+                yield result
+        finally:
+            # 调用方提前停止时取消尚未发送的请求
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def cache_result(self, image_path, result):
+        """与OCRService接口保持一致，识别结果不在客户端缓存"""
+        pass
+
+    def config(self):
+        """返回服务器的OCR配置"""
+        return self.server_config or {}
+
+    def close(self):
+        """关闭会话，释放连接"""
+        self.session.close()
+
+    def _post_image(self, image):
+        """上传一张图片并返回识别结果，识别失败时返回OCRError"""
+        try:
+            if isinstance(image, np.ndarray):
+                ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+                if not ok:
+                    raise RuntimeError("图像编码失败")
+                data = encoded.tobytes()
+                filename = "frame.jpg"
+            else:
+                with open(image, "rb") as f:
+                    data = f.read()
+                filename = os.path.basename(image)
+
+            response = self.session.post(
+                f"{self.base_url}/ocr",
+                files={"image": (filename, data, "application/octet-stream")},
+                timeout=OCR_TIMEOUT
+            )
+            data = response.json()
+            if "error" in data:
+                return OCRError(data["error"])
+            if response.status_code != 200:
+                return OCRError(f"OCR服务器响应异常，状态码: {response.status_code}")
+            return OCRResult.from_dict(data)
+
+        except Exception as e:
+            error_msg = f"OCR识别失败: {str(e)}"
+            logging.error(error_msg)
+            return OCRError(error_msg)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""自动拍摄：从预览画面中检测翻页，在画面稳定且清晰时拍摄
+
+每一帧在缩小的灰度图像上计算三个指标：
+与上一帧的差异（运动）、拉普拉斯方差（清晰度）和书页区域（只在书页内计算清晰度）。
+拍摄后等待翻页，画面变化后再等待画面稳定，稳定且清晰时拍摄下一页；
+书页内容与上次拍摄时相同时不重复拍摄。
+"""
+
+import time
+import cv2
+import numpy as np
+
+from src.utils.page_detection import find_page_quad
+
+# 分析画面时缩小到的宽度
+ANALYSIS_WIDTH = 320
+
+# 与上一帧的平均差异低于此值时视为画面静止（占亮度范围的比例）
+MOTION_STILL = 0.015
+
+# 与上一帧的平均差异超过此值时视为正在翻页
+MOTION_TURN = 0.06
+
+# 画面连续静止的帧数达到此值时视为稳定
+STABLE_FRAMES = 8
+
+# 清晰度（拉普拉斯方差）的下限，低于此值时画面模糊
+MIN_SHARPNESS = 30.0
+
+# 清晰度至少达到稳定期间最高清晰度的比例，避免在对焦过程中拍摄
+SHARPNESS_RATIO = 0.8
+
+# 书页区域与上次拍摄的画面的归一化互相关不低于此值时视为同一页，不重复拍摄
+# 书页版式相近，整个画面的差异不足以区分不同的页面，因此比较书页区域内的文字
+SAME_PAGE_SCORE = 0.85
+
+# 比较是否为同一页时允许的位置偏移，占分析画面宽度的比例
+PAGE_SHIFT_RATIO = 0.04
+
+# 计算清晰度时书页区域向内收缩的比例，排除书页边缘
+PAGE_INSET_RATIO = 0.1
+
+# 自动拍摄的状态
+STATE_SETTLING = "settling"
+STATE_WAIT_TURN = "wait_turn"
+
+# 各状态的提示信息
+STATE_MESSAGES = {
+    STATE_SETTLING: "等待画面稳定",
+    STATE_WAIT_TURN: "等待翻页"
+}
+
+class FrameMetrics:
+    """一帧画面的分析结果"""
+
+    __slots__ = ("motion", "sharpness", "page_quad", "elapsed_ms")
+
+    def __init__(self, motion, sharpness, page_quad, elapsed_ms):
+        """初始化
+
+        Args:
+            motion: 与上一帧的平均差异，占亮度范围的比例
+            sharpness: 清晰度（拉普拉斯方差）
+            page_quad: 书页四个角点在原画面中的坐标，未找到时为None
+            elapsed_ms: 分析用时（毫秒）
+        """
+        self.motion = motion
+        self.sharpness = sharpness
+        self.page_quad = page_quad
+        self.elapsed_ms = elapsed_ms
+
+class FrameAnalyzer:
+    """计算每一帧画面的运动、清晰度和书页区域
+
+    灰度图像和缩小后的图像使用预先分配的缓冲区，上一帧和当前帧的缩小图像交替使用两个缓冲区。
+    """
+
+    def __init__(self, width=ANALYSIS_WIDTH):
+        """初始化
+
+        Args:
+            width: 分析画面时缩小到的宽度
+        """
+        self.width = width
+        self._gray = None
+        self._buffers = [None, None]
+        self._current = 0
+        self._has_previous = False
+
+        # 最近一次分析时计算清晰度的区域(x0, y0, x1, y1)，为缩小后图像中的坐标
+        self.region = None
+
+    @property
+    def small(self):
+        """最近一次分析的缩小灰度图像"""
+        return self._buffers[self._current]
+
+    def analyze(self, frame):
+        """分析一帧画面
+
+        Args:
+            frame: BGR格式的画面
+
+        Returns:
+            FrameMetrics: 分析结果
+        """
+        start = time.perf_counter()
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.width / width)
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+
+        # 先转换为灰度再缩小，只需处理三分之一的数据
+        if self._gray is None or self._gray.shape != (height, width):
+            self._gray = np.empty((height, width), dtype=np.uint8)
+            self._buffers = [np.empty((size[1], size[0]), dtype=np.uint8) for _ in range(2)]
+            self._has_previous = False
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+        previous = self._buffers[self._current]
+        self._current = 1 - self._current
+        small = self._buffers[self._current]
+        cv2.resize(self._gray, size, dst=small, interpolation=cv2.INTER_AREA)
+
+        if self._has_previous:
+            motion = cv2.norm(small, previous, cv2.NORM_L1) / (small.size * 255)
+        else:
+            motion = 1.0
+        self._has_previous = True
+
+        # 只在书页区域内计算清晰度，桌面等背景不影响结果；未找到书页时使用整个画面
+        quad = find_page_quad(small)
+        if quad is not None:
+            x0, y0 = quad.min(axis=0)
+            x1, y1 = quad.max(axis=0)
+        else:
+            x0, y0, x1, y1 = 0, 0, size[0], size[1]
+        inset_x = (x1 - x0) * PAGE_INSET_RATIO
+        inset_y = (y1 - y0) * PAGE_INSET_RATIO
+        self.region = (int(x0 + inset_x), int(y0 + inset_y), int(x1 - inset_x), int(y1 - inset_y))
+        region = small[self.region[1]:self.region[3], self.region[0]:self.region[2]]
+        if region.size == 0:
+            self.region = (0, 0, size[0], size[1])
+            region = small
+        _, std = cv2.meanStdDev(cv2.Laplacian(region, cv2.CV_32F))
+        sharpness = float(std[0, 0]) ** 2
+
+        page_quad = quad / scale if quad is not None else None
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return FrameMetrics(motion, sharpness, page_quad, elapsed_ms)
+
+class AutoCapture:
+    """自动拍摄的状态机
+
+    初始状态等待画面稳定；拍摄后等待翻页，画面发生变化后再次等待画面稳定。
+    """
+
+    def __init__(self):
+        """初始化"""
+        self.analyzer = FrameAnalyzer()
+        self.state = STATE_SETTLING
+        self.metrics = None
+        self.captures = 0
+        self.skipped = 0
+        self._stable_frames = 0
+        self._peak_sharpness = 0.0
+        self._last_capture = None
+
+    @property
+    def message(self):
+        """当前状态的提示信息"""
+        return STATE_MESSAGES[self.state]
+
+    def update(self, frame):
+        """分析一帧画面并更新状态
+
+        Args:
+            frame: BGR格式的画面
+
+        Returns:
+            bool: 是否应当拍摄这一帧
+        """
+        metrics = self.analyzer.analyze(frame)
+        self.metrics = metrics
+
+        if self.state == STATE_WAIT_TURN:
+            # 翻页时画面剧烈变化；缓慢翻页时书页内容逐渐与上次拍摄时不同
+            if metrics.motion >= MOTION_TURN or not self._same_page():
+                self._start_settling()
+            return False
+
+        if metrics.motion > MOTION_STILL:
+            self._start_settling()
+            return False
+
+        self._stable_frames += 1
+        self._peak_sharpness = max(self._peak_sharpness, metrics.sharpness)
+        if self._stable_frames < STABLE_FRAMES:
+            return False
+        if metrics.sharpness < MIN_SHARPNESS or metrics.sharpness < SHARPNESS_RATIO * self._peak_sharpness:
+            return False
+
+        self.state = STATE_WAIT_TURN
+        if self._same_page():
+            # 画面稳定后仍是上次拍摄的那一页
+            self.skipped += 1
+            return False
+
+        self._last_capture = self.analyzer.small.copy()
+        self.captures += 1
+        return True
+
+    def _start_settling(self):
+        """开始等待画面稳定"""
+        self.state = STATE_SETTLING
+        self._stable_frames = 0
+        self._peak_sharpness = 0.0
+
+    def _same_page(self):
+        """当前书页是否与上次拍摄的是同一页
+
+        当前书页区域在上次拍摄画面的对应位置附近查找最佳匹配，允许少量偏移。
+        """
+        small = self.analyzer.small
+        if self._last_capture is None or self._last_capture.shape != small.shape:
+            return False
+
+        x0, y0, x1, y1 = self.analyzer.region
+        shift = max(1, int(small.shape[1] * PAGE_SHIFT_RATIO))
+        template = small[y0:y1, x0:x1]
+        search = self._last_capture[
+            max(0, y0 - shift):min(small.shape[0], y1 + shift),
+            max(0, x0 - shift):min(small.shape[1], x1 + shift)
+        ]
+        score = cv2.matchTemplate(search, template, cv2.TM_CCOEFF_NORMED).max()
+        return bool(score >= SAME_PAGE_SCORE)
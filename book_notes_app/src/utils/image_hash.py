@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""感知哈希和重复图片检测
+
+用摄像头拍书时经常重复拍摄同一页。这里为每张图片计算64位感知哈希，
+新图片先与已有图片比较哈希的汉明距离，快速排除明显不同的页面；
+书页的版式相近，哈希相近不代表内容相同，因此再用缩略图的归一化互相关确认。
+画面中能找到书页时只比较书页区域，桌面等背景相同的不同页面不会被误认为重复。
+"""
+
+import cv2
+import numpy as np
+
+from src.utils.page_detection import find_page_quad
+
+# 计算感知哈希时图像缩小到的尺寸，取离散余弦变换的低频部分
+HASH_IMAGE_SIZE = 32
+HASH_SIZE = 8
+
+# 汉明距离不超过此值的图片作为重复候选
+MAX_HASH_DISTANCE = 16
+
+# 用于确认重复的缩略图宽度
+THUMBNAIL_WIDTH = 256
+
+# 确认重复时裁去缩略图四周的比例，允许拍摄位置有少量偏移
+MATCH_MARGIN = 0.1
+
+# 缩略图归一化互相关不低于此值时视为重复
+MIN_MATCH_SCORE = 0.7
+
+# 查找书页区域时图像缩小到的宽度
+PAGE_SEARCH_WIDTH = 320
+
+# 每个字节中为1的位数，用于计算汉明距离
+POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def perceptual_hash(img):
+    """计算图像的64位感知哈希
+
+    Args:
+        img: BGR格式或灰度图像
+
+    Returns:
+        int: 感知哈希
+    """
+    gray = _to_gray(img)
+    small = cv2.resize(gray, (HASH_IMAGE_SIZE, HASH_IMAGE_SIZE), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(small.astype(np.float32))[:HASH_SIZE, :HASH_SIZE].flatten()
+
+    # 直流分量只反映整体亮度，不参与计算中位数
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view(">u8")[0])
+
+class DuplicateIndex:
+    """重复图片索引
+
+    按加入顺序保存各图片的感知哈希和缩略图，每张图片加入时与此前加入的图片比较一次，
+    比较结果保存下来，查询重复图片时不再重新比较。
+    """
+
+    def __init__(self):
+        """初始化"""
+        self.keys = []
+        self.hashes = np.zeros(0, dtype=np.uint64)
+        self.thumbnails = []
+
+        # 重复图片标识到原图片标识的映射
+        self.originals = {}
+
+        # 已比较过的缩略图结果，键为(原图片标识, 图片标识)
+        self._matches = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def add(self, key, img):
+        """加入一张图片
+
+        Args:
+            key: 图片标识，通常为图片路径
+            img: BGR格式或灰度图像
+
+        Returns:
+            与其重复的原图片标识，没有重复时返回None
+        """
+        self.remove(key)
+        gray = _page_region(_to_gray(img))
+        self.keys.append(key)
+        self.hashes = np.append(self.hashes, np.uint64(perceptual_hash(gray)))
+        height = max(1, round(gray.shape[0] * THUMBNAIL_WIDTH / gray.shape[1]))
+        self.thumbnails.append(cv2.resize(gray, (THUMBNAIL_WIDTH, height), interpolation=cv2.INTER_AREA))
+
+        original = self._find_original(len(self.keys) - 1)
+        if original is not None:
+            self.originals[key] = original
+        return original
+
+    def remove(self, key):
+        """移除一张图片，与其重复的图片将与剩余的图片重新比较"""
+        if key not in self.keys:
+            return
+        index = self.keys.index(key)
+        self.keys.pop(index)
+        self.hashes = np.delete(self.hashes, index)
+        self.thumbnails.pop(index)
+        self._matches = {pair: matched for pair, matched in self._matches.items() if key not in pair}
+
+        if key not in self.originals.values():
+            self.originals.pop(key, None)
+            return
+
+        # 移除的是原图片时，其后的图片可能改为与其他图片重复，按顺序重新查找原图片
+        for later in self.keys[index:]:
+            self.originals.pop(later, None)
+        self.originals.pop(key, None)
+        for i in range(index, len(self.keys)):
+            original = self._find_original(i)
+            if original is not None:
+                self.originals[self.keys[i]] = original
+
+    def duplicate_of(self, key):
+        """查找图片重复的原图片
+
+        原图片是此前加入的、本身不是重复图片的第一张与其重复的图片。
+
+        Args:
+            key: 图片标识
+
+        Returns:
+            原图片标识，没有重复或图片不在索引中时返回None
+        """
+        return self.originals.get(key)
+
+    def duplicates(self):
+        """查找所有重复图片
+
+        Returns:
+            dict: 重复图片标识到原图片标识的映射
+        """
+        return dict(self.originals)
+
+    def _find_original(self, index):
+        """在此前加入的图片中查找第一张与指定图片重复、本身不是重复图片的图片
+
+        只计算新哈希与已有哈希的汉明距离，距离足够近的候选再比较缩略图。
+
+        Args:
+            index: 图片在索引中的位置
+
+        Returns:
+            原图片标识，没有重复时返回None
+        """
+        key = self.keys[index]
+        distances = _hamming_distances(self.hashes[:index], self.hashes[index])
+        for j in np.flatnonzero(distances <= MAX_HASH_DISTANCE):
+            if self.keys[j] in self.originals:
+                continue
+            pair = (self.keys[j], key)
+            if pair not in self._matches:
+                self._matches[pair] = _match_score(self.thumbnails[j], self.thumbnails[index]) >= MIN_MATCH_SCORE
+            if self._matches[pair]:
+                return self.keys[j]
+        return None
+
+def _hamming_distances(hashes, value):
+    """计算一组哈希与一个哈希之间的汉明距离"""
+    xor = np.bitwise_xor(hashes.astype(np.uint64), np.uint64(value))
+    return POPCOUNT_TABLE[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+def _match_score(reference, thumbnail):
+    """缩略图的中间部分在参考缩略图中的最佳归一化互相关"""
+    height, width = thumbnail.shape
+    top = int(height * MATCH_MARGIN)
+    left = int(width * MATCH_MARGIN)
+    template = thumbnail[top:height - top, left:width - left]
+    if template.shape[0] > reference.shape[0] or template.shape[1] > reference.shape[1]:
+        return 0.0
+    return float(cv2.matchTemplate(reference, template, cv2.TM_CCOEFF_NORMED).max())
+
+def _page_region(gray):
+    """裁剪出书页所在的矩形区域，未找到书页时返回原图像"""
+    scale = min(1.0, PAGE_SEARCH_WIDTH / gray.shape[1])
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    quad = find_page_quad(small)
+    if quad is None:
+        return gray
+
+    x0, y0 = (quad.min(axis=0) / scale).astype(int)
+    x1, y1 = (quad.max(axis=0) / scale).astype(int)
+    region = gray[max(0, y0):y1, max(0, x0):x1]
+    return region if region.size else gray
+
+def _to_gray(img):
+    """转换为灰度图像"""
+    if img.ndim == 3:
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return img
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""图像处理辅助函数"""
+
+import os
+import cv2
+import numpy as np
+
+def read_image(image_path, flags=cv2.IMREAD_COLOR):
+    """读取图片，支持中文路径
+
+    Args:
+        image_path: 图片路径
+        flags: OpenCV的解码方式，例如cv2.IMREAD_REDUCED_GRAYSCALE_4按四分之一尺寸解码为灰度图像
+
+    Returns:
+        numpy.ndarray: 解码后的图像，默认为BGR格式，读取失败时返回None
+    """
+    # cv2.imread不支持中文路径，先读取字节再解码
+    data = np.fromfile(image_path, dtype=np.uint8)
+    img = cv2.imdecode(data, flags)
+    if img is not None:
+        return img
+
+    # OpenCV无法解码的格式（如GIF）使用Pillow读取
+    try:
+        from PIL import Image
+        with Image.open(image_path) as pil_img:
+            return cv2.cvtColor(np.array(pil_img.convert("RGB")), cv2.COLOR_RGB2BGR)
+    except Exception:
+        return None
+
+def read_image_size(image_path):
+    """读取图片尺寸，只解析文件头，不解码图像数据
+
+    Args:
+        image_path: 图片路径
+
+    Returns:
+        tuple: 图片尺寸(宽, 高)，无法识别时返回None
+    """
+    try:
+        from PIL import Image
+        with Image.open(image_path) as pil_img:
+            return pil_img.size
+    except Exception:
+        return None
+
+def write_image(image_path, img):
+    """保存图片，支持中文路径
+
+    先写入临时文件再重命名，其他线程读取时不会读到未写完的文件。
+
+    Args:
+        image_path: 图片路径，按扩展名确定格式
+        img: BGR格式的图像
+
+    Raises:
+        ValueError: 图像编码失败
+    """
+    extension = os.path.splitext(image_path)[1] or ".jpg"
+    ok, data = cv2.imencode(extension, img)
+    if not ok:
+        raise ValueError(f"图像编码失败: {image_path}")
+
+    temp_path = f"{image_path}.tmp"
+    data.tofile(temp_path)
+    os.replace(temp_path, image_path)
+
+def resize_to_fit(img, max_width, max_height):
+    """按比例缩小图像，使其不超过指定尺寸
+
+    Args:
+        img: BGR格式的图像
+        max_width: 最大宽度，为None时不限制
+        max_height: 最大高度，为None时不限制
+
+    Returns:
+        numpy.ndarray: 缩小后的图像，无需缩小时返回原图像
+    """
+    height, width = img.shape[:2]
+    max_width = max_width or width
+    max_height = max_height or height
+
+    # 图像已经足够小，直接返回
+    if width <= max_width and height <= max_height:
+        return img
+
+    # 计算调整比例
+    ratio = min(max_width / width, max_height / height)
+    new_width = max(1, int(width * ratio))
+    new_height = max(1, int(height * ratio))
+
+    return cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
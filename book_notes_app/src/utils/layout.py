@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""版面还原：根据OCR文本框恢复阅读顺序并合并段落
+
+文本行按检测顺序返回时，双栏页面的左右两栏会交错在一起，跨行的单词也会被连字符断开。
+这里根据文本框把文本行划分为栏，按阅读顺序排列后合并为段落：
+中日韩文字的行直接相连，拉丁文字的行以空格相连，行尾的连字符断词会被还原。
+"""
+
+import numpy as np
+
+from src.utils.text_utils import CJK_PATTERN
+
+# 宽度超过页面文字区域此比例的行视为跨栏（如标题），不参与分栏
+SPANNING_RATIO = 0.6
+
+# 两栏之间的空白至少为行高的倍数
+COLUMN_GAP_RATIO = 1.0
+
+# 宽度小于行高此倍数的短文本（如居中的页码）不参与分栏，避免填满栏间空白
+NARROW_LINE_RATIO = 3.0
+
+# 纵向中心相差小于行高的此比例时，视为同一行中的多个文本框
+SAME_ROW_RATIO = 0.5
+
+# 行间距比常规行间距大出行高的此比例时，视为新段落
+PARAGRAPH_GAP_RATIO = 0.6
+
+# 行首缩进超过行高的倍数时，视为新段落
+INDENT_RATIO = 1.0
+
+# 行尾距栏右边界超过行高的倍数时，视为段落结束
+SHORT_LINE_RATIO = 3.0
+
+def layout_paragraphs(result):
+    """按阅读顺序把OCR识别结果合并为段落
+
+    Args:
+        result: OCRResult
+
+    Returns:
+        list: 段落文字列表
+    """
+    if len(result) == 0:
+        return []
+
+    boxes = result.boxes
+    x0 = boxes[:, :, 0].min(axis=1)
+    x1 = boxes[:, :, 0].max(axis=1)
+    y0 = boxes[:, :, 1].min(axis=1)
+    y1 = boxes[:, :, 1].max(axis=1)
+    line_height = max(float(np.median(y1 - y0)), 1.0)
+
+    paragraphs = []
+    for block in _reading_order_blocks(x0, x1, y0, y1, line_height):
+        paragraphs.extend(_block_paragraphs(result.texts, block, x0, x1, y0, y1, line_height))
+    return paragraphs
+
+def layout_text(result):
+    """按阅读顺序还原OCR识别结果的文字，每个段落一行
+
+    Args:
+        result: OCRResult
+
+    Returns:
+        str: 还原后的文字
+    """
+    return "\n".join(layout_paragraphs(result))
+
+def _reading_order_blocks(x0, x1, y0, y1, line_height):
+    """把文本行划分为按阅读顺序排列的块
+
+    跨栏的行把页面分为上下多个区域，每个区域内的各栏从左到右依次排列，
+    跨栏的行单独成块，位于其上下两个区域之间。
+
+    Returns:
+        list: 每个块包含的文本行索引数组
+    """
+    indices = np.arange(len(x0))
+    widths = x1 - x0
+    spanning = widths > SPANNING_RATIO * (x1.max() - x0.min())
+
+    narrow = widths < NARROW_LINE_RATIO * line_height
+    measured = ~spanning & ~narrow
+    columns = _column_bounds(x0[measured], x1[measured], COLUMN_GAP_RATIO * line_height)
+
+    # 单栏页面的所有行作为一个块
+    if len(columns) < 2:
+        return [indices]
+
+    # 跨栏的行按纵向位置排序，作为区域的分界
+    spanning_indices = indices[spanning]
+    spanning_indices = spanning_indices[np.argsort((y0 + y1)[spanning_indices])]
+    boundaries = ((y0 + y1) / 2)[spanning_indices]
+
+    # 非跨栏的行所属的区域和栏
+    normal = indices[~spanning]
+    regions = np.searchsorted(boundaries, ((y0 + y1) / 2)[normal])
+    column_ids = np.searchsorted(columns, ((x0 + x1) / 2)[normal], side="right") - 1
+
+    blocks = []
+    for region in range(len(boundaries) + 1):
+        in_region = regions == region
+        for column in range(len(columns)):
+            block = normal[in_region & (column_ids == column)]
+            if len(block):
+                blocks.append(block)
+        if region < len(spanning_indices):
+            blocks.append(spanning_indices[region:region + 1])
+    return blocks
+
+def _column_bounds(x0, x1, min_gap):
+    """根据文本行的横向范围找出各栏的左边界
+
+    按左边界排序后累计右边界的最大值，左边界超出此前所有行的右边界加上最小间距时开始新的一栏。
+
+    Returns:
+        numpy.ndarray: 各栏左边界，从左到右排列
+    """
+    if len(x0) == 0:
+        return np.zeros(0)
+
+    order = np.argsort(x0)
+    starts = x0[order]
+    reach = np.maximum.accumulate(x1[order])
+    new_column = np.concatenate(([True], starts[1:] > reach[:-1] + min_gap))
+    return starts[new_column]
+
+def _block_paragraphs(texts, block, x0, x1, y0, y1, line_height):
+    """把一个块中的文本行合并为段落
+
+    Returns:
+        list: 段落文字列表
+    """
+    # 按纵向中心排序，中心相近的文本框合并为一行
+    centers = (y0[block] + y1[block]) / 2
+    block = block[np.argsort(centers, kind="stable")]
+    centers = (y0[block] + y1[block]) / 2
+    row_ids = np.concatenate(([0], np.cumsum(np.diff(centers) > SAME_ROW_RATIO * line_height)))
+
+    rows = []
+    for row in range(row_ids[-1] + 1):
+        members = block[row_ids == row]
+        members = members[np.argsort(x0[members], kind="stable")]
+        rows.append(members)
+
+    row_text = [_join_fragments([texts[i] for i in members]) for members in rows]
+    row_x0 = np.array([x0[members].min() for members in rows])
+    row_x1 = np.array([x1[members].max() for members in rows])
+    row_y0 = np.array([y0[members].min() for members in rows])
+    row_y1 = np.array([y1[members].max() for members in rows])
+
+    # 计算每一行之前是否分段
+    if len(rows) > 1:
+        gaps = row_y0[1:] - row_y1[:-1]
+        normal_gap = max(float(np.median(gaps)), 0.0)
+        breaks = (
+            (gaps > normal_gap + PARAGRAPH_GAP_RATIO * line_height)
+            | (row_x0[1:] - row_x0.min() > INDENT_RATIO * line_height)
+            | (row_x1.max() - row_x1[:-1] > SHORT_LINE_RATIO * line_height)
+        )
+    else:
+        breaks = np.zeros(0, dtype=bool)
+
+    paragraphs = []
+    current = row_text[0]
+    for text, new_paragraph in zip(row_text[1:], breaks):
+        if new_paragraph:
+            paragraphs.append(current)
+            current = text
+        else:
+            current = join_lines(current, text)
+    paragraphs.append(current)
+    return [paragraph for paragraph in paragraphs if paragraph]
+
+def _join_fragments(fragments):
+    """合并同一行中从左到右排列的多个文本片段"""
+    text = ""
+    for fragment in fragments:
+        text = _join(text, fragment, dehyphenate=False) if text else fragment
+    return text
+
+def join_lines(previous, following):
+    """把段落中的下一行接到上一行末尾
+
+    中日韩文字直接相连，拉丁文字以空格相连；上一行以连字符断开单词时去掉连字符。
+
+    Args:
+        previous: 上一行
+        following: 下一行
+
+    Returns:
+        str: 合并后的文字
+    """
+    return _join(previous, following, dehyphenate=True)
+
+def _join(previous, following, dehyphenate):
+    """合并两段文字"""
+    previous = previous.rstrip()
+    following = following.lstrip()
+    if not previous or not following:
+        return previous + following
+
+    last = previous[-1]
+    first = following[0]
+
+    # 单词被连字符断开：连字符前是字母，下一行以小写字母开头
+    if (dehyphenate and last in "-\u00ad\u2010" and len(previous) > 1
+            and previous[-2].isascii() and previous[-2].isalpha()
+            and first.isascii() and first.islower()):
+        return previous[:-1] + following
+
+    if CJK_PATTERN.match(last) or CJK_PATTERN.match(first):
+        return previous + following
+    return f"{previous} {following}"
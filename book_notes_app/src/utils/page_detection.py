@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""书页区域检测和透视校正
+
+拍摄的画面中除了书页还有桌面、手指等。书页通常是画面中最大的亮色四边形，
+这里在缩小的灰度图像上查找书页的四个角点，再把书页透视变换为正面的矩形。
+"""
+
+import cv2
+import numpy as np
+
+# 书页面积至少占画面的比例
+MIN_PAGE_AREA_RATIO = 0.2
+
+# 多边形近似的精度，为轮廓周长的比例
+APPROX_EPSILON_RATIO = 0.02
+
+# Canny边缘检测的阈值
+CANNY_LOW = 50
+CANNY_HIGH = 150
+
+# 查找书页时图像缩小到的宽度
+PAGE_SEARCH_WIDTH = 320
+
+# 书页几乎占满画面时不再裁剪
+MAX_CROP_AREA_RATIO = 0.9
+
+# 书页的平均亮度至少比周围高出此值，避免把书页上的插图或表格当作书页
+MIN_PAGE_CONTRAST = 10
+
+def find_page_quad(gray, min_area_ratio=MIN_PAGE_AREA_RATIO):
+    """查找书页的四个角点
+
+    Args:
+        gray: 灰度图像，通常是缩小后的画面
+        min_area_ratio: 书页面积至少占画面的比例
+
+    Returns:
+        numpy.ndarray: 形状为[4, 2]的角点坐标，顺序为左上、右上、右下、左下；未找到时返回None
+    """
+    height, width = gray.shape[:2]
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), CANNY_LOW, CANNY_HIGH)
+
+    # 连接断开的边缘，书页边缘常被手指或阴影打断
+    edges = cv2.dilate(edges, None)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = min_area_ratio * width * height
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True):
+        if cv2.contourArea(contour) < min_area:
+            break
+        approx = cv2.approxPolyDP(contour, APPROX_EPSILON_RATIO * cv2.arcLength(contour, True), True)
+        if len(approx) == 4 and cv2.isContourConvex(approx):
+            return order_corners(approx.reshape(4, 2).astype(np.float32))
+    return None
+
+def order_corners(points):
+    """把四个角点按左上、右上、右下、左下排列
+
+    Args:
+        points: 形状为[4, 2]的角点坐标
+
+    Returns:
+        numpy.ndarray: 排列后的角点坐标
+    """
+    sums = points.sum(axis=1)
+    diffs = points[:, 1] - points[:, 0]
+    return np.array([
+        points[np.argmin(sums)],
+        points[np.argmin(diffs)],
+        points[np.argmax(sums)],
+        points[np.argmax(diffs)]
+    ], dtype=np.float32)
+
+def detect_page(img):
+    """在图像中查找可以裁剪的书页区域
+
+    Args:
+        img: BGR格式的图像
+
+    Returns:
+        numpy.ndarray: 形状为[4, 2]的原图坐标角点，顺序为左上、右上、右下、左下；
+            未找到书页、书页几乎占满画面或书页不比周围明亮时返回None
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    height, width = gray.shape[:2]
+    scale = min(1.0, PAGE_SEARCH_WIDTH / width)
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+
+    quad = find_page_quad(small)
+    if quad is None:
+        return None
+
+    area = cv2.contourArea(quad)
+    if area > MAX_CROP_AREA_RATIO * small.shape[0] * small.shape[1]:
+        return None
+
+    mask = np.zeros(small.shape[:2], dtype=np.uint8)
+    cv2.fillConvexPoly(mask, quad.astype(np.int32), 255)
+    inside = cv2.mean(small, mask=mask)[0]
+    outside = cv2.mean(small, mask=cv2.bitwise_not(mask))[0]
+    if inside < outside + MIN_PAGE_CONTRAST:
+        return None
+
+    return quad / scale
+
+def warp_page(img, quad, max_width=None, max_height=None):
+    """把书页透视变换为正面的矩形
+
+    输出尺寸按书页边长计算，超过上限时按比例缩小；需要大幅缩小时先用面积插值缩小整幅图像，
+    避免透视变换的双线性插值产生锯齿。
+
+    Args:
+        img: BGR格式的图像
+        quad: 书页四个角点的原图坐标，顺序为左上、右上、右下、左下
+        max_width: 输出的最大宽度，为None时不限制
+        max_height: 输出的最大高度，为None时不限制
+
+    Returns:
+        tuple: (校正后的图像, 书页在原图分辨率下的尺寸(宽, 高))
+    """
+    quad = np.asarray(quad, dtype=np.float32)
+    width = max(np.linalg.norm(quad[0] - quad[1]), np.linalg.norm(quad[3] - quad[2]))
+    height = max(np.linalg.norm(quad[0] - quad[3]), np.linalg.norm(quad[1] - quad[2]))
+    page_size = (max(1, int(round(width))), max(1, int(round(height))))
+
+    ratio = min(1.0, (max_width or width) / width, (max_height or height) / height)
+    if ratio < 0.5:
+        # 只缩小书页的外接矩形部分
+        x0, y0 = np.floor(quad.min(axis=0)).astype(int).clip(0)
+        x1, y1 = np.ceil(quad.max(axis=0)).astype(int) + 1
+        img = img[y0:y1, x0:x1]
+        quad = quad - np.float32([x0, y0])
+        img = cv2.resize(img, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA)
+        quad = quad * ratio
+        width, height = width * ratio, height * ratio
+        ratio = 1.0
+
+    size = (max(1, int(width * ratio)), max(1, int(height * ratio)))
+    target = np.float32([[0, 0], [size[0], 0], [size[0], size[1]], [0, size[1]]])
+    matrix = cv2.getPerspectiveTransform(quad, target)
+    warped = cv2.warpPerspective(img, matrix, size, flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    return warped, page_size
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""生成笔记前精简OCR文本
+
+在CPU上运行大语言模型时，处理提示的时间随输入长度增长。这里在构建提示之前
+去掉低置信度的文本行、各页重复出现的页眉页脚和页码、相邻两页重叠拍摄的文本行。
+
+长文本由分段总结处理，默认不限制词元数量；只有调用方指定了词元预算时，
+才在超出预算时去掉置信度最低的文本行，去掉的行数会记录在日志和统计信息中。
+"""
+
+import re
+import math
+import logging
+from difflib import SequenceMatcher
+import numpy as np
+
+from src.utils.layout import layout_text
+from src.utils.text_utils import estimate_tokens, join_pages
+
+# 置信度低于此值的文本行视为噪声
+MIN_LINE_SCORE = 0.6
+
+# 页面顶部和底部此比例的区域内的文本行可能是页眉页脚
+MARGIN_RATIO = 0.1
+
+# 同一文本在至少此比例的页面的页边区域出现时，视为页眉页脚
+REPEAT_RATIO = 0.3
+
+# 页码，例如 "12"、"- 12 -"、"第12页"、"Page 12"
+PAGE_NUMBER_PATTERN = re.compile(r"^[\W_]*(第\s*\d+\s*页|page\s*\d+|\d{1,4})[\W_]*$", re.IGNORECASE)
+
+# 比较页眉页脚时忽略数字和空白，同一本书各页的页眉只有页码不同
+DIGITS_PATTERN = re.compile(r"\d+")
+SPACE_PATTERN = re.compile(r"\s+")
+
+# 比较重叠文本行时忽略空白和标点
+OVERLAP_IGNORE_PATTERN = re.compile(r"[\W_]+")
+
+# 两行文字的相似度不低于此值时视为同一行，允许OCR结果有少量差异
+OVERLAP_MATCH_RATIO = 0.8
+
+# 重叠部分至少包含的字符数，避免误删偶然相同的短行
+MIN_OVERLAP_CHARS = 20
+
+def prepare_notes_text(pages, min_score=MIN_LINE_SCORE, token_budget=None):
+    """精简OCR识别结果，生成用于生成笔记的文本
+
+    Args:
+        pages: (页码, OCRResult) 列表
+        min_score: 文本行的最低置信度
+        token_budget: 词元预算，为None时不限制
+
+    Returns:
+        tuple: (精简后的文本, 统计信息字典)
+    """
+    original = join_pages([(page, layout_text(result)) for page, result in pages])
+
+    # 词元预算包括分页标记
+    line_budget = token_budget
+    if token_budget is not None:
+        line_budget -= sum(estimate_tokens(join_pages([(page, " ")])) for page, _ in pages)
+
+    pruned, stats = prune_pages([result for _, result in pages], min_score, line_budget)
+    text = join_pages([(page, layout_text(result)) for (page, _), result in zip(pages, pruned)])
+
+    stats["original_tokens"] = estimate_tokens(original)
+    stats["tokens"] = estimate_tokens(text)
+    stats["saved_tokens"] = max(0, stats["original_tokens"] - stats["tokens"])
+
+    if stats["saved_tokens"]:
+        logging.info(
+            f"精简OCR文本: {stats['original_tokens']} -> {stats['tokens']} 词元，"
+            f"去掉低置信度 {stats['low_confidence']} 行、页眉页脚 {stats['headers_footers']} 行、"
+            f"重叠 {stats['overlap']} 行、超出预算 {stats['over_budget']} 行"
+        )
+    if stats["over_budget"]:
+        logging.warning(f"OCR文本超出词元预算 {token_budget}，去掉了置信度最低的 {stats['over_budget']} 行")
+    return text, stats
+
+def prune_pages(results, min_score=MIN_LINE_SCORE, token_budget=None):
+    """去掉低置信度的文本行、页眉页脚、页码和相邻页面的重叠部分，并按词元预算截减
+
+    Args:
+        results: 各页的OCRResult列表
+        min_score: 文本行的最低置信度
+        token_budget: 词元预算，为None时不限制
+
+    Returns:
+        tuple: (精简后的OCRResult列表, 统计信息字典)
+    """
+    stats = {"low_confidence": 0, "headers_footers": 0, "overlap": 0, "over_budget": 0}
+    if not results:
+        return [], stats
+
+    keep = [result.scores >= min_score for result in results]
+    stats["low_confidence"] = int(sum((~mask).sum() for mask in keep))
+
+    repeated = _margin_lines(results)
+    for mask, drop in zip(keep, repeated):
+        stats["headers_footers"] += int((mask & drop).sum())
+        mask &= ~drop
+
+    # 与上一页的比较使用上一页去掉重叠之前的文本行，连续多张重复的页面都能被去掉
+    overlaps = [_overlap_lines(results[i - 1], keep[i - 1], results[i], keep[i]) for i in range(1, len(results))]
+    for mask, drop in zip(keep[1:], overlaps):
+        stats["overlap"] += int((mask & drop).sum())
+        mask &= ~drop
+
+    if token_budget is not None:
+        stats["over_budget"] = _apply_budget(results, keep, token_budget)
+
+    return [result.select(mask) for result, mask in zip(results, keep)], stats
+
+def _margin_lines(results):
+    """找出各页页边区域中的页码和重复出现的页眉页脚
+
+    Returns:
+        list: 每页的布尔数组，为True的文本行应当去掉
+    """
+    in_margin = []
+    keys = []
+    for result in results:
+        if len(result) == 0:
+            in_margin.append(np.zeros(0, dtype=bool))
+            keys.append([])
+            continue
+
+        centers = result.boxes[:, :, 1].mean(axis=1)
+        if result.image_size is not None:
+            top, height = 0.0, float(result.image_size[1])
+        else:
+            top = float(result.boxes[:, :, 1].min())
+            height = max(float(result.boxes[:, :, 1].max()) - top, 1.0)
+        position = (centers - top) / height
+        in_margin.append((position < MARGIN_RATIO) | (position > 1 - MARGIN_RATIO))
+        keys.append([SPACE_PATTERN.sub("", DIGITS_PATTERN.sub("#", text)).lower() for text in result.texts])
+
+    # 统计每个页边文本出现在多少页中
+    page_counts = {}
+    for margin, page_keys in zip(in_margin, keys):
+        for key in set(key for key, flag in zip(page_keys, margin) if flag and key):
+            page_counts[key] = page_counts.get(key, 0) + 1
+    min_pages = max(2, math.ceil(REPEAT_RATIO * len(results)))
+
+    drops = []
+    for result, margin, page_keys in zip(results, in_margin, keys):
+        drop = np.array([
+            flag and (page_counts.get(key, 0) >= min_pages or bool(PAGE_NUMBER_PATTERN.match(text)))
+            for text, key, flag in zip(result.texts, page_keys, margin)
+        ], dtype=bool)
+        drops.append(drop)
+    return drops
+
+def _overlap_lines(previous, previous_keep, result, keep):
+    """找出本页开头与上一页末尾重叠的文本行
+
+    同一页分上下两次拍摄时，后一张的开头几行就是前一张的最后几行；
+    整页重复拍摄时，本页的所有文本行都与上一页末尾相同。
+
+    Args:
+        previous: 上一页的OCRResult
+        previous_keep: 上一页保留的文本行
+        result: 本页的OCRResult
+        keep: 本页保留的文本行
+
+    Returns:
+        numpy.ndarray: 本页的布尔数组，为True的文本行应当去掉
+    """
+    drop = np.zeros(len(result), dtype=bool)
+    tail = [_overlap_key(previous.texts[i]) for i in np.flatnonzero(previous_keep)]
+    lines = np.flatnonzero(keep)
+    head = [_overlap_key(result.texts[i]) for i in lines]
+
+    # 从最长的可能重叠开始尝试，上一页的最后k行依次与本页的前k行相同
+    for count in range(min(len(tail), len(head)), 0, -1):
+        pairs = list(zip(tail[-count:], head[:count]))
+        if sum(len(line) for _, line in pairs) < MIN_OVERLAP_CHARS:
+            break
+        if all(_same_line(a, b) for a, b in pairs):
+            drop[lines[:count]] = True
+            break
+    return drop
+
+def _overlap_key(text):
+    """比较重叠文本行时使用的文字"""
+    return OVERLAP_IGNORE_PATTERN.sub("", text).lower()
+
+def _same_line(a, b):
+    """两行文字是否相同，允许少量识别差异"""
+    if a == b:
+        return True
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    return matcher.quick_ratio() >= OVERLAP_MATCH_RATIO and matcher.ratio() >= OVERLAP_MATCH_RATIO
+
+def _apply_budget(results, keep, token_budget):
+    """超出词元预算时，去掉置信度最低的文本行
+
+    Args:
+        results: 各页的OCRResult列表
+        keep: 每页保留的文本行，原地修改
+        token_budget: 词元预算
+
+    Returns:
+        int: 去掉的文本行数量
+    """
+    pages = []
+    lines = []
+    for page, (result, mask) in enumerate(zip(results, keep)):
+        for line in np.flatnonzero(mask):
+            pages.append(page)
+            lines.append(line)
+    if not lines:
+        return 0
+
+    tokens = np.array([estimate_tokens(results[page].texts[line]) for page, line in zip(pages, lines)])
+    excess = int(tokens.sum()) - token_budget
+    if excess <= 0:
+        return 0
+
+    scores = np.array([results[page].scores[line] for page, line in zip(pages, lines)])
+    order = np.argsort(scores, kind="stable")
+    count = int(np.searchsorted(np.cumsum(tokens[order]), excess)) + 1
+
+    for i in order[:count]:
+        keep[pages[i]][lines[i]] = False
+    return count
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""启动耗时分析
+
+设置环境变量 BOOK_NOTES_PROFILE（或为启动脚本加上 --profile-startup 参数）后，
+记录启动过程中各阶段和各模块导入的耗时，打印报告并写入JSON文件。
+启动脚本和它启动的子进程各自生成一份报告，文件名为进程名称。
+"""
+
+import os
+import sys
+import json
+import time
+import builtins
+import threading
+import importlib.util
+from contextlib import contextmanager
+
+# 启用分析的环境变量，值为1时报告写入默认目录，否则视为报告目录
+PROFILE_ENV = "BOOK_NOTES_PROFILE"
+
+# 启动脚本开始运行的时间戳，用于计算子进程从启动脚本开始经过的时间
+LAUNCH_TIME_ENV = "BOOK_NOTES_LAUNCH_TIME"
+
+# 默认报告目录
+DEFAULT_PROFILE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "cache",
+    "startup_profile"
+)
+
+# 报告中列出的耗时最多的模块数量
+REPORT_TOP_IMPORTS = 20
+
+def is_enabled():
+    """是否启用了启动耗时分析"""
+    return bool(os.environ.get(PROFILE_ENV))
+
+def enable(launch_time=None):
+    """启用启动耗时分析，设置的环境变量会被子进程继承
+
+    Args:
+        launch_time: 启动时间戳，为None时使用当前时间
+    """
+    os.environ.setdefault(PROFILE_ENV, "1")
+    os.environ.setdefault(LAUNCH_TIME_ENV, str(launch_time or time.time()))
+
+class StartupProfiler:
+    """记录启动阶段和模块导入的耗时"""
+
+    def __init__(self, process_name):
+        """初始化
+
+        Args:
+            process_name: 进程名称，用作报告文件名
+        """
+        self.process_name = process_name
+        self.created = time.time()
+        self._origin = time.perf_counter()
+
+        launch_time = os.environ.get(LAUNCH_TIME_ENV)
+        self.launch_offset = self.created - float(launch_time) if launch_time else None
+
+        self.phases = []
+        self.marks = []
+        self.imports = []
+        self.finished = False
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._original_import = None
+
+    def now(self):
+        """从分析器创建开始经过的秒数"""
+        return time.perf_counter() - self._origin
+
+    @contextmanager
+    def phase(self, name):
+        """记录一个阶段的耗时，可在任意线程中使用
+
+        Args:
+            name: 阶段名称
+        """
+        start = self.now()
+        try:
+            yield
+        finally:
+            end = self.now()
+            with self._lock:
+                self.phases.append({
+                    "name": name,
+                    "start": round(start, 4),
+                    "duration": round(end - start, 4),
+                    "thread": threading.current_thread().name
+                })
+
+    def mark(self, name):
+        """记录一个时间点，例如首次绘制窗口
+
+        Args:
+            name: 时间点名称
+        """
+        with self._lock:
+            self.marks.append({"name": name, "time": round(self.now(), 4)})
+
+    def has_mark(self, name):
+        """是否已记录指定的时间点"""
+        with self._lock:
+            return any(mark["name"] == name for mark in self.marks)
+
+    def install_import_hook(self):
+        """替换内置的__import__，记录首次导入每个模块的耗时
+
+        嵌套导入按线程分别统计，自身耗时为总耗时减去其中导入其他模块的耗时。
+        """
+        if self._original_import is not None:
+            return
+
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall_import_hook(self):
+        """恢复内置的__import__"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """带计时的__import__"""
+        original = self._original_import
+        module_name = self._resolve_name(name, globals, level)
+
+        # 已导入的模块不计时
+        if module_name is None or module_name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        # 栈中每项记录已计入子模块导入的耗时
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+
+            with self._lock:
+                self.imports.append({
+                    "module": module_name,
+                    "inclusive": round(elapsed, 4),
+                    "self": round(elapsed - children, 4),
+                    "depth": len(stack),
+                    "thread": threading.current_thread().name
+                })
+
+    @staticmethod
+    def _resolve_name(name, globals, level):
+        """把相对导入的模块名转换为绝对名称，无法转换时返回None"""
+        if level == 0:
+            return name
+
+        package = (globals or {}).get("__package__")
+        if not package:
+            return None
+
+        try:
+            return importlib.util.resolve_name("." * level + name, package)
+        except (ImportError, ValueError):
+            return None
+
+    def to_dict(self):
+        """以字典形式返回分析结果"""
+        with self._lock:
+            return {
+                "process": self.process_name,
+                "pid": os.getpid(),
+                "created": self.created,
+                "launch_offset": None if self.launch_offset is None else round(self.launch_offset, 4),
+                "elapsed": round(self.now(), 4),
+                "phases": sorted(self.phases, key=lambda phase: phase["start"]),
+                "marks": list(self.marks),
+                "imports": sorted(self.imports, key=lambda item: item["inclusive"], reverse=True)
+            }
+
+    def report(self):
+        """生成文字报告
+
+        Returns:
+            str: 报告内容
+        """
+        data = self.to_dict()
+        lines = [f"=== 启动耗时分析: {data['process']} ==="]
+
+        if data["launch_offset"] is not None:
+            lines.append(f"进程启动前耗时（自启动脚本开始）: {data['launch_offset']:.3f} 秒")
+        lines.append(f"分析总时长: {data['elapsed']:.3f} 秒")
+
+        if data["phases"]:
+            lines.append("")
+            lines.append("阶段                              开始(秒)  耗时(秒)  线程")
+            for phase in data["phases"]:
+                lines.append(f"{phase['name']:<32}{phase['start']:>9.3f}{phase['duration']:>10.3f}  {phase['thread']}")
+
+        if data["marks"]:
+            lines.append("")
+            lines.append("时间点                            时间(秒)")
+            for mark in data["marks"]:
+                lines.append(f"{mark['name']:<32}{mark['time']:>9.3f}")
+
+        if data["imports"]:
+            total = sum(item["inclusive"] for item in data["imports"] if item["depth"] == 0)
+            lines.append("")
+            lines.append(f"模块导入共 {len(data['imports'])} 个，顶层导入合计 {total:.3f} 秒")
+            lines.append("模块                              总耗时(秒)  自身耗时(秒)")
+            for item in data["imports"][:REPORT_TOP_IMPORTS]:
+                lines.append(f"{item['module']:<32}{item['inclusive']:>11.3f}{item['self']:>13.3f}")
+
+        return "\n".join(lines)
+
+    def finish(self, output_dir=None):
+        """结束分析，打印报告并写入JSON文件，只执行一次
+
+        Args:
+            output_dir: 报告目录，为None时根据环境变量确定
+
+        Returns:
+            str: JSON文件路径，写入失败时返回None
+        """
+        if self.finished:
+            return None
+        self.finished = True
+        self.uninstall_import_hook()
+
+        print(self.report(), flush=True)
+
+        if output_dir is None:
+            value = os.environ.get(PROFILE_ENV, "1")
+            output_dir = DEFAULT_PROFILE_DIR if value == "1" else value
+
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            path = os.path.join(output_dir, f"{self.process_name}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            print(f"启动耗时报告已写入: {path}", flush=True)
+            return path
+        except Exception as e:
+            print(f"写入启动耗时报告失败: {str(e)}", flush=True)
+            return None
+
+class _DisabledProfiler:
+    """未启用分析时使用，所有操作均不做任何事"""
+
+    finished = True
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def mark(self, name):
+        pass
+
+    def has_mark(self, name):
+        return False
+
+    def install_import_hook(self):
+        pass
+
+    def uninstall_import_hook(self):
+        pass
+
+    def finish(self, output_dir=None):
+        return None
+
+# 当前进程的分析器
+_profiler = None
+
+def get_profiler(process_name=None):
+    """获取当前进程的分析器，未启用分析时返回不做任何事的分析器
+
+    Args:
+        process_name: 进程名称，首次调用时使用，默认为主脚本文件名
+
+    Returns:
+        分析器
+    """
+    global _profiler
+    if _profiler is None:
+        if is_enabled():
+            if process_name is None:
+                process_name = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+            _profiler = StartupProfiler(process_name)
+        else:
+            _profiler = _DisabledProfiler()
+    return _profiler
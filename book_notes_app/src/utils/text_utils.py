@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""文本处理辅助函数"""
+
+import re
+
+# 中日韩文字和全角标点，大语言模型的分词器通常每个字符对应约一个词元
+CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+# 拉丁字母和数字组成的单词，平均每个单词约1.3个词元
+WORD_PATTERN = re.compile(r"[A-Za-z0-9]+")
+
+# 其他非空白字符（标点等），每个字符按一个词元计算
+SYMBOL_PATTERN = re.compile(r"[^\sA-Za-z0-9\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+# 整合OCR结果时使用的分页标记，例如 "--- 图片 3 ---"
+PAGE_MARKER_PATTERN = re.compile(r"^--- 图片 (\d+) ---$", re.MULTILINE)
+
+def estimate_tokens(text):
+    """粗略估计文本的词元数量
+
+    Args:
+        text: 文本
+
+    Returns:
+        int: 估计的词元数量
+    """
+    if not text:
+        return 0
+
+    cjk = len(CJK_PATTERN.findall(text))
+    words = len(WORD_PATTERN.findall(text))
+    symbols = len(SYMBOL_PATTERN.findall(text))
+    return cjk + int(words * 1.3 + 0.5) + symbols
+
+def split_pages(text):
+    """按分页标记把整合的OCR文本拆分为各页
+
+    Args:
+        text: 整合的OCR文本
+
+    Returns:
+        list: (页码, 页面文本) 列表；没有分页标记时整段文本作为第1页
+    """
+    markers = list(PAGE_MARKER_PATTERN.finditer(text))
+    if not markers:
+        return [(1, text.strip())] if text.strip() else []
+
+    pages = []
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+        page_text = text[marker.end():end].strip()
+        if page_text:
+            pages.append((int(marker.group(1)), page_text))
+    return pages
+
+def join_pages(pages):
+    """用分页标记整合各页文本，是split_pages的逆操作
+
+    Args:
+        pages: (页码, 页面文本) 列表，空白页面会被跳过
+
+    Returns:
+        str: 整合的文本
+    """
+    return "\n\n".join(f"--- 图片 {page} ---\n\n{text}" for page, text in pages if text)
+
+def pack_chunks(pages, token_budget, groups=None):
+    """把连续的页面合并为不超过词元预算的分段
+
+    指定groups时不同组的页面不会合并到同一分段中。按页码固定分组时分段边界只取决于页码，
+    修改或重新识别某一页只会改变该页所在组的分段，其他分段保持不变。
+    单页超过预算时按段落和行拆分。
+
+    Args:
+        pages: (页码, 页面文本) 列表
+        token_budget: 每个分段的词元预算
+        groups: 与pages一一对应的组号列表，为None时所有页面依次合并
+
+    Returns:
+        list: (起始页码, 结束页码, 分段文本) 列表
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    current_group = None
+
+    def flush():
+        if current:
+            chunks.append((current[0][0], current[-1][0], "\n\n".join(part for _, part in current)))
+
+    if groups is None:
+        groups = [None] * len(pages)
+
+    for (page, page_text), group in zip(pages, groups):
+        for part in _split_text(page_text, token_budget):
+            tokens = estimate_tokens(part)
+            if current and (group != current_group or current_tokens + tokens > token_budget):
+                flush()
+                current = []
+                current_tokens = 0
+            current.append((page, part))
+            current_tokens += tokens
+            current_group = group
+
+    flush()
+    return chunks
+
+def _split_text(text, token_budget):
+    """把超过词元预算的文本按段落、行拆分
+
+    Args:
+        text: 文本
+        token_budget: 词元预算
+
+    Returns:
+        list: 拆分后的文本片段
+    """
+    if estimate_tokens(text) <= token_budget:
+        return [text]
+
+    parts = []
+    current = ""
+    for line in text.split("\n"):
+        # 单行仍然超出预算时按字符截断
+        while estimate_tokens(line) > token_budget:
+            cut = max(1, len(line) * token_budget // estimate_tokens(line))
+            parts.append(line[:cut])
+            line = line[cut:]
+
+        candidate = f"{current}\n{line}" if current else line
+        if current and estimate_tokens(candidate) > token_budget:
+            parts.append(current)
+            current = line
+        else:
+            current = candidate
+
+    if current:
+        parts.append(current)
+    return parts
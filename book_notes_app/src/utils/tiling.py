@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""分块检测：把高分辨率图像切分为相互重叠的块，合并各块检测出的文本框
+
+检测模型会把输入缩小到固定的最大边长，高分辨率扫描件整页检测时小字会被缩得无法检测，
+分块后每块都以原始分辨率检测，内存占用也只取决于块的大小。
+相邻的块互相重叠，跨越接缝的文本行会在两个块中各被检测出完整或截断的一部分，
+这里把来自不同块、位于同一行且互相重叠的文本框合并为一个。
+"""
+
+import math
+import numpy as np
+
+# 两个文本框的纵向重叠不低于较矮文本框高度的此比例时，视为同一行
+SAME_LINE_RATIO = 0.5
+
+def tile_origins(length, tile_size, overlap):
+    """计算一个方向上各块的起点，各块均匀分布并覆盖整个长度
+
+    Args:
+        length: 图像在该方向上的长度
+        tile_size: 块的边长
+        overlap: 相邻块的最小重叠长度
+
+    Returns:
+        list: 各块的起点
+
+    Raises:
+        ValueError: 块的边长不大于重叠长度
+    """
+    if tile_size <= overlap:
+        raise ValueError(f"块的边长({tile_size})必须大于重叠长度({overlap})")
+    if length <= tile_size:
+        return [0]
+    count = math.ceil((length - overlap) / (tile_size - overlap))
+    step = (length - tile_size) / (count - 1)
+    return [int(round(i * step)) for i in range(count)]
+
+def split_tiles(width, height, tile_size, overlap):
+    """把图像切分为相互重叠的块
+
+    Args:
+        width: 图像宽度
+        height: 图像高度
+        tile_size: 块的边长
+        overlap: 相邻块的最小重叠长度
+
+    Returns:
+        list: 各块的(x, y, 宽, 高)
+    """
+    return [
+        (x, y, min(tile_size, width - x), min(tile_size, height - y))
+        for y in tile_origins(height, tile_size, overlap)
+        for x in tile_origins(width, tile_size, overlap)
+    ]
+
+def merge_tile_boxes(boxes, tile_ids):
+    """合并不同块中检测出的同一文本行
+
+    来自不同块的两个文本框互相重叠，且纵向重叠不低于较矮者高度的一半时属于同一行，
+    合并为包含两者的矩形；同一块内的文本框保持检测模型的结果，不做合并。
+
+    Args:
+        boxes: 文本框，形状为[N, 4, 2]，整幅图像的坐标
+        tile_ids: 每个文本框所属块的序号
+
+    Returns:
+        list: 合并后的文本框，未合并的文本框保持原来的四边形
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)
+    tile_ids = np.asarray(tile_ids)
+    if len(boxes) < 2:
+        return list(boxes)
+
+    x0, y0 = boxes[:, :, 0].min(axis=1), boxes[:, :, 1].min(axis=1)
+    x1, y1 = boxes[:, :, 0].max(axis=1), boxes[:, :, 1].max(axis=1)
+    overlap_x = np.minimum(x1[:, None], x1[None, :]) - np.maximum(x0[:, None], x0[None, :])
+    overlap_y = np.minimum(y1[:, None], y1[None, :]) - np.maximum(y0[:, None], y0[None, :])
+    heights = y1 - y0
+    same_line = (
+        (overlap_x > 0)
+        & (overlap_y >= SAME_LINE_RATIO * np.minimum(heights[:, None], heights[None, :]))
+        & (tile_ids[:, None] != tile_ids[None, :])
+    )
+
+    # 并查集，接缝交叉处的文本行可能由多个块中的文本框连接在一起
+    parents = list(range(len(boxes)))
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    for i, j in zip(*np.nonzero(np.triu(same_line, 1))):
+        parents[find(i)] = find(j)
+
+    groups = {}
+    for i in range(len(boxes)):
+        groups.setdefault(find(i), []).append(i)
+
+    merged = []
+    for members in groups.values():
+        if len(members) == 1:
+            merged.append(boxes[members[0]])
+            continue
+        left, top = x0[members].min(), y0[members].min()
+        right, bottom = x1[members].max(), y1[members].max()
+        merged.append(np.array([[left, top], [right, top], [right, bottom], [left, bottom]], dtype=np.float32))
+    return merged
@@ -4,6 +4,14 @@
 import os
 import subprocess
 import sys
+import time
+
+from src.utils import startup_profiler
+
+# 启动耗时分析：加上 --profile-startup 参数时，启动脚本、环境检查和主程序各自输出启动耗时报告
+if "--profile-startup" in sys.argv:
+    startup_profiler.enable(time.time())
+profiler = startup_profiler.get_profiler("start")
 
 # 检查当前是否在虚拟环境中
 if not hasattr(sys, 'real_prefix'):
@@ -30,7 +38,8 @@ if not os.path.exists('check_env.py'):
     sys.exit(1)
 
 try:
-    subprocess.run([sys.executable, 'check_env.py'], check=True)
+    with profiler.phase("环境检查进程"):
+        subprocess.run([sys.executable, 'check_env.py'], check=True)
 except subprocess.CalledProcessError as e:
     print(f"环境检查失败: {e}")
     sys.exit(1)
@@ -40,8 +49,11 @@ if not os.path.exists('src/main.py'):
     print("未找到主程序")
     sys.exit(1)
 
+# 主程序的启动耗时由主程序自己记录
+profiler.finish()
+
 try:
-    subprocess.run([sys.executable, 'src/main.py'], check=True)
+    subprocess.run([sys.executable, 'src/main.py'] + sys.argv[1:], check=True)
 except subprocess.CalledProcessError as e:
     print(f"启动程序失败: {e}")
     sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""测试公用的辅助函数
+
+测试使用不加载模型的stub引擎，不需要安装PaddleOCR。
+"""
+
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.ocr_result import OCRResult
+
+def draw_page(lines=12, seed=0, size=(720, 960)):
+    """生成白底黑字的合成页面
+
+    Args:
+        lines: 文本行数量
+        seed: 随机数种子，不同的种子生成内容不同的页面
+        size: 图像尺寸(宽, 高)
+
+    Returns:
+        numpy.ndarray: BGR格式的图像
+    """
+    rng = np.random.default_rng(seed)
+    width, height = size
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    for i in range(lines):
+        # 不含空格，stub引擎把每行检测为一个文本行
+        text = "".join(rng.choice(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"), rng.integers(8, 30)))
+        cv2.putText(img, text, (40, 60 + i * 70), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 0), 2)
+    return img
+
+def make_result(texts, scores=None, page_height=1000, line_height=30, top=100):
+    """按从上到下的顺序生成每行一个文本框的OCRResult
+
+    Args:
+        texts: 各行文字
+        scores: 各行置信度，默认都为0.95
+        page_height: 页面高度
+        line_height: 行距
+        top: 第一行的纵坐标
+
+    Returns:
+        OCRResult: 识别结果
+    """
+    boxes = []
+    for i in range(len(texts)):
+        y = top + i * line_height
+        boxes.append([[50, y], [650, y], [650, y + 20], [50, y + 20]])
+    if scores is None:
+        scores = [0.95] * len(texts)
+    return OCRResult(texts, np.array(boxes, dtype=np.float32), scores, image_size=(700, page_height))
+
+@pytest.fixture
+def page_image():
+    """合成页面的生成函数"""
+    return draw_page
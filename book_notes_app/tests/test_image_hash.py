@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from src.utils.image_hash import DuplicateIndex, _hamming_distances
+
+def test_detects_recaptured_page(page_image):
+    index = DuplicateIndex()
+    img = page_image(seed=1)
+    noisy = np.clip(img.astype(np.int16) + np.random.default_rng(0).integers(-8, 9, img.shape), 0, 255).astype(np.uint8)
+
+    assert index.add("a", img) is None
+    assert index.add("b", page_image(seed=2)) is None
+    assert index.add("c", noisy) == "a"
+    assert index.duplicates() == {"c": "a"}
+
+def test_remove_original_promotes_duplicate(page_image):
+    index = DuplicateIndex()
+    img = page_image(seed=3)
+    index.add("a", img)
+    index.add("b", img.copy())
+
+    index.remove("a")
+    assert index.duplicates() == {}
+    assert "a" not in index
+    assert len(index) == 1
+
+def test_remove_original_repoints_later_duplicates(page_image):
+    index = DuplicateIndex()
+    img = page_image(seed=4)
+    index.add("a", img)
+    index.add("other", page_image(seed=5))
+    index.add("b", img.copy())
+    index.add("c", img.copy())
+    assert index.duplicates() == {"b": "a", "c": "a"}
+
+    index.remove("a")
+    assert index.duplicates() == {"c": "b"}
+    assert index.duplicate_of("c") == "b"
+
+def test_hamming_distances():
+    hashes = np.array([0, 1, 0xFF, 2**64 - 1], dtype=np.uint64)
+    assert _hamming_distances(hashes, 0).tolist() == [0, 1, 8, 64]
+    assert _hamming_distances(hashes, 2**64 - 1).tolist() == [64, 63, 56, 0]
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from src.services.ocr_cache import OCRCache
+from src.utils.image_utils import write_image
+
+CONFIG = {"engine": "stub", "max_width": 1280}
+
+def test_array_key_depends_on_pixels_and_config(page_image):
+    img = page_image(seed=1)
+    key = OCRCache.make_key(img, CONFIG)
+
+    assert OCRCache.make_key(img.copy(), CONFIG) == key
+
+    changed = img.copy()
+    changed[0, 0] = 0
+    assert OCRCache.make_key(changed, CONFIG) != key
+    assert OCRCache.make_key(img, dict(CONFIG, max_width=960)) != key
+
+def test_array_key_includes_shape():
+    flat = np.zeros((4, 6, 3), dtype=np.uint8)
+    assert OCRCache.make_key(flat, CONFIG) != OCRCache.make_key(flat.reshape(6, 4, 3), CONFIG)
+
+def test_file_key_depends_on_content_not_name(tmp_path, page_image):
+    img = page_image(seed=2)
+    first = str(tmp_path / "a.jpg")
+    second = str(tmp_path / "b.jpg")
+    write_image(first, img)
+    write_image(second, img)
+
+    assert OCRCache.make_key(first, CONFIG) == OCRCache.make_key(second, CONFIG)
+
+    write_image(second, page_image(seed=3))
+    assert OCRCache.make_key(first, CONFIG) != OCRCache.make_key(second, CONFIG)
+
+def test_put_get_and_eviction(tmp_path):
+    cache = OCRCache(str(tmp_path / "cache.sqlite3"), max_bytes=300)
+    try:
+        cache.put("a", "x" * 100)
+        assert cache.get("a") == "x" * 100
+        assert cache.get("missing") is None
+
+        # 超出容量时淘汰最久未使用的条目
+        cache.put("b", "y" * 100)
+        cache.get("a")
+        cache.put("c", "z" * 100)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+    finally:
+        cache.close()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""使用stub引擎测试完整的识别流程和缓存"""
+
+import pytest
+
+from src.services.ocr_cache import OCRCache
+from src.services.ocr_service import OCRService
+from src.services.orientation import SESSION_CONFIRM_PAGES
+from src.utils.image_utils import write_image
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = OCRCache(str(tmp_path / "cache.sqlite3"))
+    yield cache
+    cache.close()
+
+def count_detections(service):
+    """统计文字检测的调用次数"""
+    calls = []
+    detect = service.backend.detect
+
+    def counted(img):
+        calls.append(img.shape)
+        return detect(img)
+
+    service.backend.detect = counted
+    return calls
+
+def test_stub_engine_recognizes_lines(page_image):
+    service = OCRService(engine="stub", crop_page=False)
+    result = service.recognize(page_image(lines=8))
+
+    assert len(result) == 8
+    assert all(text.startswith("行") for text in result.texts)
+    assert service.recognize(page_image(lines=8)).texts == result.texts
+
+def test_repeated_recognition_hits_cache(cache, page_image):
+    service = OCRService(engine="stub", cache=cache)
+    calls = count_detections(service)
+    img = page_image(seed=4)
+
+    first = service.recognize(img)
+    detections = len(calls)
+    second = service.recognize(img.copy())
+
+    assert detections > 0
+    assert len(calls) == detections
+    assert second.texts == first.texts
+
+def test_frame_result_cached_under_file_key(tmp_path, cache, page_image):
+    service = OCRService(engine="stub", cache=cache)
+    img = page_image(seed=5)
+    result = service.recognize(img)
+
+    path = str(tmp_path / "capture.jpg")
+    write_image(path, img)
+    service.cache_result(path, result)
+
+    calls = count_detections(service)
+    assert service.recognize(path).texts == result.texts
+    assert calls == []
+
+def test_session_orientation_results_not_cached(cache, page_image):
+    service = OCRService(engine="stub", cache=cache)
+    results = [service.recognize(page_image(seed=10 + i)) for i in range(SESSION_CONFIRM_PAGES + 2)]
+
+    from_session = [bool(result.stats.get("cls_session")) for result in results]
+    assert from_session == [False] * SESSION_CONFIRM_PAGES + [True, True]
+    assert cache.stats()["entries"] == SESSION_CONFIRM_PAGES
+
+def test_without_session_orientation_every_page_is_sampled(page_image):
+    service = OCRService(engine="stub", session_orientation=False)
+    results = [service.recognize(page_image(seed=20 + i)) for i in range(SESSION_CONFIRM_PAGES + 2)]
+
+    assert not any(result.stats.get("cls_session") for result in results)
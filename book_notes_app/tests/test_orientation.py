@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.services.orientation import OrientationEstimator, SESSION_CONFIRM_PAGES, RECHECK_INTERVAL
+
+def test_estimate_requires_agreement_and_confidence():
+    assert OrientationEstimator.estimate([("0", 0.99), ("0", 0.95)]) == 0
+    assert OrientationEstimator.estimate([("180", 0.99), ("180", 0.97)]) == 180
+    assert OrientationEstimator.estimate([("0", 0.99), ("180", 0.99)]) is None
+    assert OrientationEstimator.estimate([("0", 0.6), ("0", 0.7)]) is None
+    assert OrientationEstimator.estimate([]) is None
+
+def test_session_orientation_after_confirmed_pages():
+    estimator = OrientationEstimator()
+    for _ in range(SESSION_CONFIRM_PAGES):
+        assert estimator.plan_page() is None
+        estimator.page_done(180)
+
+    plans = [estimator.plan_page() for _ in range(RECHECK_INTERVAL + 1)]
+    assert plans == [180] * RECHECK_INTERVAL + [None]
+
+def test_unclear_page_resets_session():
+    estimator = OrientationEstimator()
+    for _ in range(SESSION_CONFIRM_PAGES):
+        estimator.page_done(0)
+    estimator.page_done(None)
+    assert estimator.plan_page() is None
+
+def test_no_carry_over_samples_every_page():
+    estimator = OrientationEstimator(carry_over=False)
+    for _ in range(SESSION_CONFIRM_PAGES + 2):
+        assert estimator.plan_page() is None
+        estimator.page_done(0)
+
+def test_choose_sample_prefers_wide_lines():
+    import numpy as np
+    crops = [np.zeros((20, width, 3), dtype=np.uint8) for width in (50, 300, 120, 400, 80, 200, 60, 250)]
+    assert OrientationEstimator.choose_sample(crops, range(8)) == [3, 1, 7, 5, 2, 4]
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from src.utils.prompt_pruning import prepare_notes_text
+
+from conftest import make_result
+
+def body_lines(count, seed=0):
+    """内容互不相似的正文行"""
+    rng = np.random.default_rng(seed)
+    return ["".join(chr(c) for c in rng.integers(0x4e00, 0x9fa5, 24)) for _ in range(count)]
+
+BODY = body_lines(20)
+
+def test_drops_low_confidence_lines():
+    result = make_result(["保留的正文内容", "噪声", "另一行正文内容"], [0.95, 0.3, 0.9])
+    text, stats = prepare_notes_text([(1, result)])
+
+    assert "噪声" not in text
+    assert "保留的正文内容" in text
+    assert stats["low_confidence"] == 1
+
+def test_drops_running_headers_and_page_numbers():
+    pages = []
+    for page in range(1, 5):
+        texts = ["第一章 读书的方法"] + BODY[page * 3:page * 3 + 3] + [str(page + 10)]
+        pages.append((page, make_result(texts, top=5, line_height=65, page_height=300)))
+    text, stats = prepare_notes_text(pages)
+
+    assert "读书的方法" not in text
+    assert "\n11\n" not in f"\n{text}\n"
+    assert stats["headers_footers"] == 8
+    assert all(line in text for line in BODY[3:15])
+
+def test_no_token_budget_by_default():
+    pages = [
+        (page, make_result(body_lines(20, seed=page), [0.7 + 0.01 * i for i in range(20)]))
+        for page in range(1, 40)
+    ]
+    text, stats = prepare_notes_text(pages)
+
+    assert stats["over_budget"] == 0
+    assert stats["tokens"] == stats["original_tokens"]
+
+def test_token_budget_drops_lowest_scores(caplog):
+    scores = [0.99 - 0.01 * i for i in range(20)]
+    result = make_result(BODY, scores)
+    text, stats = prepare_notes_text([(1, result)], token_budget=300)
+
+    assert stats["over_budget"] > 0
+    assert stats["tokens"] <= 300
+    assert BODY[0] in text
+    assert BODY[-1] not in text
+    assert "超出词元预算 300" in caplog.text
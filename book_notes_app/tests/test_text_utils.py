@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+from collections import OrderedDict
+
+from src.services.ai_service import AIService, CHUNK_PAGES
+from src.utils.text_utils import estimate_tokens, split_pages, join_pages, pack_chunks
+
+def page_text(chars, lines=10):
+    return "\n".join(["字" * chars] * lines)
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("读书笔记") == 4
+    assert estimate_tokens("hello world") == 3
+
+def test_split_and_join_pages():
+    pages = [(1, "第一页"), (3, "第三页\n第二行")]
+    assert split_pages(join_pages(pages)) == pages
+    assert split_pages("没有分页标记") == [(1, "没有分页标记")]
+
+def test_pack_chunks_respects_budget():
+    pages = [(i, page_text(50)) for i in range(6)]
+    chunks = pack_chunks(pages, 1200)
+
+    assert all(estimate_tokens(text) <= 1200 for _, _, text in chunks)
+    assert [(start, end) for start, end, _ in chunks] == [(0, 1), (2, 3), (4, 5)]
+
+def test_pack_chunks_splits_oversized_page():
+    chunks = pack_chunks([(0, page_text(100, lines=30))], 1000)
+    assert len(chunks) == 3
+    assert all(start == end == 0 for start, end, _ in chunks)
+
+def test_pack_chunks_keeps_groups_apart():
+    pages = [(i, "短") for i in range(6)]
+    chunks = pack_chunks(pages, 1000, [i // 3 for i in range(6)])
+    assert [(start, end) for start, end, _ in chunks] == [(0, 2), (3, 5)]
+
+def test_pack_chunks_boundaries_stable_when_page_grows():
+    pages = [(i, page_text(40)) for i in range(12)]
+    groups = [i // 3 for i in range(12)]
+    before = pack_chunks(pages, 1500, groups)
+
+    pages[0] = (0, page_text(100))
+    after = pack_chunks(pages, 1500, groups)
+
+    # 只有第一组的分段改变
+    unchanged = [chunk for chunk in before if chunk[0] >= 3]
+    assert [chunk for chunk in after if chunk[0] >= 3] == unchanged
+    assert len(unchanged) == len(before) - 1
+
+class FakeAIService(AIService):
+    """不连接Ollama，记录分段总结的提示词"""
+
+    def __init__(self):
+        self.model = "test"
+        self.chunk_summaries = OrderedDict()
+        self.summary_lock = threading.Lock()
+        self.prompts = []
+
+    def _complete(self, prompt):
+        self.prompts.append(prompt)
+        return "要点" * 150
+
+def test_map_reduce_reuses_summaries_after_edit():
+    service = FakeAIService()
+    pages = [(i + 1, page_text(60)) for i in range(20)]
+
+    first = service._map_reduce(join_pages(pages))
+    first_calls = len(service.prompts)
+
+    # 第1页变长，只有第1页所在的分段和包含它的合并分段需要重新总结
+    pages[0] = (1, page_text(100))
+    service.prompts.clear()
+    second = service._map_reduce(join_pages(pages))
+
+    assert first_calls > 10
+    assert len(service.prompts) == 2
+    assert [title for title, _ in second] == [title for title, _ in first]
+
+def test_map_reduce_titles_do_not_stack():
+    service = FakeAIService()
+    pages = [(i + 1, page_text(60)) for i in range(20)]
+    titles = [title for title, _ in service._map_reduce(join_pages(pages))]
+
+    assert titles[0].startswith("第1页 - ")
+    assert titles[-1].endswith(" - 第20页")
+    assert all(title.count(" - ") == 1 for title in titles)
+
+def test_first_round_chunks_follow_page_groups():
+    service = FakeAIService()
+    pages = [(i + 1, "短文本") for i in range(2 * CHUNK_PAGES)]
+    service._summarize_chunks = lambda chunks, *args: [(title, "") for title, _ in chunks]
+
+    titles = [title for title, _ in service._map_reduce(join_pages(pages))]
+    assert titles == [f"第1页 - 第{CHUNK_PAGES}页", f"第{CHUNK_PAGES + 1}页 - 第{2 * CHUNK_PAGES}页"]
+
+def test_map_reduce_cancels_promptly():
+    service = FakeAIService()
+    cancel_event = threading.Event()
+
+    def slow_complete(prompt):
+        service.prompts.append(prompt)
+        time.sleep(1.0)
+        return "要点" * 150
+
+    service._complete = slow_complete
+    pages = [(i + 1, page_text(60)) for i in range(20)]
+    threading.Timer(0.1, cancel_event.set).start()
+
+    start = time.perf_counter()
+    summaries = service._map_reduce(join_pages(pages), cancel_event)
+
+    # 不等待正在进行的请求，也不开始新一轮的总结
+    assert time.perf_counter() - start < 0.8
+    assert summaries == []
+    assert len(service.prompts) <= 2
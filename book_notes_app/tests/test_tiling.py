@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from src.services.ocr_service import OCRService, TILE_OVERLAP
+from src.utils.tiling import tile_origins, split_tiles, merge_tile_boxes
+
+def rect(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+def test_tile_origins_cover_length_with_overlap():
+    origins = tile_origins(3000, 960, 128)
+    assert origins[0] == 0
+    assert origins[-1] + 960 == 3000
+    assert all(b - a <= 960 - 128 for a, b in zip(origins, origins[1:]))
+    assert tile_origins(900, 960, 128) == [0]
+
+def test_tile_size_must_exceed_overlap():
+    with pytest.raises(ValueError):
+        tile_origins(3000, 128, 128)
+    for tile_size in (64, TILE_OVERLAP):
+        with pytest.raises(ValueError):
+            OCRService(engine="stub", tile_size=tile_size)
+    assert OCRService(engine="stub", tile_size=0).tile_size == 0
+    assert OCRService(engine="stub", tile_size=None).tile_size is None
+
+def test_split_tiles_cover_image():
+    tiles = split_tiles(2000, 1500, 960, 128)
+    covered = np.zeros((1500, 2000), dtype=bool)
+    for x, y, width, height in tiles:
+        assert width <= 960 and height <= 960
+        covered[y:y + height, x:x + width] = True
+    assert covered.all()
+
+def test_merges_line_split_across_tiles():
+    boxes = [rect(100, 500, 980, 530), rect(850, 502, 1700, 531)]
+    merged = merge_tile_boxes(boxes, [0, 1])
+
+    assert len(merged) == 1
+    np.testing.assert_allclose(merged[0], rect(100, 500, 1700, 531))
+
+def test_keeps_boxes_from_same_tile():
+    boxes = [rect(100, 500, 600, 530), rect(550, 502, 900, 531)]
+    assert len(merge_tile_boxes(boxes, [0, 0])) == 2
+
+def test_keeps_separate_lines():
+    boxes = [rect(100, 500, 980, 530), rect(850, 540, 1700, 570)]
+    assert len(merge_tile_boxes(boxes, [0, 1])) == 2
+
+def test_merges_chain_across_tile_corner():
+    boxes = [rect(100, 900, 980, 930), rect(850, 900, 1800, 930), rect(1700, 901, 2500, 931)]
+    merged = merge_tile_boxes(boxes, [0, 1, 2])
+    assert len(merged) == 1
+    np.testing.assert_allclose(merged[0], rect(100, 900, 2500, 931))